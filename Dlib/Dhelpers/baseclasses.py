@@ -40,34 +40,35 @@ def iter_all_vars(cls, condition):
 
 class KeepInstanceRefs:
     
-    __instance_ref_dict__ = collections.defaultdict(list)
-    # this class attribute is a dictionary, supposed to contain one list of
-    # instance
-    # references for each sub class.
-    # {cls1: instance_ref_list1, cls2: instance_ref_list2, etc.}
-    # if cls has no instances, simply return an empty list by default.
+    __instance_ref_dict__ = weakref.WeakKeyDictionary()
+    # this class attribute is a dictionary, supposed to contain one dict of
+    # instance references (with the ids of the instances as keys) for each
+    # sub class.
+    # {cls1: instance_ref_dict1, cls2: instance_ref_dict2, etc.}
+    # The sub classes are weakly referenced, so that temporary classes
+    # can be deleted together with their instances.
     
     def __init__(self):
         super().__init__() #remove?
-        self.__instance_ref_dict__[self.__class__].append(weakref.ref(self))
-        # self.__instance_ref_dict__[self.__class__] is the list containing
+        refs = self.__instance_ref_dict__.setdefault(self.__class__, {})
+        key = id(self)
+        def remove(ref):
+            # called when the instance is deleted, so that dead weakrefs do
+            # not pile up
+            if refs.get(key) is ref: del refs[key]
+        refs[key] = weakref.ref(self, remove)
+        # self.__instance_ref_dict__[self.__class__] is the dict containing
         # all instance references for this given
         # sub-class we need a weakref, so that we don't get errors if the
         # instance object is deleted
     
     @classmethod
     def get_instances(cls):
-        instance_ref_list = cls.__instance_ref_dict__[cls]
-        for inst_ref in instance_ref_list:
+        # iterate over a copy, as instances might be deleted meanwhile
+        refs = cls.__instance_ref_dict__.get(cls, {})
+        for inst_ref in tuple(refs.values()):
             inst = inst_ref()
-            if inst is None:
-                pass
-                # print("deleting",inst)
-                # instance_ref_list.remove(inst_ref) #remove dead weakrefs
-                # automatically
-            else:
-                # print("found: ",inst)
-                yield inst
+            if inst is not None: yield inst
           
     @classmethod
     def subclass_from_name(cls, name):
@@ -82,6 +83,12 @@ class KeepInstanceRefs:
         return sum(1 for _ in cls.get_instances())
         # this is equal to the generator's length
     
+    @classmethod
+    def instance_ref_num(cls):
+        # number of stored references, including the ones of instances which
+        # are currently being deleted
+        return len(cls.__instance_ref_dict__.get(cls, ()))
+    
     
     
 
@@ -18,6 +18,7 @@
 #
 import time, threading, importlib
 from .container import container
+from .timerwheel import timer_wheel
 
 def count(key, dic, waittime, maxc=None):
     """
@@ -30,11 +31,14 @@ def count(key, dic, waittime, maxc=None):
         dic[key] = 0
         return 0
     dic[key] = c + 1
-    threading.Thread(target=uncount,args=(key, dic, waittime)).start()
+    timer_wheel.schedule(waittime, _decrease, key, dic)
     return c
 
 def uncount(key, dic, waittime):
     time.sleep(waittime)
+    _decrease(key, dic)
+
+def _decrease(key, dic):
     if dic[key] > 0:
         dic[key] -= 1
 
@@ -0,0 +1,330 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading, collections, traceback
+from time import perf_counter_ns
+from .measuring import LatencyHistogram
+
+
+class ConcurrencyLimit:
+    """Maximum number of tasks which may be active at the same time. active
+    is only changed by a BoundedExecutor while holding its lock, so several
+    limits can be acquired atomically together. If the limit is reached,
+    the policy decides what happens to a new task:
+    
+    reject: the task is dropped.
+    queue: the task waits until the limit allows to run it.
+    replace_pending: like queue, but a task with the same key which did not
+        start yet is dropped in favour of the new one.
+    """
+    
+    policies = ("reject", "queue", "replace_pending")
+    
+    def __init__(self, limit=None, policy="reject"):
+        if policy not in self.policies: raise ValueError(
+                f"policy must be one of {self.policies}, not {policy!r}")
+        self.limit = limit  # None means unlimited
+        self.policy = policy
+        self.active = 0
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.active}/{self.limit} " \
+            f"policy={self.policy}>"
+    
+    @property
+    def full(self):
+        return self.limit is not None and self.active >= self.limit
+
+
+
+class Task:
+    
+    __slots__ = ("func", "args", "kwargs", "limits", "key", "t_submitted",
+        "acquired", "cancelled", "started", "_done", "_result", "_exception")
+    
+    def __init__(self, func, args, kwargs, limits, key):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.limits = limits
+        self.key = key
+        self.t_submitted = perf_counter_ns()
+        self.acquired = False
+        self.cancelled = False
+        self.started = False
+        self._done = threading.Event()
+        self._result = None
+        self._exception = None
+    
+    def done(self):
+        return self._done.is_set()
+    
+    def result(self, timeout=None):
+        """Wait for the task and return its result or raise its exception.
+        Returns None if the task was cancelled."""
+        if not self._done.wait(timeout): raise TimeoutError(
+                f"Task {self.func} did not finish within {timeout} seconds.")
+        if self._exception is not None: raise self._exception
+        return self._result
+    
+    def exception(self, timeout=None):
+        self._done.wait(timeout)
+        return self._exception
+
+
+
+class BoundedExecutor:
+    """A pool of at most max_workers threads which run submitted tasks.
+    
+    Worker threads are started on demand and end after idle_timeout seconds
+    without work, so an idle executor does not keep threads around. They
+    are daemon threads, so they never delay the exit of the interpreter;
+    use shutdown to wait for the running tasks before. Tasks
+    which cannot run yet because of their ConcurrencyLimits wait in a queue
+    of at most max_queue entries; if it is full, new tasks are rejected.
+    The time tasks spend in the queue and running is recorded in the
+    LatencyHistograms queue_wait and run_time.
+    """
+    
+    def __init__(self, max_workers=8, max_queue=256, idle_timeout=5,
+            name="BoundedExecutor"):
+        if max_workers < 1: raise ValueError(max_workers)
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.idle_timeout = idle_timeout
+        self.name = name
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._queue = collections.deque()
+        self._pending_keys = {}
+        self._workers = 0
+        self._idle = 0
+        self._thread_num = 0
+        self._threads = set()
+        self._shutdown = False
+        self.queue_wait = LatencyHistogram()
+        self.run_time = LatencyHistogram()
+        self.counts = collections.Counter()
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} '{self.name}' with " \
+            f"{self._workers} workers and {len(self._queue)} queued tasks>"
+    
+    def submit(self, func, *args, limits=(), key=None, **kwargs):
+        """Run func(*args, **kwargs) in a worker thread, respecting the
+        given ConcurrencyLimits. Returns the Task, or None if it was
+        rejected."""
+        task = Task(func, args, kwargs, limits, key)
+        with self._lock:
+            if self._shutdown: raise RuntimeError(
+                    f"{self!r} was shut down, no new tasks can be submitted.")
+            full = [l for l in limits if l.full]
+            if any(l.policy == "reject" for l in full):
+                self.counts["rejected"] += 1
+                return None
+            if key is not None and any(l.policy == "replace_pending" for l in
+                    limits):
+                old = self._pending_keys.get(key)
+                if old is not None and not old.started:
+                    self._cancel(old)
+                    self.counts["replaced"] += 1
+            if len(self._queue) >= self.max_queue:
+                self.counts["rejected"] += 1
+                return None
+            if not full: self._acquire(task)
+            self._queue.append(task)
+            if key is not None: self._pending_keys[key] = task
+            self.counts["submitted"] += 1
+            if self._idle:
+                self._work.notify()
+            elif self._workers < self.max_workers:
+                self._start_worker()
+        return task
+    
+    def _cancel(self, task):
+        task.cancelled = True
+        if task.acquired: self._release(task)
+        self._queue.remove(task)
+        task._done.set()
+    
+    @staticmethod
+    def _acquire(task):
+        for l in task.limits: l.active += 1
+        task.acquired = True
+    
+    @staticmethod
+    def _release(task):
+        for l in task.limits: l.active -= 1
+        task.acquired = False
+    
+    def _start_worker(self):
+        self._workers += 1
+        self._thread_num += 1
+        thread = threading.Thread(target=self._worker,
+                name=f"{self.name}-{self._thread_num}", daemon=True)
+        self._threads.add(thread)
+        thread.start()
+    
+    def _next_task(self):
+        # the first queued task which may run now
+        for task in self._queue:
+            if task.acquired:
+                break
+            if not any(l.full for l in task.limits):
+                self._acquire(task)
+                break
+        else:
+            return None
+        self._queue.remove(task)
+        task.started = True
+        if self._pending_keys.get(task.key) is task:
+            del self._pending_keys[task.key]
+        return task
+    
+    def _worker(self):
+        work = self._work
+        while True:
+            with work:
+                task = self._next_task()
+                while task is None:
+                    if not self._shutdown:
+                        self._idle += 1
+                        notified = work.wait(self.idle_timeout)
+                        self._idle -= 1
+                        task = self._next_task()
+                    if task is None and (self._shutdown or not notified):
+                        self._workers -= 1
+                        self._threads.discard(threading.current_thread())
+                        return
+            t_start = perf_counter_ns()
+            self._run(task)
+            t_end = perf_counter_ns()
+            with work:
+                self.queue_wait.record(t_start - task.t_submitted)
+                self.run_time.record(t_end - t_start)
+                self._release(task)
+                self.counts["completed"] += 1
+                if task._exception is not None: self.counts["errors"] += 1
+                # queued tasks might have waited for these limits
+                if self._queue and self._idle: work.notify()
+    
+    @staticmethod
+    def _run(task):
+        try:
+            task._result = task.func(*task.args, **task.kwargs)
+        except BaseException as e:
+            # like in a plain thread, SystemExit only ends the action
+            task._exception = e
+            if not isinstance(e, SystemExit): traceback.print_exc()
+        finally:
+            task._done.set()
+    
+    def shutdown(self, wait=True, cancel_queued=False):
+        """Reject new tasks and let the workers end when the queue is
+        empty. With wait, block until they have ended."""
+        with self._lock:
+            self._shutdown = True
+            if cancel_queued:
+                for task in list(self._queue): self._cancel(task)
+            self._work.notify_all()
+            threads = list(self._threads)
+        if wait:
+            for thread in threads: thread.join()
+    
+    def queue_depth(self):
+        return len(self._queue)
+    
+    def stats(self):
+        return dict(self.counts, workers=self._workers,
+            queue_depth=len(self._queue),
+            queue_wait=self.queue_wait.summary(),
+            run_time=self.run_time.summary())
+
+
+
+def _noop():
+    pass
+
+class ProcessPool:
+    """A warm pool of worker processes for CPU-heavy tasks, which would
+    otherwise hold the GIL in the threads of this process.
+    
+    The processes are started by warm() or with the first submit. Arguments
+    and results must be picklable. limit is a ConcurrencyLimit for the
+    number of tasks using this pool at the same time; pass it along with
+    the other limits to BoundedExecutor.submit.
+    
+    mp_context is a multiprocessing context or the name of a start method.
+    By default, forkserver is used where available and spawn otherwise, as
+    forking this process with its hook threads could deadlock the workers."""
+    
+    def __init__(self, max_workers=2, policy="queue", mp_context=None):
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.limit = ConcurrencyLimit(max_workers, policy)
+        self._pool = None
+        self._lock = threading.Lock()
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} with {self.max_workers} " \
+            f"processes, {'started' if self._pool else 'not started'}>"
+    
+    @property
+    def pool(self):
+        pool = self._pool
+        if pool is None:
+            with self._lock:
+                if self._pool is None:
+                    import concurrent.futures
+                    self._pool = concurrent.futures.ProcessPoolExecutor(
+                            self.max_workers, mp_context=self.context())
+                pool = self._pool
+        return pool
+    
+    def context(self):
+        mp_context = self.mp_context
+        if mp_context is None or isinstance(mp_context, str):
+            import multiprocessing
+            if mp_context is None:
+                mp_context = "forkserver" if "forkserver" in \
+                    multiprocessing.get_all_start_methods() else "spawn"
+            mp_context = multiprocessing.get_context(mp_context)
+        return mp_context
+    
+    def warm(self, wait=True):
+        """Start all worker processes now, so the first task does not have
+        to wait for it."""
+        pool = self.pool
+        futures = [pool.submit(_noop) for _ in range(self.max_workers)]
+        if wait:
+            for f in futures: f.result()
+        return self
+    
+    def submit(self, func, *args, **kwargs):
+        return self.pool.submit(func, *args, **kwargs)
+    
+    def run(self, func, *args, **kwargs):
+        """Run func in a worker process and return its result. Exceptions
+        are re-raised here (with the remote traceback as cause)."""
+        return self.submit(func, *args, **kwargs).result()
+    
+    def shutdown(self, wait=True):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=wait)
+                self._pool = None
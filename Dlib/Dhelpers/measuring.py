@@ -0,0 +1,77 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+
+
+class LatencyHistogram:
+    """Log-linear histogram of durations given in nanoseconds. Each power of
+    two is split into 8 sub buckets, so the reported percentiles are exact
+    to about 10 percent while recording a value costs only a few integer
+    operations and does not allocate."""
+    
+    sub_bits = 3
+    
+    def __init__(self):
+        self.counts = [0] * (64 << self.sub_bits)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+    
+    def record(self, ns):
+        if ns < 0: ns = 0
+        bl = ns.bit_length()
+        sb = self.sub_bits
+        if bl <= sb:
+            index = ns
+        else:
+            index = ((bl - sb) << sb) | ((ns >> (bl - sb - 1)) & ((1<<sb)-1))
+        self.counts[index] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max: self.max = ns
+    
+    def _bucket_value(self, index):
+        sb = self.sub_bits
+        if index < (1 << sb): return index
+        shift = (index >> sb) - 1
+        low = ((1 << sb) | (index & ((1 << sb) - 1))) << shift
+        return low + (1 << shift) // 2  # middle of the bucket
+    
+    def percentile(self, p):
+        if not self.count: return None
+        rank = p / 100 * self.count
+        cumulative = 0
+        for index, c in enumerate(self.counts):
+            if not c: continue
+            cumulative += c
+            if cumulative >= rank: return min(self._bucket_value(index),
+                    self.max)
+        return self.max
+    
+    def reset(self):
+        self.__init__()
+    
+    def summary(self, unit=1e6):
+        # by default, all values are returned in milliseconds
+        if not self.count: return dict(count=0)
+        return dict(count=self.count, mean=self.total / self.count / unit,
+                p50=self.percentile(50) / unit, p95=self.percentile(95) / unit,
+                p99=self.percentile(99) / unit, max=self.max / unit)
+    
+    def __repr__(self):
+        return super().__repr__()[:-1] + f" with summary {self.summary()}>"
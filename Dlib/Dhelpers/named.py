@@ -16,7 +16,7 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 #
 #
-
+import sys, os, marshal, hashlib, tempfile
 from .baseclasses import KeepInstanceRefs
 from .arghandling import check_type
 from .decorators import (extend_to_collections)
@@ -29,6 +29,11 @@ class NamedObj(KeepInstanceRefs):
     StandardizingDict = None
     defined_groups = None
     NameContainer = None
+    _alias_index = None
+    
+    names_version = 0
+    # increased whenever names of any NamedObj subclass are added or
+    # removed, so caches depending on the names can check their validity
     
     #__slots__ = ["names", "groups", "mapping_dict", "mappings"]
     # memory saving is negligible
@@ -73,7 +78,8 @@ class NamedObj(KeepInstanceRefs):
         except KeyError:
             self.defined_groups[group_name] = [self]
         else:
-            if self not in members: members.append(self)
+            # compare identities, not names (which is slow)
+            if not any(m is self for m in members): members.append(self)
     
     def add_names(self, *names):
         #names = list(extract_if_single_collection(names))
@@ -99,6 +105,7 @@ class NamedObj(KeepInstanceRefs):
             name2 = self.make_comparable(name)
             self.defined_objects[name2] = self
             self.name_to_stnd_name[name2] = self.name
+        NamedObj.names_version += 1
         
         
     @classmethod
@@ -109,6 +116,36 @@ class NamedObj(KeepInstanceRefs):
             if inst is ignore:
                 continue  # this possibilitx is intended for the __del__ method
             inst._register_instance()
+        NamedObj.names_version += 1
+    
+    @classmethod
+    def _from_table(cls, names, keys, groups):
+        # fast alternative to __init__ for NameContainer's compiled tables.
+        # The names were checked when the table was compiled.
+        self = cls.__new__(cls)
+        KeepInstanceRefs.__init__(self)
+        # int names are converted like in add_names
+        self.names = [str(n) if isinstance(n, int) else n for n in names]
+        self.groups = list(groups)
+        self.mappings = {}
+        stnd_name = self.names[0]
+        for key in keys:
+            cls.defined_objects[key] = self
+            cls.name_to_stnd_name[key] = stnd_name
+        return self
+    
+    def _unregister_instance(self):
+        # the opposite of _register_instance, without touching the other
+        # instances' names
+        for name in self.names_comparable:
+            if self.defined_objects.get(name) is self:
+                del self.defined_objects[name]
+                self.name_to_stnd_name.pop(name, None)
+        for group_name in self.groups:
+            members = self.defined_groups.get(group_name)
+            if members is None: continue
+            members[:] = [m for m in members if m is not self]
+        NamedObj.names_version += 1
     
     def _register_instance(self):
         for name in self.names_comparable:
@@ -120,7 +157,7 @@ class NamedObj(KeepInstanceRefs):
             self.name_to_stnd_name[name] = self.name
         for group_name in self.groups:
             members = self.defined_groups[group_name]
-            if self not in members: members.append(self)
+            if not any(m is self for m in members): members.append(self)
     
     @property
     def name(self):
@@ -161,6 +198,38 @@ class NamedObj(KeepInstanceRefs):
 
         
     
+    @classmethod
+    def alias_index(cls):
+        # maps the names of the instances, as given and in comparable form,
+        # to the instance which instance(name) returns. Names for which
+        # instance finds another instance (or none) are left out. Rebuilt
+        # after names changed.
+        index = cls._alias_index
+        if index is None or index[0] != NamedObj.names_version:
+            d = {}
+            spellings = set(cls.defined_objects)
+            for inst in cls.get_instances(): spellings.update(inst.names)
+            for name in spellings:
+                try:
+                    d[name] = cls.instance(name)
+                except (KeyError, ValueError):
+                    pass
+            index = cls._alias_index = (NamedObj.names_version, d)
+        return index[1]
+    
+    @classmethod
+    def canonical(cls, name):
+        # the instance with this name, or name itself if there is none
+        if isinstance(name, cls): return name
+        try:
+            return cls.alias_index()[name]
+        except (KeyError, TypeError):
+            pass
+        try:
+            return cls.instance(name)
+        except (KeyError, ValueError, TypeError):
+            return name
+    
     @classmethod
     def get_stnd_name(cls, name):
         if isinstance(name, cls): return name.name
@@ -191,18 +260,30 @@ class NamedObj(KeepInstanceRefs):
     def stnd_names(cls):
         return set(cls.name_to_stnd_name.values())
     
+    @classmethod
+    def registry_stats(cls):
+        # sizes of the name registry of this class. bytes is the memory used
+        # by the registry dicts themselves (not by the names and instances).
+        containers = (cls.defined_objects, cls.name_to_stnd_name,
+            cls.names_with_important_capital_letters, cls.defined_groups,
+            cls.__instance_ref_dict__.get(cls, {}))
+        return dict(instances=cls.instance_num(),
+            instance_refs=cls.instance_ref_num(),
+            names=len(cls.defined_objects),
+            stnd_names=len(cls.stnd_names()),
+            groups=len(cls.defined_groups),
+            names_with_important_capital_letters=len(
+                    cls.names_with_important_capital_letters),
+            bytes=sum(sys.getsizeof(c) for c in containers))
+    
     def __del__(self):
-        # 1. if an object is completely deleted and garbage collected,
-        #   recalculate the refs
-        # 2.  this will happen automatically after this instance is
-        # completely destroyed
-        # because the get_instances() method notices that the weakref is
-        # targeting an non-existing object
-        # 3. But for now, the instance is not yet destroyed,
-        #  so we need to explicitely tell the calculate ref function to
-        # ignore this instance
-        #raise RuntimeError
-        self.re_calculate_refs(ignore=self)
+        # If an instance is deleted (e.g. together with its class, because
+        # the registry holds references to the instances), only remove its
+        # own names. Its weakref removes itself from the instance refs.
+        try:
+            self._unregister_instance()
+        except AttributeError:
+            pass  # __init__ failed before names were set
     
     
     def __eq__(self, other):
@@ -235,6 +316,8 @@ class StandardizingDict:
         self.registered_names = dict()
         self.others_comparable= others_comparable
         self.make_comparable = self.NamedClass.make_comparable
+        self.changes = 0  # increased by each __setitem__ and __delitem__
+        self._frozen = None
         if new_info: self.update(new_info, func=func)
         
     
@@ -287,6 +370,7 @@ class StandardizingDict:
     
     
     def __setitem__(self, k, v) -> None:
+        self.changes += 1
         try:
             inst = self.NamedClass.instance(k)
         except KeyError:
@@ -312,6 +396,7 @@ class StandardizingDict:
 
         
     def __delitem__(self, k):
+        self.changes += 1
         try:
             inst = self.NamedClass.instance(k)
         except KeyError:
@@ -373,6 +458,123 @@ class StandardizingDict:
     def items(self, prefer_single=False):
         return zip(self.keys(prefer_single=prefer_single), self.values())
     
+    def freeze(self):
+        """Return an immutable FrozenStandardizingDict snapshot of this
+        dict, for fast lookups."""
+        return FrozenStandardizingDict(self)
+    
+    def frozen(self):
+        # the last snapshot, if neither this dict nor the names have been
+        # changed since. Otherwise a new one.
+        f = self._frozen
+        if f is None or f.changes != self.changes or \
+                f.names_version != NamedObj.names_version:
+            f = self._frozen = self.freeze()
+        return f
+
+
+
+class FrozenStandardizingDict:
+    """Immutable snapshot of a StandardizingDict. The results for all the
+    names of the NamedClass (as given and in comparable form) and for the
+    keys of the dict are precomputed into flat dicts, so usually a lookup
+    is a single hash probe. Other keys are looked up like in
+    StandardizingDict, using the copied contents."""
+    
+    def __init__(self, stand_dict):
+        NamedClass = self.NamedClass = stand_dict.NamedClass
+        self.changes = stand_dict.changes
+        self.names_version = NamedObj.names_version
+        self.others_comparable = stand_dict.others_comparable
+        self.make_comparable = stand_dict.make_comparable
+        self._registered_names = dict(stand_dict.registered_names)
+        self._other_dict = dict(stand_dict.other_dict)
+        self._instance_values = dict(stand_dict.registered_instances)
+        spellings = set(self._registered_names) | set(self._other_dict)
+        for inst in NamedClass.get_instances():
+            for name in inst.names:
+                spellings.update((name, str(name), self.make_comparable(name)))
+        lookup = {}
+        applied = {}
+        for spelling in spellings:
+            try:
+                lookup[spelling] = self._getitem(spelling)
+            except KeyError:
+                pass
+            try:
+                applied[spelling] = self._apply(spelling)
+            except ValueError:
+                pass
+        self._lookup = lookup
+        self._applied = applied
+    
+    def __repr__(self):
+        return super().__repr__()[:-1] + f" with {len(self._lookup)} " \
+            f"spellings>"
+    
+    def _comparable(self, k):
+        return self.make_comparable(k) if self.others_comparable else k
+    
+    # _getitem and _apply do exactly the same as StandardizingDict's
+    # __getitem__ and apply, but with the copied contents
+    
+    def _getitem(self, k):
+        if isinstance(k, self.NamedClass): return self._instance_values[k]
+        try:
+            return self._registered_names[self.make_comparable(k)]
+        except KeyError:
+            return self._other_dict[self._comparable(k)]
+    
+    def _apply(self, k):
+        try:
+            inst = self.NamedClass.instance(k)
+        except KeyError:
+            try:
+                return self._other_dict[self._comparable(k)]
+            except KeyError:
+                return k
+        try:
+            return self._instance_values[inst]
+        except KeyError:
+            return inst.name
+    
+    def __getitem__(self, k):
+        if not isinstance(k, self.NamedClass):
+            # instances would be equal to str keys of their names
+            try:
+                return self._lookup[k]
+            except (KeyError, TypeError):
+                pass
+        try:
+            return self._getitem(k)
+        except KeyError:
+            raise KeyError(k)
+    
+    def get(self, k, default=None):
+        try:
+            return self[k]
+        except KeyError:
+            return default
+    
+    def __contains__(self, item):
+        try:
+            self[item]
+            return True
+        except KeyError:
+            return False
+    
+    def __len__(self):
+        return len(self._lookup)
+    
+    def apply(self, k):
+        # like StandardizingDict.apply
+        if not isinstance(k, self.NamedClass):
+            try:
+                return self._applied[k]
+            except (KeyError, TypeError):
+                pass
+        return self._apply(k)
+    
     
     
 
@@ -395,6 +597,15 @@ class GroupContainer:
             raise AttributeError
 
 class NameContainer:
+    
+    table_format = 1  # increase if the format of compiled tables changes
+    
+    table_dir = None
+    # where the compiled tables are stored. None means the user's cache
+    # directory, e.g. ~/.cache/Dpowers/names
+    
+    _unwritable = set()  # table directories which failed, not tried again
+    
     def __init__(self, NamedClass):
         self.NamedClass = NamedClass
         self.group = GroupContainer(NamedClass)
@@ -403,7 +614,148 @@ class NameContainer:
     
     def update(self, NameDefiningClass):
         self.name_defining_classes.append(NameDefiningClass)
-        self._iter_class(NameDefiningClass)
+        NamedClass = self.NamedClass
+        if NamedClass.defined_objects or NamedClass.instance_ref_num():
+            # compiled tables are only valid for an empty registry
+            self._iter_class(NameDefiningClass)
+            return
+        path, source_hash = self._table_location(NameDefiningClass)
+        table = self._load_table(path, source_hash)
+        if table is not None:
+            try:
+                self._check_table(table)
+            except (KeyError, ValueError, TypeError):
+                table = None  # damaged table, e.g. by an editor
+        if table is None:
+            self._iter_class(NameDefiningClass)
+            if path: self._save_table(path, source_hash)
+        else:
+            self._apply_table(table)
+    
+    # Creating all the instances from the name defining class takes a
+    # noticeable part of the import time of big name collections. So the
+    # result is stored in a compiled table in table_dir (not next to the
+    # byte code, the package might be installed read-only), and loaded in
+    # one step by the next import. The table is invalidated by a changed
+    # source of the defining module, of this module or of a module defining
+    # NamedClass or one of its base classes.
+    
+    @classmethod
+    def _table_dir(cls):
+        if cls.table_dir: return os.fspath(cls.table_dir)
+        if sys.platform == "win32":
+            base = os.environ.get("LOCALAPPDATA") or os.path.expanduser(
+                    os.path.join("~", "AppData", "Local"))
+        elif sys.platform == "darwin":
+            base = os.path.expanduser(os.path.join("~", "Library", "Caches"))
+        else:
+            base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser(
+                    os.path.join("~", ".cache"))
+        return os.path.join(base, "Dpowers", "names")
+    
+    @staticmethod
+    def _module_file(cls):
+        try:
+            return sys.modules[cls.__module__].__file__
+        except (KeyError, AttributeError):
+            return None
+    
+    def _table_location(self, NameDefiningClass):
+        NamedClass = self.NamedClass
+        file = self._module_file(NameDefiningClass)
+        if file is None: return None, None
+        sources = {file, __file__}
+        sources.update(self._module_file(c) for c in NamedClass.__mro__)
+        sources.discard(None)
+        source_hash = hashlib.sha1()
+        try:
+            for source in sorted(sources):
+                with open(source, "rb") as f: source_hash.update(f.read())
+        except OSError:
+            return None, None
+        source_hash = source_hash.hexdigest()
+        # the same module can be installed at several places
+        location = hashlib.sha1(os.fsencode(file)).hexdigest()[:12]
+        name = f"{NamedClass.__module__}.{NamedClass.__qualname__}." \
+            f"{NameDefiningClass.__qualname__}.{location}.names"
+        return os.path.join(self._table_dir(), name), source_hash
+    
+    def _load_table(self, path, source_hash):
+        if path is None: return None
+        try:
+            with open(path, "rb") as f: data = marshal.load(f)
+            table_format, stored_hash, table = data
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        if table_format != self.table_format or stored_hash != source_hash:
+            return None
+        return table
+    
+    def _save_table(self, path, source_hash):
+        directory = os.path.dirname(path)
+        if sys.dont_write_bytecode or directory in self._unwritable: return
+        NamedClass = self.NamedClass
+        instances = list(NamedClass.get_instances())
+        index = {id(inst): i for i, inst in enumerate(instances)}
+        keys = [[] for _ in instances]
+        for key, inst in NamedClass.defined_objects.items():
+            keys[index[id(inst)]].append(key)
+        table = dict(
+            instances=[(inst.names, keys[i], inst.groups) for i, inst in
+                enumerate(instances)],
+            attributes={attr: index[id(inst)] for attr, inst in
+                self.__dict__.items() if isinstance(inst, NamedClass)},
+            groups={name: [index[id(inst)] for inst in members] for
+                name, members in NamedClass.defined_groups.items()},
+            capital=list(NamedClass.names_with_important_capital_letters))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # a unique temporary file, as several processes might write the
+            # same table at the same time
+            with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp",
+                    prefix=os.path.basename(path), delete=False) as f:
+                marshal.dump((self.table_format, source_hash, table), f)
+            os.replace(f.name, path)
+        except (OSError, ValueError):
+            # e.g. no write permission. Just don't use a table, and don't
+            # try again for the other name collections
+            self._unwritable.add(directory)
+            try:
+                os.remove(f.name)
+            except (OSError, NameError):
+                pass
+    
+    @staticmethod
+    def _check_table(table):
+        # raises KeyError, ValueError or TypeError if the table can't be
+        # applied completely
+        num = len(table["instances"])
+        for names, keys, groups in table["instances"]:
+            if not names: raise ValueError("instance without names")
+            for s in names:
+                # like in _iter_class and add_names
+                if not isinstance(s, (str, int)): raise TypeError(s)
+            for s in (*keys, *groups):
+                if not isinstance(s, str): raise TypeError(s)
+        indexes = list(table["attributes"].values())
+        for members in table["groups"].values(): indexes += members
+        for i in indexes:
+            if not isinstance(i, int): raise TypeError(i)
+            if not 0 <= i < num: raise ValueError(i)
+        for s in (*table["attributes"], *table["groups"], *table["capital"]):
+            if not isinstance(s, str): raise TypeError(s)
+    
+    def _apply_table(self, table):
+        NamedClass = self.NamedClass
+        from_table = NamedClass._from_table
+        instances = [from_table(*entry) for entry in table["instances"]]
+        for attr, i in table["attributes"].items():
+            setattr(self, attr, instances[i])
+        for name, members in table["groups"].items():
+            NamedClass.defined_groups[name] = [instances[i] for i in members]
+        NamedClass.names_with_important_capital_letters.update(
+                table["capital"])
+        NamedObj.names_version += 1
                 
     def _iter_class(self,  cls, group_name=None, excluded=()):
         excluded = list(excluded) #creates copy
@@ -0,0 +1,134 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading, traceback, math, heapq
+from time import monotonic
+
+
+class Timer:
+    
+    __slots__ = ("tick", "func", "args", "kwargs", "cancelled")
+    
+    def __init__(self, tick, func, args, kwargs):
+        self.tick = tick
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+
+
+
+class TimerWheel:
+    """Runs delayed calls from a single thread, instead of one sleeping
+    thread per pending call.
+    
+    A hashed timing wheel: each timer is put into the slot of the tick at
+    which it expires. The ticks which have timers are kept in a heap, so the
+    thread sleeps until the earliest of them instead of waking up every
+    tick. Timers fire at most one tick late. The thread is started on demand
+    and ends when no timers are pending. The calls run in this thread, so
+    they must return quickly; longer work should be handed over to another
+    thread or executor.
+    """
+    
+    def __init__(self, tick=0.005, slots=512, name="TimerWheel"):
+        self.tick = tick
+        self.name = name
+        self._slots = [[] for _ in range(slots)]
+        self._ticks = []  # heap of the ticks with pending timers
+        self._tick_set = set()  # the same ticks, for fast membership tests
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending = 0
+        self._running = False
+        self._t0 = 0
+        self._cursor = 0  # the last tick which was processed
+        self.wakeups = 0
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} '{self.name}' with " \
+            f"{self._pending} pending timers>"
+    
+    def __len__(self):
+        return self._pending
+    
+    def schedule(self, delay, func, *args, **kwargs):
+        """Call func(*args, **kwargs) after delay seconds. Returns a Timer
+        whose cancel method prevents the call."""
+        with self._lock:
+            if not self._running:
+                self._t0 = monotonic()
+                self._cursor = 0
+                self._running = True
+                # a daemon, pending timers must not keep the interpreter
+                # running at exit
+                threading.Thread(target=self._run, name=self.name,
+                        daemon=True).start()
+            tick = math.ceil((monotonic() + delay - self._t0) / self.tick)
+            timer = Timer(max(tick, self._cursor + 1), func, args, kwargs)
+            if timer.tick not in self._tick_set:
+                ticks = self._ticks
+                if not ticks or timer.tick < ticks[0]:
+                    self._wakeup.notify()  # sleeping longer than needed
+                heapq.heappush(ticks, timer.tick)
+                self._tick_set.add(timer.tick)
+            self._slots[timer.tick % len(self._slots)].append(timer)
+            self._pending += 1
+        return timer
+    
+    def _run(self):
+        slots = self._slots
+        n = len(slots)
+        ticks = self._ticks
+        while True:
+            due = []
+            with self._lock:
+                if not self._pending:
+                    self._running = False
+                    return
+                delay = self._t0 + ticks[0] * self.tick - monotonic()
+                if delay > 0:
+                    # schedule notifies if an earlier timer is added
+                    self._wakeup.wait(delay)
+                    self.wakeups += 1
+                    continue
+                now_tick = max(ticks[0],
+                        int((monotonic() - self._t0) / self.tick))
+                while ticks and ticks[0] <= now_tick:
+                    tick = heapq.heappop(ticks)
+                    self._tick_set.discard(tick)
+                    slot = slots[tick % n]
+                    keep = []
+                    for timer in slot:
+                        (due if timer.tick == tick else keep).append(timer)
+                    slot[:] = keep
+                self._cursor = max(self._cursor, now_tick)
+                self._pending -= len(due)
+            for timer in due:
+                if timer.cancelled: continue
+                try:
+                    timer.func(*timer.args, **timer.kwargs)
+                except Exception:
+                    traceback.print_exc()
+
+
+timer_wheel = TimerWheel()
+# shared by Dhelpers and Dpowers for short delayed calls
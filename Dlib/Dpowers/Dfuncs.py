@@ -24,7 +24,8 @@ from Dhelpers.builtin_manipulation import execute_after_print,\
 from Dhelpers.arghandling import PositiveInt
 from .winapps import pythoneditor
 
-from .events import KeyboardAdaptor, MouseAdaptor, KeyWaiter, HookAdaptor, CombinedSender
+from .events import KeyboardAdaptor, MouseAdaptor, KeyWaiter, HookAdaptor, \
+    CombinedSender, JournalRecorder, JournalReplayer
 from . import dlg, ntfy, clip, Win, launch
 from .windowpower import WindowObject
 
@@ -259,4 +260,21 @@ def replay_pressed_keys(delay=100):
     if KeyWaiter.wait_for_key("ShiftL"):
         ntfy("reinjecting")
         k.reinject(delay=delay)
-        ntfy("reinjecting done")
\ No newline at end of file
+        ntfy("reinjecting done")
+
+
+def save_input_journal(path, maxtime=3600, cursor=False):
+    rec = JournalRecorder(path, maxtime, cursor=cursor)
+    ntfy("Recording input events", 5, f"Abort by pressing Esc. File: {path}")
+    with rec:
+        KeyWaiter.wait_for_key("Esc", timeout=maxtime)
+    ntfy("Stop recording input events", 2, f"{rec.num} events recorded.")
+    return rec
+
+def replay_input_journal(path, speed=1):
+    ntfy("Press ShiftL to start")
+    if KeyWaiter.wait_for_key("ShiftL"):
+        ntfy("replaying")
+        rep = JournalReplayer(path, speed).start()
+        ntfy("replaying done")
+        return rep
\ No newline at end of file
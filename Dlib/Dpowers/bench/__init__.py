@@ -0,0 +1,143 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+"""Benchmarks for the hot paths of Dpowers.
+
+Run them via::
+
+    python -m Dpowers.bench --output results.json
+    python -m Dpowers.bench --baseline results.json --threshold 0.2
+
+``--baseline`` without a file compares against ``baseline.json`` in this
+package. It holds the results of a reference machine (see its ``meta``
+entry), so it only shows regressions reliably on similar hardware. To
+compare against your own machine, store its results before a change and
+pass that file, or refresh the bundled one with::
+
+    python -m Dpowers.bench --output Dlib/Dpowers/bench/baseline.json
+
+A benchmark is a setup function registered with the :func:`benchmark`
+decorator. It returns a callable run(n) which performs n operations (or a
+tuple (run, teardown) if something must be cleaned up afterwards). The
+harness calibrates n, repeats the measurement and reports the best time
+per operation in nanoseconds. Setup functions raise :class:`SkipBenchmark`
+if something they need (e.g. a window backend) is not available.
+"""
+
+import json, platform, time, statistics, os
+from time import perf_counter_ns
+
+benchmarks = {}
+
+default_baseline = os.path.join(os.path.dirname(__file__), "baseline.json")
+
+
+class SkipBenchmark(Exception):
+    pass
+
+
+def benchmark(name=None, group="micro"):
+    def decorator(setup_func):
+        bench_name = name or setup_func.__name__
+        if bench_name in benchmarks:
+            raise ValueError(f"Benchmark {bench_name} defined twice.")
+        benchmarks[bench_name] = (group, setup_func)
+        return setup_func
+    return decorator
+
+
+def measure(run, repeat=5, min_time=0.05):
+    """Return a result dict for run(n), with n chosen such that one
+    measurement takes at least min_time seconds."""
+    n = 1
+    while True:
+        t0 = perf_counter_ns()
+        run(n)
+        elapsed = perf_counter_ns() - t0
+        if elapsed >= min_time * 1e9 or n >= 1 << 24: break
+        n *= 2 if elapsed > min_time * 1e8 else 10
+    timings = [elapsed / n]
+    for _ in range(repeat - 1):
+        t0 = perf_counter_ns()
+        run(n)
+        timings.append((perf_counter_ns() - t0) / n)
+    return dict(ns_per_op=min(timings), median=statistics.median(timings),
+        ops=n, repeat=repeat)
+
+
+def run_benchmarks(names=None, groups=None, repeat=5, min_time=0.05,
+        report=None):
+    from . import definitions  # registers the benchmarks
+    results = {}
+    skipped = {}
+    for name, (group, setup_func) in benchmarks.items():
+        if names and not any(s in name for s in names): continue
+        if groups and group not in groups: continue
+        try:
+            run = setup_func()
+        except SkipBenchmark as e:
+            skipped[name] = str(e)
+            if report: report(f"{name}: skipped ({e})")
+            continue
+        teardown = None
+        if isinstance(run, tuple): run, teardown = run
+        try:
+            result = measure(run, repeat=repeat, min_time=min_time)
+        finally:
+            if teardown: teardown()
+        result["group"] = group
+        results[name] = result
+        if report: report(f"{name}: {result['ns_per_op']:.0f} ns/op")
+    return dict(meta=meta_info(), results=results, skipped=skipped)
+
+
+def meta_info():
+    from .. import __version__
+    return dict(dpowers=__version__, python=platform.python_version(),
+        implementation=platform.python_implementation(),
+        machine=platform.machine(), system=platform.system(),
+        time=time.strftime("%Y-%m-%dT%H:%M:%S"))
+
+
+def compare(results, baseline, threshold=0.2):
+    """Return a list of (name, baseline_ns, new_ns, ratio) for each
+    benchmark which got slower than the baseline by more than threshold
+    (a fraction, 0.2 = 20 percent). Benchmarks without baseline entry are
+    ignored."""
+    regressions = []
+    base_results = baseline["results"]
+    for name, result in results["results"].items():
+        try:
+            base_ns = base_results[name]["ns_per_op"]
+        except KeyError:
+            continue
+        new_ns = result["ns_per_op"]
+        ratio = new_ns / base_ns if base_ns else float("inf")
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + threshold:
+            regressions.append((name, base_ns, new_ns, ratio))
+    return regressions
+
+
+def save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
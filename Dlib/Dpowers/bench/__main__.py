@@ -0,0 +1,59 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import argparse, sys, os
+from . import run_benchmarks, compare, save, load, default_baseline
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m Dpowers.bench",
+            description="Run the Dpowers benchmarks.")
+    parser.add_argument("names", nargs="*",
+            help="only run benchmarks whose name contains one of these")
+    parser.add_argument("-g", "--group", action="append",
+            choices=("micro", "e2e"), help="only run this group")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("-b", "--baseline", nargs="?", const=default_baseline,
+            help="compare against the results stored in this JSON file "
+                 "(default: the bundled baseline.json)")
+    parser.add_argument("-t", "--threshold", type=float, default=0.2,
+            help="allowed slowdown against the baseline (default 0.2 = 20%%)")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05,
+            help="minimum duration of one measurement in seconds")
+    parser.add_argument("-q", "--quiet", action="store_true")
+    args = parser.parse_args(argv)
+    
+    report = None if args.quiet else lambda s: print(s, file=sys.stderr)
+    results = run_benchmarks(args.names, args.group, repeat=args.repeat,
+            min_time=args.min_time, report=report)
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, load(args.baseline), args.threshold)
+    if args.output: save(results, args.output)
+    for name, base_ns, new_ns, ratio in regressions:
+        print(f"REGRESSION {name}: {base_ns:.0f} -> {new_ns:.0f} ns/op "
+              f"({ratio:.2f}x)", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    exitcode = main()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os._exit(exitcode)  # the threads of the hook lanes are not daemonic
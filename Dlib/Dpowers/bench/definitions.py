@@ -0,0 +1,176 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import itertools, string, threading
+from . import benchmark, SkipBenchmark
+from ..events import (NamedKey, NamedButton, StringAnalyzer, HookAdaptor,
+    KeyboardAdaptor, PatternListener)
+from ..events.hookpower import adapt_virtual
+
+
+letters = string.ascii_lowercase + string.digits
+modifiers = ("ctrl", "alt", "shift", "win")
+
+def hotkey_strings(num):
+    combinations = itertools.chain.from_iterable(
+            itertools.combinations(modifiers, i) for i in range(1, 5))
+    strings = ("+".join(mods + (key,)) for mods, key in
+        itertools.product(combinations, letters))
+    strings = list(itertools.islice(strings, num))
+    if len(strings) < num: raise ValueError(num)
+    return strings
+
+def cycled(seq, n):
+    return itertools.islice(itertools.cycle(seq), n)
+
+
+virtual_hook = HookAdaptor("virtual")
+virtual_keyb = KeyboardAdaptor("virtual")
+virtual_keyb.default_delay = virtual_keyb.default_duration = 0
+# measure the parsing and sending, not sleeping
+
+
+@benchmark()
+def create_event_obj():
+    create = virtual_hook.keys().__class__._create_event_obj
+    calls = [(name, press) for name in ("a", "Enter", "ctrl", "F5", "[250]")
+        for press in (True, False)]
+    def run(n):
+        for name, press in cycled(calls, n): create(name, press=press)
+    return run
+
+
+def pattern_listener(num_hotkeys, chord=False):
+    listener = PatternListener()
+    for s in hotkey_strings(num_hotkeys):
+        listener.add_hotkey(s, print, chord=chord)
+    # plain key presses never complete one of the modifier combinations
+    events = [NamedKey.instance(k).press_event for k in "hello world"
+        if k != " "]
+    event = listener.event
+    def run(n):
+        for e in cycled(events, n): event(e)
+    return run
+
+for _num in (10, 100, 500):
+    benchmark(f"pattern_listener_event_{_num}")(
+            lambda num=_num: pattern_listener(num))
+
+@benchmark()
+def chord_listener_event_500():
+    return pattern_listener(500, chord=True)
+
+
+@benchmark()
+def create_from_str():
+    analyzer = StringAnalyzer(NamedKey, NamedButton)
+    strings = ("ctrl+shift+a", "a b c_rls", "Enter", "alt+F4 left_rls",
+        "shift+mouse_left")
+    def run(n):
+        for s in cycled(strings, n): analyzer.create_from_str(s)
+    return run
+
+
+@benchmark()
+def standardizing_dict_lookup():
+    d = NamedKey.StandardizingDict({k: k.upper() for k in letters})
+    d.update({"Enter": 1, "ctrl": 2, "shift": 3, "Escape": 4})
+    keys = ["a", "return", "Control_L", "esc", "z", "shift_l",
+        NamedKey.instance("Enter").press_event, "unknown_name"]
+    get = d.get
+    def run(n):
+        for k in cycled(keys, n): get(k)
+    return run
+
+
+@benchmark()
+def named_event_get_from_index():
+    table = {name: i for i, name in enumerate(hotkey_strings(200))}
+    table.update({k: k for k in letters})
+    index = NamedKey.Event.index(table)
+    events = [NamedKey.instance(k).press_event for k in "hello world"
+        if k != " "]
+    def run(n):
+        for e in cycled(events, n): e.get_from(index)
+    return run
+
+
+@benchmark()
+def sender_send():
+    send = virtual_keyb.send
+    strings = ("hello", "<ctrl+s>", "<home>a line<return end>",
+        "<shift+home backspace>x")
+    def run(n):
+        for s in cycled(strings, n): send(s, pause_hotkeys=False)
+    return run
+
+
+@benchmark()
+def window_search():
+    from .. import Win
+    try:
+        Win.adaptor.IDs_from_property("title", "")
+    except Exception as e:
+        raise SkipBenchmark(f"window backend not available: {e!r}")
+    def run(n):
+        for _ in range(n): Win("Dpowers benchmark nonexisting title").IDs()
+    return run
+
+
+
+def pipeline(callback_factory):
+    # end to end: virtual device -> hook lane -> callback
+    counter = [0]
+    done = threading.Event()
+    target = [0]
+    inner = callback_factory()
+    def callback(event):
+        inner(event)
+        counter[0] += 1
+        if counter[0] >= target[0]: done.set()
+    hook = virtual_hook.keys(callback, None).start()
+    emit = adapt_virtual.Keyhook.handler.emit
+    calls = itertools.cycle(adapt_virtual.key_taps(*"helloworld"))
+    # continue the cycle in each run, so a key is never pressed twice
+    # without release (multipress events would not reach the callback)
+    # the lane drops events instead of blocking the producer, so never
+    # emit more than fit into its buffer at once
+    chunk = adapt_virtual.Keyhook.queue_reader.event_queue.size // 2
+    def run(n):
+        while n > 0:
+            k = min(n, chunk)
+            n -= k
+            done.clear()
+            target[0] = counter[0] + k
+            for args, kwargs in itertools.islice(calls, k):
+                emit(*args, **kwargs)
+            if not done.wait(60): raise RuntimeError(
+                    f"Only {counter[0]} of {target[0]} events arrived.")
+    return run, hook.stop
+
+@benchmark(group="e2e")
+def hook_pipeline():
+    return pipeline(lambda: lambda event: None)
+
+@benchmark(group="e2e")
+def trigger_pipeline_100():
+    def factory():
+        listener = PatternListener()
+        for s in hotkey_strings(100): listener.add_hotkey(s, print)
+        return listener.event
+    return pipeline(factory)
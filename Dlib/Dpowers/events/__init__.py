@@ -87,6 +87,7 @@ from .sending.event_sender import *
 
 from .waiter import *
 from .trigman import *
+from .journal import JournalRecorder, JournalReader, JournalReplayer
 
 hotkeys.TriggerManager = TriggerManager
 hotkeys.paused = TriggerManager.paused
@@ -21,6 +21,7 @@ from Dhelpers.named import NamedObj
 from . import hotkeys
 from abc import ABC, abstractmethod
 from time import sleep
+import functools
 
 
 
@@ -88,6 +89,7 @@ class MouseMoveEvent(Event):
         self.x = x
         self.y = y
         self.relative = relative
+        self.screen_coordinates = screen_coordinates
         self.abbr = "r" if relative else "a"
     
     def __str__(self):
@@ -103,54 +105,29 @@ class StringAnalyzeUtilitites(ABC):
     
     @classmethod
     def split_str(cls,string):
-        splitted_string = string.split(cls.sequence_symbol)  # split at space
-        # print("splitted", splitted_string)
-        corrected_split = []
-        skip_next = False
-        for n in range(len(splitted_string)):
-            if skip_next:
-                skip_next = False
-                continue
-            part = splitted_string[n]
-            if part.startswith(cls.combination_symbol):
-                corrected_split[-1] += part
-            else:
-                corrected_split.append(part)
-            if part.endswith(cls.combination_symbol):
-                corrected_split[-1] += splitted_string[n + 1]
-                skip_next = True  # print("corrected",corrected_split)
-        # now the corrected split has taken the combinations into account
-        for s in corrected_split:
-            if cls.combination_symbol in s:
-                yield s.split(cls.combination_symbol)
-            else:
-                yield s
+        # returns a tuple of strings and tuples (for combinations)
+        return _split_str(string, cls.sequence_symbol, cls.combination_symbol)
     
     def create_from_str(cls_or_self, string, hotkey=False, **kwargs):
-        events = []
-        for entry in cls_or_self.split_str(string):
-            if isinstance(entry, str):
-                event = cls_or_self._create_from_str(entry, **kwargs)
-                events.append(event)
-                if hotkey:
-                    try:
-                        p = event.press
-                    except AttributeError:
-                        raise ValueError("Option hotkey=True "
-                                         f"does not make sense for f{event}.")
-                    if not p: raise ValueError(
-                            "Hotkey mode enabled. Use option  hotkey=False to "
-                            "only send press or release events.")
-                    events.append(event.reverse())
-            elif isinstance(entry, (tuple, list)):
-                t = tuple(cls_or_self._create_from_str(item, **kwargs)  for
-                        item in entry)
-                events.append(EventCombination(*t))
-            else:
-                raise TypeError
-        if len(events) == 0: return ""
-        if len(events) == 1: return events[0]
-        return EventSequence(*events)
+        # The events parsed from string are cached, and copies of them are
+        # returned, as they are mutable (e.g. multipress).
+        # The cache is cleared if names of a NamedObj subclass change.
+        version = NamedObj.names_version
+        if version != _parse_cache_version[0]:
+            _parse_split.cache_clear()
+            _parse_cache_version[0] = version
+        split = cls_or_self.split_str(string)
+        key = tuple(kwargs.items())
+        try:
+            hash(key)
+        except TypeError:
+            return _events_from_split(split, hotkey, functools.partial(
+                    cls_or_self._create_from_str, **kwargs))
+        # keyed by the event classes, not by a StringAnalyzer instance
+        parser = cls_or_self if isinstance(cls_or_self, type) else tuple(
+                cls_or_self.event_classes)
+        return _events_from_split(_parse_split(parser, split, key, version),
+                hotkey, _copy_event)
 
 
     @abstractmethod
@@ -158,6 +135,76 @@ class StringAnalyzeUtilitites(ABC):
         raise NotImplementedError
 
 
+parse_cache_size = 1024
+
+@functools.lru_cache(maxsize=parse_cache_size)
+def _split_str(string, sequence_symbol, combination_symbol):
+    splitted_string = string.split(sequence_symbol)  # split at space
+    corrected_split = []
+    skip_next = False
+    for n in range(len(splitted_string)):
+        if skip_next:
+            skip_next = False
+            continue
+        part = splitted_string[n]
+        if part.startswith(combination_symbol):
+            corrected_split[-1] += part
+        else:
+            corrected_split.append(part)
+        if part.endswith(combination_symbol):
+            corrected_split[-1] += splitted_string[n + 1]
+            skip_next = True
+    # now the corrected split has taken the combinations into account
+    return tuple(tuple(s.split(combination_symbol)) if combination_symbol
+        in s else s for s in corrected_split)
+
+_parse_cache_version = [NamedObj.names_version]
+
+@functools.lru_cache(maxsize=parse_cache_size)
+def _parse_split(parser, split, kwargs, version):
+    # Replaces each string of split by its event, which must only be used
+    # as prototype for copies. parser is a StringEvent subclass or the
+    # event classes of a StringAnalyzer. version is part of the key, so a
+    # result computed while names changed is never returned for the new
+    # names.
+    if isinstance(parser, tuple): parser = StringAnalyzer(*parser)
+    create = functools.partial(parser._create_from_str, **dict(kwargs))
+    return tuple(tuple(map(create, entry)) if isinstance(entry, tuple) else
+            create(entry) for entry in split)
+
+def _copy_event(event):
+    # cheaper than creating it again, as the name lookup is skipped
+    new = str.__new__(event.__class__, event)
+    new.__dict__.update(event.__dict__)
+    return new
+
+def _events_from_split(split, hotkey, create):
+    events = []
+    for entry in split:
+        if isinstance(entry, tuple):
+            events.append(EventCombination(*map(create, entry)))
+            continue
+        event = create(entry)
+        events.append(event)
+        if hotkey:
+            try:
+                p = event.press
+            except AttributeError:
+                raise ValueError("Option hotkey=True "
+                                 f"does not make sense for f{event}.")
+            if not p: raise ValueError(
+                    "Hotkey mode enabled. Use option  hotkey=False to "
+                    "only send press or release events.")
+            events.append(event.reverse())
+    if len(events) == 0: return ""
+    if len(events) == 1: return events[0]
+    return EventSequence(*events)
+
+def clear_parse_cache():
+    _split_str.cache_clear()
+    _parse_split.cache_clear()
+
+
 
 
 
@@ -201,6 +248,69 @@ class StringEvent(Event, StringAnalyzeUtilitites, str):
     
     
     
+class NameIndex:
+    """A frozen index of the keys of a collection (e.g. a dict or set of key
+    names), so that NamedEvent.isin and get_from do not need to compare the
+    event with each key. The results are the same as with the comparison
+    by eq. Changes of the collection are not noticed, create a new index in
+    this case. Changes of the names are noticed and lead to a rebuild."""
+    
+    def __init__(self, NamedClass, collection):
+        self.NamedClass = NamedClass
+        self.collection = collection
+        self._build()
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} of {len(self.raw)} keys for " \
+            f"{self.NamedClass.__name__}>"
+    
+    def _build(self):
+        # both dicts map to (position, key), so the first matching key of
+        # the collection can be found, like in a loop using eq
+        make_comparable = self.NamedClass.make_comparable
+        raw = {}  # for events without named_instance
+        comparable = {}  # for the others
+        for position, key in enumerate(self.collection):
+            if isinstance(key, int):
+                s = f"[{key}]"
+            elif isinstance(key, str):
+                s = str(key)
+            else:
+                continue  # eq can't compare with these
+            raw.setdefault(s, (position, key))
+            comparable.setdefault(make_comparable(s), (position, key))
+        self.raw = raw
+        self.comparable = comparable
+        self._aliases = {}  # instance: its names in comparable form
+        self.version = NamedObj.names_version
+    
+    def key_for(self, event):
+        # the first key of the collection which equals event. Raises KeyError
+        if self.version != NamedObj.names_version: self._build()
+        inst = event.named_instance
+        if not inst: return self.raw[str(event)][1]
+        aliases = self._aliases.get(inst)
+        if aliases is None:
+            aliases = self._aliases[inst] = tuple(inst.names_comparable)
+        comparable = self.comparable
+        found = [comparable[a] for a in aliases if a in comparable]
+        if not found: raise KeyError(event)
+        return min(found)[1] if len(found) > 1 else found[0][1]
+    
+    def contains(self, event):
+        try:
+            self.key_for(event)
+        except KeyError:
+            return False
+        return True
+    
+    def get(self, event, default=None):
+        try:
+            return self.collection[self.key_for(event)]
+        except KeyError:
+            return default
+
+
 class NamedEvent(StringEvent):
     
     _special_attr = ["given_name","named_instance"]
@@ -250,16 +360,23 @@ class NamedEvent(StringEvent):
                 return super().__eq__(other)
         raise NotImplementedError
 
+    @classmethod
+    def index(cls, collection):
+        # create a NameIndex to use with isin and get_from
+        return NameIndex(cls.NamedClass, collection)
+    
     def isin(self, *others):
         if len(others) == 0:
             raise SyntaxError
         elif len(others) == 1:
             others = others[0]
+            if isinstance(others, NameIndex): return others.contains(self)
         for item in iter(others):
             if self.eq(item): return True
         return False
 
     def get_from(self,dic,return_if_not_found=None):
+        if isinstance(dic, NameIndex): return dic.get(self,return_if_not_found)
         try:
             c=dic.NamedClass_for_this_dict
             # this attribute only exists if dic is of type StandardizingDictClass
@@ -278,6 +395,7 @@ class NamedEvent(StringEvent):
 
 class PressReleaseMixin:
     
+    multipress = False  # True if the key was already pressed before
     
     def __new__(cls, name="", press=True, *, write_rls=True,
             only_defined_names=False):
@@ -305,6 +423,11 @@ class PressReleaseMixin:
     
     def reverse(self):
         return self.__class__(name=self.name, press=not self.press)
+    
+    def multipress_version(self):
+        # only called for freshly created events, which are not shared
+        self.multipress = True
+        return self
 
     def strip_rls(self, raise_error=True):
         if not self: return self  # happrnd for empty string ""
@@ -337,6 +460,12 @@ class NamedPressReleaseEvent(PressReleaseMixin, NamedEvent):
             return self.named_instance.release_event_without_rls
         except AttributeError:
             return super()._rls_stripped()
+    
+    def multipress_version(self):
+        try:
+            return self.named_instance.multipress_event
+        except AttributeError:
+            return super().multipress_version()
 
 
 class Keyvent(NamedPressReleaseEvent):
@@ -347,12 +476,25 @@ class Keyvent(NamedPressReleaseEvent):
 class Buttonevent(NamedPressReleaseEvent):
     
     #__slots__ = ["x", "y"]
+    # non-empty __slots__ are not supported for subclasses of str
+    
+    x = y = None  # the position of a click, if known
     
     def __new__(cls, *args, x=None, y=None,**kwargs):
         self= super().__new__(cls,*args,**kwargs)
-        self.x=x
-        self.y=y
+        if x is not None or y is not None:
+            self.x = x
+            self.y = y
         return self
+    
+    def at(self, x, y):
+        # a copy of this event with the given coordinates, so the shared
+        # events of NamedButton are never changed. Cheaper than creating a
+        # new event, as the name lookup is skipped.
+        new = _copy_event(self)
+        new.x = x
+        new.y = y
+        return new
 
 
 
@@ -391,6 +533,7 @@ class StringAnalyzer(StringAnalyzeUtilitites):
 
 
 
+
 class EventObjectSender(ABC):
     
     default_delay=None
@@ -20,8 +20,9 @@
 
 
 from .baseclasses import (InputEventHandler, KeyhookBase, ButtonhookBase,
-    CursorhookBase, PressReleaseHook)
+    CursorhookBase, PressReleaseHook, SynFrameMixin)
 from ..event_classes import PressReleaseEvent
+from warnings import warn
 
 from .. import DependencyManager
 
@@ -35,9 +36,10 @@ with DependencyManager(__name__) as manager:
 # be raised when trying to import evdev_prepared already.
 from evdev.ecodes import (EV_KEY, EV_ABS, EV_SYN, EV_MSC, KEY, BTN,
     EV_LED, EV_REL, ABS_MT_POSITION_X, ABS_MT_POSITION_Y, ABS_X, ABS_Y,
-    REL_X, REL_Y, bytype)
+    REL_X, REL_Y, SYN_REPORT, SYN_DROPPED, bytype)
 
-class EvdevHandler(device_control.DeviceHandler, InputEventHandler):
+class EvdevHandler(device_control.DeviceHandler, SynFrameMixin,
+        InputEventHandler):
     
    
     devupdater = device_control.DeviceUpdater()
@@ -46,12 +48,48 @@ class EvdevHandler(device_control.DeviceHandler, InputEventHandler):
     uinput = uinput.global_uinput
     uinput.start()
     
+    frame_mode = True
+    # if True, the events of each device are collected until the kernel
+    # sends SYN_REPORT and then processed together by process_frame (see
+    # SynFrameMixin). If False, process_single_event is called for each
+    # event right away.
+    
+    EV_SYN, EV_KEY, EV_ABS = EV_SYN, EV_KEY, EV_ABS
+    SYN_REPORT, SYN_DROPPED = SYN_REPORT, SYN_DROPPED
+    
     def __init__(self, hook_cls=None, **selection_kwargs):
         InputEventHandler.__init__(self,hook_cls)
+        SynFrameMixin.__init__(self)
         device_control.DeviceHandler.__init__(self,devupdater= self.devupdater,
                 **selection_kwargs)
     
-    def process_event(self, ty, co ,val, dev):
+    def process_event(self, ty, co, val, dev):
+        if not self.frame_mode: return self.process_single_event(ty, co, val,
+                dev)
+        return SynFrameMixin.process_event(self, ty, co, val, dev)
+    
+    def device_state(self, dev):
+        try:
+            keys = set(dev.active_keys())
+            if not self.track_abs: return keys, {}
+            axes = {co: info.value for co, info in
+                    dev.capabilities().get(EV_ABS, ())}
+        except OSError as e:
+            warn(f"Reading the state of {dev} failed: {e!r}")
+            return None
+        return keys, axes
+        
+    def process_frame(self, frame, dev):
+        # frame is a list of (type, code, value) tuples without the final
+        # SYN_REPORT. All resulting event objects are queued as one unit.
+        calls = []
+        for ty, co, val in frame:
+            name = bytype[ty][co]
+            if isinstance(name, (list,tuple)): name = name[0]
+            calls.append(((name.lower(),), {"press": bool(val != 0)}))
+        self.queue_frame(calls)
+    
+    def process_single_event(self, ty, co ,val, dev):
         if ty == EV_SYN: return
         press = bool(val != 0)
             # val==0 means that it was released, val==1 or
@@ -67,6 +105,7 @@ class EvdevHandler(device_control.DeviceHandler, InputEventHandler):
 class KeyHandler(EvdevHandler):
     
     reinject_implemented = True
+    track_abs = False
     
     
     name_dict = {}
@@ -75,7 +114,28 @@ class KeyHandler(EvdevHandler):
         b = b[4:].lower()
         name_dict[a] = b
             
-    def process_event(self,ty,co,val, dev):
+    def process_frame(self, frame, dev):
+        keys = []
+        for ty, co, val in frame:
+            if ty == EV_KEY:
+                keys.append((co, val))
+            elif ty not in (EV_MSC, EV_LED):
+                raise TypeError("Wrong event type: ", ty, co , val)
+        if not keys: return
+        rets = self.queue_frame(
+                [((co,), {"press": bool(val != 0)}) for co, val in keys])
+        for (co, val), ret in zip(keys, rets):
+            if ret is True: self.uinput.write(EV_KEY, co, val)
+    
+    def reinject_discarded(self, events, dev):
+        if not self.capture_active: return ()
+        # the hooks never see these key events, but they must reach the
+        # system nevertheless
+        keys = [(ty, co, val) for ty, co, val in events if ty == EV_KEY]
+        for ty, co, val in keys: self.uinput.write(ty, co, val)
+        return keys
+    
+    def process_single_event(self,ty,co,val, dev):
         #_print(ty,co,val,dev)
         if ty == EV_KEY:
             press = bool(val != 0)
@@ -96,7 +156,16 @@ class ButtonHandler(EvdevHandler):
         b = b[4:].lower()
         name_dict[a] = b
 
-    def process_event(self, ty, co, val, dev):
+    def process_frame(self, frame, dev):
+        calls = []
+        for ty, co, val in frame:
+            if ty == EV_KEY:
+                calls.append(((co,), {"press": bool(val != 0)}))
+            elif ty not in (EV_MSC, EV_ABS, EV_REL):
+                raise ValueError("Wrong event type: ", ty, co ,val)
+        if calls: self.queue_frame(calls)
+    
+    def process_single_event(self, ty, co, val, dev):
         #print(ty,co,val)
         if ty == EV_KEY:
             press = bool(val != 0)
@@ -131,7 +200,38 @@ class CursorHandler(EvdevHandler):
                 self.queue_event(pos_old, val, **kwargs)
                 return True
             
-    def process_event(self, ty, co, val, dev):
+    def process_frame(self, frame, dev):
+        # within one frame, the X and Y values belong to the same movement,
+        # so no guessing is needed as in _intelligent_collect
+        abs_vals = {}
+        dx = dy = 0
+        rel = False
+        for ty, co, val in frame:
+            if ty == EV_ABS:
+                if co in (ABS_X, ABS_Y): abs_vals[co] = val
+            elif ty == EV_REL:
+                if co == REL_X:
+                    dx += val
+                    rel = True
+                elif co == REL_Y:
+                    dy += val
+                    rel = True
+            elif ty not in (EV_KEY, EV_MSC):
+                raise ValueError("Wrong event type: ", ty, co, val)
+        calls = []
+        if abs_vals:
+            # an axis which did not change is not reported by the kernel,
+            # but it is contained in the last known position of the device
+            # (see SynFrameMixin.track_state)
+            last = self.abs_state(dev)
+            calls.append(((last.get(ABS_X, 0), last.get(ABS_Y, 0)),
+                    {"screen_coordinates": False}))
+        if rel:
+            calls.append(((dx, dy), {"relative": True,
+                "screen_coordinates": False}))
+        if calls: self.queue_frame(calls)
+            
+    def process_single_event(self, ty, co, val, dev):
         # print(ty,co,val)
         if ty == EV_KEY:
             pass
@@ -0,0 +1,162 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# In-process stand-in for a real input device: events sent via the virtual
+# keyboard and mouse backends (Dpowers.events.sending.*.adapt_virtual) or
+# via an Injector are passed to the hooks of this module through the
+# normal InputEventHandler.queue_event path. Needs no device, no X server
+# and no dependencies, so it can be used for benchmarks and tests.
+
+import threading, itertools
+from .. import DependencyManager
+from time import perf_counter_ns
+from .baseclasses import (InputEventHandler, KeyhookBase, ButtonhookBase,
+    CursorhookBase)
+
+with DependencyManager(__name__) as manager:
+    pass  # no dependencies
+
+
+class VirtualHandler(InputEventHandler):
+    
+    reinject_implemented = True
+    
+    def __init__(self, hook_cls=None):
+        super().__init__(hook_cls)
+        self.delivered = 0  # events that reached the virtual system
+        self.suppressed = 0  # events swallowed by capturing hooks
+    
+    def start_collecting(self):
+        pass
+    
+    def start_capturing(self):
+        pass
+    
+    def emit(self, *args, **kwargs):
+        """Feed one input event into the hooks, as a device would."""
+        if self.collect_active or self.capture_active:
+            ret = self.queue_event(*args, **kwargs)
+            if self.capture_active and ret is not True:
+                self.suppressed += 1
+                return False
+        self.delivered += 1
+        return True
+
+
+class VirtualCursorHandler(VirtualHandler):
+    
+    capture_allowed = False
+    
+    def __init__(self, hook_cls=None):
+        super().__init__(hook_cls)
+        self.position = (0, 0)
+    
+    def emit(self, x, y, relative=False):
+        if relative:
+            x, y = self.position[0] + x, self.position[1] + y
+        self.position = (x, y)
+        return super().emit(x, y)
+
+
+
+class Keyhook(KeyhookBase):
+    handler = VirtualHandler()
+
+class Buttonhook(ButtonhookBase):
+    handler = VirtualHandler()
+
+class Cursorhook(CursorhookBase):
+    handler = VirtualCursorHandler()
+
+
+
+def key_taps(*names):
+    """Return the emit arguments for pressing and releasing each key."""
+    return [((name,), dict(press=press)) for name in names for press in
+        (True, False)]
+
+def button_clicks(*names, x=0, y=0):
+    return [((name,), dict(press=press, x=x, y=y)) for name in names for
+        press in (True, False)]
+
+def cursor_moves(num, dx=1, dy=0):
+    return [((dx, dy), dict(relative=True))] * num
+
+
+class Injector:
+    """Emit a synthetic event stream into a virtual handler.
+    
+    calls is a sequence of (args, kwargs) tuples for handler.emit, e.g.
+    created by key_taps. With rate (events per second) given, each event is
+    scheduled at its absolute target time; otherwise events are emitted as
+    fast as possible. The stream is repeated repeat times.
+    """
+    
+    def __init__(self, handler, calls, rate=None, repeat=1):
+        if not isinstance(handler, VirtualHandler):
+            handler = handler.handler  # a hook class was given
+        if rate is not None and rate <= 0: raise ValueError(rate)
+        self.handler = handler
+        self.calls = tuple(calls)
+        self.rate = rate
+        self.repeat = repeat
+        self.num = 0
+        self.duration_ns = None
+        self._stop = threading.Event()
+        self._thread = None
+    
+    def run(self):
+        """Emit all events in the current thread and return the achieved
+        rate in events per second."""
+        emit = self.handler.emit
+        stop = self._stop
+        interval = 1e9 / self.rate if self.rate else 0
+        calls = itertools.chain.from_iterable(
+                itertools.repeat(self.calls, self.repeat))
+        t0 = perf_counter_ns()
+        for num, (args, kwargs) in enumerate(calls):
+            if interval:
+                target = t0 + int(num * interval)
+                remaining = target - perf_counter_ns()
+                if remaining > 1000000:
+                    if stop.wait((remaining - 1000000) / 1e9): break
+                while perf_counter_ns() < target: pass
+            elif stop.is_set():
+                break
+            emit(*args, **kwargs)
+            self.num += 1
+        self.duration_ns = perf_counter_ns() - t0
+        return self.achieved_rate()
+    
+    def achieved_rate(self):
+        if not self.duration_ns: return None
+        return self.num * 1e9 / self.duration_ns
+    
+    def start(self):
+        if self._thread is not None: raise RuntimeError(
+                f"Injector {self} was already started.")
+        self._thread = threading.Thread(target=self.run, name="Injector",
+                daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._stop.set()
+        
+    def join(self, timeout=None):
+        self._thread.join(timeout)
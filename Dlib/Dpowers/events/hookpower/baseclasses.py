@@ -21,9 +21,12 @@ from Dhelpers.baseclasses import AdditionContainer, TimedObject
 from Dhelpers.container import container
 from Dhelpers.arghandling import check_type
 from abc import ABC, abstractmethod
-import threading, queue, logging, inspect, functools, traceback
+import threading, logging, inspect, functools, traceback, itertools, time, \
+    collections, asyncio
 from ..event_classes import MouseMoveEvent
 from Dhelpers.named import NamedObj
+from Dhelpers.measuring import LatencyHistogram
+from time import perf_counter_ns
 
 class CallbackRunnerThread(threading.Thread):
     pass
@@ -32,23 +35,463 @@ class EventQueueThread(threading.Thread):
     pass
 
 
-class EventQueueReader:
+_dispatching = threading.local()
+
+def queued_time():
+    """Return the perf_counter_ns() value taken when the event, whose
+    callbacks currently run in this thread, was queued, or None outside of
+    the callbacks."""
+    return getattr(_dispatching, "t_queued", None)
+
+
+class EventFrame(tuple):
+    # several events that were queued together as one unit, e.g. all
+    # events of one evdev SYN_REPORT frame
+    pass
+
+
+class SynFrameMixin:
+    """Collects the events of each device until the kernel sends SYN_REPORT
+    and hands them to process_frame as one frame. SYN_DROPPED means that
+    the kernel buffer overflowed: All events up to and including the next
+    SYN_REPORT are discarded. Afterwards, the key and absolute axis state is
+    read from the device (see device_state) and the differences to the last
+    known state are processed as one frame."""
+    
+    EV_SYN = EV_KEY = EV_ABS = SYN_REPORT = SYN_DROPPED = None
+    # the event codes, set by the subclass (e.g. from evdev.ecodes)
+    track_abs = True
+    # whether the absolute axes are tracked and resynchronized
+    
     def __init__(self):
+        self._frames = {}
+        self._discarded = {}  # id(dev) -> events while resynchronizing
+        self._key_states = {}  # id(dev) -> set of pressed key codes
+        self._abs_states = {}  # id(dev) -> {axis code: last value}
+    
+    def process_event(self, ty, co, val, dev):
+        if ty == self.EV_SYN:
+            key = id(dev)
+            frame = self._frames.pop(key, None)
+            if co == self.SYN_REPORT:
+                if self._discarded and key in self._discarded:
+                    discarded = self._discarded.pop(key)
+                    if frame: discarded += frame
+                    self.resync(discarded, dev)
+                elif frame:
+                    self.track_state(frame, dev)
+                    self.process_frame(frame, dev)
+            elif co == self.SYN_DROPPED:
+                # the frame in progress is broken as well
+                self._discarded.setdefault(key, []).extend(frame or ())
+            elif frame:
+                self._frames[key] = frame  # other SYN codes don't end frames
+            return
+        try:
+            self._frames[id(dev)].append((ty, co, val))
+        except KeyError:
+            self._frames[id(dev)] = [(ty, co, val)]
+    
+    def process_frame(self, frame, dev):
+        # frame is a list of (type, code, value) tuples without the final
+        # SYN_REPORT
+        raise NotImplementedError
+    
+    def device_state(self, dev):
+        # returns the set of pressed key codes and a dict of the absolute
+        # axis values as reported by the device itself, or None
+        raise NotImplementedError
+    
+    def reinject_discarded(self, events, dev):
+        # called with the events discarded after SYN_DROPPED. If the device
+        # is captured, they would be lost for the system, so handlers
+        # which capture have to send them on. Returns the sent events.
+        return ()
+    
+    def key_state(self, dev):
+        try:
+            return self._key_states[id(dev)]
+        except KeyError:
+            return self._key_states.setdefault(id(dev), set())
+    
+    def abs_state(self, dev):
+        # the last known absolute position, initially read from the device
+        try:
+            return self._abs_states[id(dev)]
+        except KeyError:
+            state = self.device_state(dev)
+            return self._abs_states.setdefault(id(dev),
+                    dict(state[1]) if state else {})
+    
+    def track_state(self, frame, dev):
+        keys = axes = None
+        EV_KEY, EV_ABS = self.EV_KEY, self.EV_ABS
+        for ty, co, val in frame:
+            if ty == EV_KEY:
+                if keys is None: keys = self.key_state(dev)
+                if val:
+                    keys.add(co)
+                else:
+                    keys.discard(co)
+            elif ty == EV_ABS and self.track_abs:
+                if axes is None: axes = self.abs_state(dev)
+                axes[co] = val
+    
+    def resync(self, discarded, dev):
+        reinjected = self.reinject_discarded(discarded, dev)
+        if reinjected: self.track_state(reinjected, dev)
+        state = self.device_state(dev)
+        if state is None: return
+        keys, axes = state
+        old_keys = self.key_state(dev)
+        frame = [(self.EV_KEY, co, 0) for co in sorted(old_keys - keys)]
+        frame += [(self.EV_KEY, co, 1) for co in sorted(keys - old_keys)]
+        if self.track_abs:
+            # if no position was reported yet, all axes are new
+            old_axes = self._abs_states.get(id(dev), {})
+            frame += [(self.EV_ABS, co, val) for co, val in sorted(
+                    axes.items()) if old_axes.get(co) != val]
+        if frame:
+            self.track_state(frame, dev)
+            self.process_frame(frame, dev)
+
+
+class EventRingBuffer:
+    """A preallocated ring buffer with several producers (the device/listener
+    threads) and a single consumer (the callback thread). No lock is taken
+    on either side: Each producer reserves a sequence number via
+    itertools.count, whose __next__ is atomic in CPython, and writes (seq,
+    item) into slot seq % size. A producer never waits for the consumer:
+    If the buffer is full, a lossy item (e.g. a mouse move) is rejected and
+    counted in self.rejected. Other items are appended to an unbounded
+    overflow deque instead, and so are all items after them until the
+    consumer has emptied it, which keeps their order."""
+    
+    headroom = 8
+    # free slots kept for producers racing each other in put, so that they
+    # don't overwrite unread entries
+    
+    def __init__(self, size=4096):
+        if size < 1: raise ValueError
+        self.size = size
+        self._limit = size - min(self.headroom, size // 2)
+        self._overflow = collections.deque()
+        self._slots = [None] * size
+        self._sequence = itertools.count()
+        self._read_index = 0
+        self._last_written = -1
+        self._sleeping = False
+        self._wakeup = threading.Event()
+        self.high_water_mark = 0
+        self.dropped = 0
+        self.rejected = 0
+        self._reported = 0
+    
+    def put(self, item, lossy=False):
+        overflow = self._overflow
+        if overflow or self._last_written + 1 - self._read_index >= \
+                self._limit:
+            if lossy:
+                self.rejected += 1
+                return False
+            overflow.append(item)
+        else:
+            n = next(self._sequence)
+            self._slots[n % self.size] = (n, item)
+            if n > self._last_written: self._last_written = n
+        if self._sleeping:
+            # only touch the Event (and thus its lock) if the consumer is
+            # actually waiting
+            self._sleeping = False
+            self._wakeup.set()
+        return True
+    
+    def pending(self):
+        r = self._read_index
+        entry = self._slots[r % self.size]
+        return entry is not None and entry[0] >= r or bool(self._overflow)
+    
+    def depth(self):
+        return max(0, self._last_written + 1 - self._read_index) + len(
+                self._overflow)
+    
+    def wait(self, timeout=None):
+        if self.pending(): return True
+        self._wakeup.clear()
+        self._sleeping = True
+        # recheck after announcing that we are sleeping. Otherwise a
+        # producer could write in between without waking us up.
+        if self.pending():
+            self._sleeping = False
+            return True
+        ret = self._wakeup.wait(timeout)
+        self._sleeping = False
+        return ret
+    
+    def drain(self):
+        # returns all pending items in one batch.
+        slots = self._slots
+        size = self.size
+        r = self._read_index
+        batch = []
+        while True:
+            entry = slots[r % size]
+            if entry is None: break
+            seq = entry[0]
+            if seq < r: break  # slot not yet written for this round
+            if seq > r:
+                # the producers have overwritten entries we did not read yet
+                new_r = max(r + 1, seq - size + 1)
+                self.dropped += new_r - r
+                r = new_r
+                continue
+            batch.append(entry[1])
+            r += 1
+        self._read_index = r
+        overflow = self._overflow
+        if overflow:
+            # these were put after all items of the ring
+            for _ in range(len(overflow)): batch.append(overflow.popleft())
+        if len(batch) > self.high_water_mark:
+            self.high_water_mark = len(batch)
+        return batch
+    
+    def lost(self):
+        return self.dropped + self.rejected
+    
+    def take_lost(self):
+        # number of events dropped or rejected since the last call
+        lost = self.lost()
+        new = lost - self._reported
+        self._reported = lost
+        return new
+
+
+
+class EventQueueReader:
+    
+    buffer_size = 4096
+    overflow_policies = ("drop_newest", "coalesce")
+    # drop_newest: discard new mouse moves while the buffer is full
+    # coalesce: like drop_newest, but consecutive MouseMoveEvents of each
+    #   batch are merged into one before running the callbacks
+    # The producing (device/listener) thread is never blocked. Only mouse
+    # moves can get lost, they are counted (see dropped_events) and
+    # reported via warn. All other events wait in the overflow list of the
+    # EventRingBuffer, as a lost key release would leave the key pressed.
+    
+    def __init__(self, buffer_size=None, dispatcher=None, name=None,
+            overflow_policy="drop_newest"):
         # create useless dead thread just to make all the attributes available:
         self.callback_runner_thread = EventQueueThread()
-        self.event_queue = queue.Queue()
+        if buffer_size is None: buffer_size = self.buffer_size
+        self.event_queue = EventRingBuffer(buffer_size)
+        self.set_overflow_policy(overflow_policy)
+        self.dispatcher = dispatcher
+        self.name = name
+        self.priority = 0
+        self.handler_priorities = {}
+        self.busy = False
+    
+    def __repr__(self):
+        return super().__repr__()[:-1] + f" with name '{self.name}'>"
     
     def start(self):
         if not self.callback_runner_thread.is_alive():
+            name = None if self.name is None else f"EventQueue-{self.name}"
             self.callback_runner_thread = EventQueueThread(
-                    target=self.run_callbacks)
+                    target=self.run_callbacks, name=name)
             self.callback_runner_thread.start()
             return self.callback_runner_thread
     
     def run_callbacks(self):
+        event_queue = self.event_queue
         while True:
-            handler, event_obj = self.event_queue.get()
-            handler.run_callbacks(event_obj)
+            event_queue.wait()
+            if self.dispatcher: self.dispatcher.wait_for_urgent_lanes(self)
+            self.busy = True
+            try:
+                # drain everything that arrived since the last wakeup at once
+                batch = event_queue.drain()
+                lost = event_queue.take_lost()
+                if lost: warn(f"{self!r}: {lost} mouse moves were dropped "
+                        f"because the callbacks could not keep up.")
+                if self.coalesce and len(batch) > 1:
+                    batch = self.coalesce_moves(batch)
+                for handler, event_obj, t_queued in batch:
+                    if event_obj.__class__ is EventFrame:
+                        for e in event_obj: handler.run_callbacks(e, t_queued)
+                    else:
+                        handler.run_callbacks(event_obj, t_queued)
+            finally:
+                self.busy = False
+                if self.dispatcher: self.dispatcher.batch_done(self)
+    
+    def has_work(self):
+        return self.busy or self.event_queue.pending()
+    
+    def set_overflow_policy(self, policy):
+        if policy not in self.overflow_policies: raise ValueError(
+                f"overflow policy must be one of {self.overflow_policies}")
+        self.overflow_policy = policy
+        self.coalesce = policy == "coalesce"
+    
+    @staticmethod
+    def coalesce_moves(batch):
+        # merge consecutive MouseMoveEvents of the same handler: absolute
+        # movements are replaced by the latest one, relative movements are
+        # accumulated. The merged entry keeps the first queueing time.
+        merged = []
+        for entry in batch:
+            handler, event_obj, t_queued = entry
+            if merged and isinstance(event_obj, MouseMoveEvent):
+                last_handler, last_obj, last_t = merged[-1]
+                if last_handler is handler and isinstance(last_obj,
+                        MouseMoveEvent) and last_obj.relative == \
+                        event_obj.relative:
+                    if event_obj.relative:
+                        event_obj = MouseMoveEvent(last_obj.x + event_obj.x,
+                                last_obj.y + event_obj.y, relative=True,
+                                screen_coordinates=event_obj.screen_coordinates)
+                    merged[-1] = (handler, event_obj, last_t)
+                    continue
+            merged.append(entry)
+        return merged
+    
+    def set_handler_priority(self, handler, priority):
+        # called by the handlers whenever their active hooks change.
+        # The lane's priority is the one of its most urgent active hook.
+        if priority is None:
+            self.handler_priorities.pop(handler, None)
+        else:
+            self.handler_priorities[handler] = priority
+        if self.handler_priorities:
+            self.priority = min(self.handler_priorities.values())
+        else:
+            self.priority = 0
+        if self.dispatcher: self.dispatcher.update_order()
+    
+    @property
+    def queue_depth(self):
+        return self.event_queue.depth()
+    
+    @property
+    def high_water_mark(self):
+        return self.event_queue.high_water_mark
+    
+    @property
+    def dropped_events(self):
+        return self.event_queue.lost()
+
+
+
+class _LazyLane:
+    # placeholder for the queue_reader attribute of each CallbackHook subclass.
+    # It is replaced by the actual lane on first access, so that abstract
+    # base classes never allocate a lane.
+    def __get__(self, inst, owner):
+        lane = owner.dispatcher.lane(owner)
+        setattr(owner, "queue_reader", lane)
+        return lane
+
+
+class EventDispatcher:
+    """Hands out the EventQueueReader (the lane) for each hook class. By
+    default, all hook classes share one lane, so the callbacks run in a
+    single thread and in the order the events were queued. This is needed
+    whenever several hooks feed the same consumer, e.g. a TriggerManager
+    watching keys and buttons.
+    
+    If sharded is True, each hook class gets its own lane, drained by its
+    own thread. Thus a slow keyboard callback does not delay the cursor or
+    button callbacks, but the order of events from different hook classes
+    is lost and callbacks of different lanes run concurrently. All events
+    of one handler (i.e. one device stream) still go through the same lane.
+    Across lanes, the priority of the hooks decides: Before a lane runs a
+    batch of callbacks, it waits (at most max_priority_wait seconds) until
+    all lanes with a more urgent (lower) priority value are idle."""
+    
+    lane_buffer_size = 1024
+    max_priority_wait = 0.005
+    shared_overflow_policy = "coalesce"
+    # coalescing only merges consecutive mouse moves of one handler, so it
+    # does not affect the key and button events of the shared lane. The
+    # overflow_policy of the hook classes is only used if sharded.
+    
+    def __init__(self, sharded=False):
+        self.sharded = sharded
+        self.lanes = {}
+        self._ordered_lanes = ()
+        self._batch_done = threading.Condition()
+    
+    def lane(self, hook_cls):
+        key = hook_cls if self.sharded else None
+        try:
+            return self.lanes[key]
+        except KeyError:
+            if self.sharded:
+                name, policy = hook_cls.__name__, hook_cls.overflow_policy
+            else:
+                name, policy = "shared", self.shared_overflow_policy
+            lane = EventQueueReader(self.lane_buffer_size, dispatcher=self,
+                    name=name, overflow_policy=policy)
+            self.lanes[key] = lane
+            self.update_order()
+            return lane
+    
+    def update_order(self):
+        self._ordered_lanes = tuple(sorted(self.lanes.values(),
+                key=lambda lane: lane.priority))
+    
+    def wait_for_urgent_lanes(self, lane):
+        if not self.sharded: return
+        deadline = None
+        for other in self._ordered_lanes:
+            if other.priority >= lane.priority: break
+            while other.has_work():
+                if deadline is None:
+                    deadline = time.monotonic() + self.max_priority_wait
+                remaining = deadline - time.monotonic()
+                if remaining <= 0: return
+                with self._batch_done:
+                    if other.has_work(): self._batch_done.wait(remaining)
+    
+    def batch_done(self, lane):
+        if lane.priority >= self._ordered_lanes[-1].priority: return
+        # only lanes with a more urgent priority can block other lanes
+        with self._batch_done:
+            self._batch_done.notify_all()
+    
+    def stats(self):
+        return {lane.name: dict(queue_depth=lane.queue_depth,
+                high_water_mark=lane.high_water_mark,
+                dropped_events=lane.dropped_events, priority=lane.priority,
+                overflow_policy=lane.overflow_policy)
+                for lane in self.lanes.values()}
+
+
+
+
+class HookLatency:
+    # per hook instance histograms for the stages of the hook pipeline
+    stages = ("queue", "dispatch", "callback", "total")
+    
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in self.stages}
+        
+    def record(self, t_queued, t_dequeued, t_before, t_after):
+        h = self.histograms
+        h["queue"].record(t_dequeued - t_queued)
+        h["dispatch"].record(t_before - t_dequeued)
+        h["callback"].record(t_after - t_before)
+        h["total"].record(t_after - t_queued)
+    
+    def summary(self):
+        return {stage: hist.summary() for stage, hist in
+            self.histograms.items()}
+    
+    def reset(self):
+        for hist in self.histograms.values(): hist.reset()
 
 
 
@@ -74,6 +517,7 @@ class InputEventHandler(ABC):
         ah = self.active_hooks
         ah.append(hook)
         ah.sort(key=lambda s: s.priority)
+        self.hook_cls.queue_reader.set_handler_priority(self, ah[0].priority)
         if len(ah) == 1:
             if self.collect_active: raise RuntimeError
             self.collect_active = True
@@ -81,8 +525,11 @@ class InputEventHandler(ABC):
             return True
 
     def remove_hook(self, hook):
-        self.active_hooks.remove(hook)
-        if len(self.active_hooks) == 0:
+        ah = self.active_hooks
+        ah.remove(hook)
+        self.hook_cls.queue_reader.set_handler_priority(self,
+                ah[0].priority if ah else None)
+        if len(ah) == 0:
             if not self.collect_active: raise RuntimeError
             self.collect_active = False
             self.stop_collecting()
@@ -124,33 +571,78 @@ class InputEventHandler(ABC):
     def queue_event(self, *args, **kwargs):
         try:
             cls = self.hook_cls
-            event_obj = cls._create_event_obj(*args, **kwargs)
-            if cls.reinject_active:
-                ret = cls._active_reinject_func(event_obj)
-                #print(ret, cls._active_reinject_func)
-                if ret is None: raise ValueError
-            else:
-                ret = None
-            cls.queue_reader.event_queue.put((self,event_obj))
+            t_queued = perf_counter_ns()
+            event_obj, ret = self._create_and_reinject(cls, args, kwargs)
+            if self.active_hooks:
+                # if only capturing, nobody would read the queue
+                cls.queue_reader.event_queue.put((self, event_obj, t_queued),
+                        event_obj.__class__ is MouseMoveEvent)
             return ret
         except Exception as e:
-            warn(f"\nEmergency stop {self.hook_cls}.\n{repr(e)}")
-            try:
-                self.hook_cls.capturer.stop()
-            except Exception:
-                pass
-            try:
-                self.stop_collecting()
-            except Exception:
-                pass
-            try:
-                self.stop_capturing()
-            except Exception:
-                pass
-            traceback.print_exc()
+            self._emergency_stop(e)
     
-    def run_callbacks(self, event_obj):
+    def queue_frame(self, calls):
+        # calls is a sequence of (args, kwargs) tuples, each as for
+        # queue_event. All resulting event objects are put into the queue as
+        # one unit. Returns the list of reinject decisions.
+        try:
+            cls = self.hook_cls
+            t_queued = perf_counter_ns()
+            events = []
+            rets = []
+            for args, kwargs in calls:
+                event_obj, ret = self._create_and_reinject(cls, args, kwargs)
+                events.append(event_obj)
+                rets.append(ret)
+            if events and self.active_hooks:
+                item = events[0] if len(events) == 1 else EventFrame(events)
+                lossy = all(e.__class__ is MouseMoveEvent for e in events)
+                cls.queue_reader.event_queue.put((self, item, t_queued),
+                        lossy)
+            return rets
+        except Exception as e:
+            self._emergency_stop(e)
+            return []
+    
+    @staticmethod
+    def _create_and_reinject(cls, args, kwargs):
+        event_obj = cls._create_event_obj(*args, **kwargs)
+        if cls.reinject_active:
+            ret = cls._active_reinject_func(event_obj)
+            #print(ret, cls._active_reinject_func)
+            if ret is None: raise ValueError
+        else:
+            ret = None
+        return event_obj, ret
+    
+    def _emergency_stop(self, e):
+        warn(f"\nEmergency stop {self.hook_cls}.\n{repr(e)}")
+        try:
+            self.hook_cls.capturer.stop()
+        except Exception:
+            pass
+        try:
+            self.stop_collecting()
+        except Exception:
+            pass
+        try:
+            self.stop_capturing()
+        except Exception:
+            pass
+        traceback.print_exc()
+    
+    def run_callbacks(self, event_obj, t_queued=0):
         if event_obj is None: return
+        _dispatching.t_queued = t_queued or None
+        if t_queued and self.hook_cls.latency_recording:
+            t_dequeued = perf_counter_ns()
+            for hook in self.active_hooks:
+                t_before = perf_counter_ns()
+                ret = hook.run_callback(event_obj)
+                hook.latency.record(t_queued, t_dequeued, t_before,
+                        perf_counter_ns())
+                if ret == "block": break
+            return
         for hook in self.active_hooks:
             ret = hook.run_callback(event_obj)
             if ret == "block": break
@@ -180,13 +672,38 @@ class CallbackHook(AdditionContainer.Addend, TimedObject):
         return self.handler.collect_allowed
     
     
-    queue_reader = EventQueueReader()
-    # this should usually never be overwritten as all subclasses
-    # should use a single Thread for executing the callbacks. If a
-    # subclass defines a seperate instance of EventQueueReader, its
-    # callbacks will be run in a separate thread
+    dispatcher = EventDispatcher()
+    queue_reader = None
+    # each subclass gets its lane (i.e. EventQueueReader instance and
+    # callback thread) from the dispatcher, see __init_subclass__. If a
+    # subclass defines a seperate instance of EventQueueReader itself,
+    # this one is used instead. Use EventDispatcher(sharded=True) to run
+    # the callbacks of each hook class in a seperate thread.
+    
+    latency_recording = False
+    # if set to True, each event is stamped when it is queued, dequeued
+    # and before and after each callback. See method stats.
+    
+    @classmethod
+    def record_latencies(cls, active=True):
+        cls.latency_recording = active
+    
+    overflow_policy = "drop_newest"
+    # what happens if the callbacks can't keep up with the incoming events,
+    # see EventQueueReader.overflow_policies. Only used for sharded lanes,
+    # the shared lane uses EventDispatcher.shared_overflow_policy.
+    
+    @classmethod
+    def set_overflow_policy(cls, policy):
+        if not cls.dispatcher.sharded: raise RuntimeError(
+                f"{cls.__name__} uses the shared lane of all hook classes. "
+                "Set EventDispatcher.shared_overflow_policy instead or use "
+                "EventDispatcher(sharded=True).")
+        cls.queue_reader.set_overflow_policy(policy)
+        cls.overflow_policy = policy
     
     def __init_subclass__(cls):
+        if "queue_reader" not in cls.__dict__: cls.queue_reader = _LazyLane()
         cls._active_capturers = 0
         cls._active_reinject_func = None
         cls.reinject_active = False
@@ -229,6 +746,7 @@ class CallbackHook(AdditionContainer.Addend, TimedObject):
         self.capture = capture
         self.custom_kwargs = custom_kwargs
         self.dedicated_thread = dedicated_thread
+        self._latency = None
         self.process_custom_kwargs(**custom_kwargs)
         if self.callback_func and not self.collect_allowed: raise ValueError
         if reinject_func is not None:
@@ -283,6 +801,30 @@ class CallbackHook(AdditionContainer.Addend, TimedObject):
             if ret == "stop": self.stop()
             return ret
     
+    @property
+    def latency(self):
+        # created on first use to keep hook creation cheap
+        if self._latency is None: self._latency = HookLatency()
+        return self._latency
+    
+    def stats(self):
+        """Return the latency percentiles (in milliseconds) of this hook:
+        queue: from InputEventHandler.queue_event until dequeued,
+        dispatch: from dequeuing until this hook's callback starts,
+        callback: runtime of the callback, total: sum of the above.
+        Only events are counted that arrived while
+        CallbackHook.latency_recording was True."""
+        return self.latency.summary()
+    
+    def stream(self, maxsize=256, **hook_kwargs):
+        """Return a HookStream to consume the events of a copy of this hook
+        inside an asyncio event loop:
+        
+            async for event in hook.keys().stream(timeout=None):
+                ...
+        """
+        return HookStream(self, maxsize, **hook_kwargs)
+    
     #start method is defined in TimedObj Baseclass and will use this:
     def _start_action(self):
         cls = self.__class__
@@ -370,11 +912,12 @@ class NamedHook(CallbackHook):
     name_translation_dicts = None
     #name_translation_dict = None
     _active_dict = {}
-    
+    _active_names_version = None
     
     
     def __init_subclass__(cls):
         super().__init_subclass__()
+        cls._active_dict = {}
         if hasattr(cls, "name_translation_dict"):
             if len(cls.name_translation_dicts) != 0: raise AttributeError
             cls.name_translation_dicts = [cls.name_translation_dict]
@@ -390,6 +933,7 @@ class NamedHook(CallbackHook):
             if not isinstance(dic, StandardizingDict):
                 check_type(dict, dic)
                 cls.name_translation_dicts[i] = StandardizingDict(dic)
+        cls._active_names_version = NamedObj.names_version
         coll = cls.handler
         if coll is None: return
         check_type(InputEventHandler, coll)
@@ -401,8 +945,10 @@ class NamedHook(CallbackHook):
             for n in coll.names:
                 if n not in final_dict: final_dict[n] = n
     
+        translation_dicts = [dic.frozen() for dic in
+            cls.name_translation_dicts]
         for a, b in final_dict.items():
-            for dic in cls.name_translation_dicts:
+            for dic in translation_dicts:
                 try:
                     b = dic[b]
                 except KeyError:
@@ -417,6 +963,10 @@ class NamedHook(CallbackHook):
         
     @classmethod
     def _create_event_obj(cls, name, **kwargs):
+        if cls._active_names_version != NamedObj.names_version and \
+                cls.NamedClass is not None:
+            # the instances in _active_dict might be outdated
+            cls.update_active_dict()
         effective = cls._active_dict.get(name, name)
         NamedCl = cls.NamedClass
         if NamedCl is None:
@@ -428,6 +978,15 @@ class NamedHook(CallbackHook):
                 EventCl = cls.EventClass
             else:
                 if cls.EventClass is not None: assert cls.EventClass is EventCl
+                if not isinstance(effective, NamedCl):
+                    try:
+                        named = NamedCl.instance(effective)
+                    except (KeyError, TypeError, ValueError):
+                        pass
+                    else:
+                        # remember it, so the next time the precreated
+                        # events of named are used right away
+                        cls._active_dict[name] = effective = named
                 if isinstance(effective, NamedCl) and hasattr(effective,
                         "get_event"):
                     return effective.get_event(**kwargs)
@@ -501,9 +1060,9 @@ class KeyhookBase(PressReleaseHook):
         info=event_obj.name
         if event_obj.press is True:
             if info in cls.currently_pressed:
-                event_obj.multipress = True
+                # never change the event object, it might be shared
+                event_obj = event_obj.multipress_version()
             else:
-                event_obj.multipress = False
                 cls.currently_pressed.add(info)
         else:
             try:
@@ -518,6 +1077,9 @@ class ButtonhookBase(PressReleaseHook):
 
 
 class CursorhookBase(CallbackHook):
+    
+    overflow_policy = "coalesce"
+    
     @classmethod
     def _create_event_obj(cls, *args,**kwargs):
         return MouseMoveEvent(*args, **kwargs)
@@ -561,6 +1123,102 @@ class HookContainer(AdditionContainer, basic_class=CallbackHook, ordered=False):
     def join(self):
         return tuple(m.join() for m in self._members)
     
+    def stats(self):
+        return tuple(m.stats() for m in self._members)
+    
+    @functools.wraps(CallbackHook.stream)
+    def stream(self, maxsize=256, **hook_kwargs):
+        return HookStream(self, maxsize, **hook_kwargs)
+    
     @functools.wraps(CallbackHook.__call__)
     def __call__(self, *args, **kwargs):
-        return self.__class__(*tuple(m(*args, **kwargs) for m in self._members))
\ No newline at end of file
+        return self.__class__(*tuple(m(*args, **kwargs) for m in self._members))
+
+
+
+class HookStream:
+    """Asynchronous iterator over the events of a hook (or HookContainer).
+    
+    The hook is copied with a callback that appends each event to a bounded
+    deque; if the consumer falls behind by more than maxsize events, the
+    oldest ones are dropped and counted in attribute dropped. The event loop
+    is woken up at most once per batch of events, so no thread is needed per
+    consumer. The hook starts with the first iteration (or with async with)
+    and stops on timeout, via close() or when leaving the async with block.
+    """
+    
+    def __init__(self, hook, maxsize=256, **hook_kwargs):
+        if maxsize < 1: raise ValueError
+        self.maxsize = maxsize
+        self.hook = hook(self._push, **hook_kwargs)
+        self.dropped = 0
+        self._buffer = collections.deque(maxlen=maxsize)
+        self._loop = None
+        self._waiter = None
+        self._wakeup_scheduled = False
+        self._closed = False
+    
+    def start(self):
+        if self._loop is not None: raise RuntimeError(
+                f"HookStream {self} was already started.")
+        self._loop = asyncio.get_running_loop()
+        self.hook.start()
+        timeout = max((m.timeout or 0) for m in self.hook.members)
+        # the hook stops itself on timeout, afterwards the iteration ends
+        if timeout: self._loop.call_later(timeout + 0.01, self._wake)
+        return self
+    
+    def close(self):
+        if self._closed: return
+        self._closed = True
+        for m in self.hook.members:
+            if m.active: m.stop()
+        if self._loop is not None: self._loop.call_soon_threadsafe(self._wake)
+    
+    def _active(self):
+        return any(m.active for m in self.hook.members)
+    
+    def _push(self, event_obj):
+        # runs in the callback thread of the hook
+        if len(self._buffer) == self.maxsize: self.dropped += 1
+        self._buffer.append(event_obj)
+        if not self._wakeup_scheduled:
+            self._wakeup_scheduled = True
+            self._loop.call_soon_threadsafe(self._wake)
+    
+    def _wake(self):
+        # runs inside the event loop
+        self._wakeup_scheduled = False
+        waiter = self._waiter
+        if waiter is not None and not waiter.done(): waiter.set_result(None)
+        
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if self._loop is None: self.start()
+        while not self._buffer:
+            if self._closed or not self._active():
+                self._closed = True
+                raise StopAsyncIteration
+            self._waiter = self._loop.create_future()
+            try:
+                await self._waiter
+            finally:
+                self._waiter = None
+        return self._buffer.popleft()
+    
+    async def get(self, timeout=None):
+        """Return the next event or None if the stream ended or the timeout
+        (in seconds) passed."""
+        try:
+            return await asyncio.wait_for(self.__anext__(), timeout)
+        except (StopAsyncIteration, asyncio.TimeoutError):
+            return None
+    
+    async def __aenter__(self):
+        if self._loop is None: self.start()
+        return self
+    
+    async def __aexit__(self, *error_info):
+        self.close()
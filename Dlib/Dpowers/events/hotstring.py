@@ -0,0 +1,190 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+from . import NamedKey
+from .matching import PatternAutomaton
+from .waiter import KeyWaiter
+from Dhelpers.executor import ConcurrencyLimit
+import collections
+
+
+class HotstringEngine:
+    """Long-lived hotstring matching attached to a TriggerManager.
+    
+    Each key release appends the key name (or its eventmap value) to the
+    typed stream. The stream is stepped through a character automaton of all
+    abbreviations, so the work per key does not depend on the number of
+    abbreviations. The options have the same meaning as for
+    KeyWaiter.hotstring: endevents and keys not in limit_allowed_keys start
+    a new word, keys not in eventmap are ignored, undo erases the typed
+    abbreviation with BackSpace before the replacement is sent.
+    By default, an abbreviation must be typed as a whole word after a reset.
+    With anywhere=True, it matches as soon as it was typed, i.e. also at the
+    end of a longer word.
+    """
+    
+    keyb = KeyWaiter.hotstring_keyb
+    
+    def __init__(self, listener, **options):
+        self.listener = listener
+        self.automaton = PatternAutomaton()
+        self.replacements = {}
+        self.hits = 0
+        self.limit = ConcurrencyLimit(1, "queue")
+        # the expansions are sent one after the other, and none is dropped
+        # because an action of the listener is running
+        self._lengths = collections.deque(maxlen=0)
+        # number of characters of each counted key, to compute the
+        # number of BackSpaces for undo
+        self.configure(**options)
+    
+    def configure(self, send=True, undo=True, undo_additional=0, endevents=(),
+            limit_allowed_keys=False, eventmap=None, anywhere=False):
+        if limit_allowed_keys:
+            limit_allowed_keys = frozenset(limit_allowed_keys).union(
+                    self._stnd(limit_allowed_keys))
+        elif endevents == ():
+            endevents = ("Tab", "Return", "Space", "Backspace")
+        if type(endevents) not in (list, tuple): endevents = [endevents]
+        self.send = send
+        self.undo = undo
+        self.undo_additional = undo_additional
+        # mapped values are compared as given, key names standardized
+        self.endevents = frozenset(endevents).union(self._stnd(endevents))
+        self.limit_allowed_keys = limit_allowed_keys
+        self.eventmap = eventmap
+        self.anywhere = anywhere
+        self.reset()
+    
+    @staticmethod
+    def _stnd(names):
+        for name in names: yield NamedKey.Event(name).name
+    
+    def reset(self):
+        self._patterns = self.automaton.compiled
+        self._state = 0
+        self._depth = 0  # characters typed since the last reset
+        self._lengths.clear()
+    
+    def _set_max_len(self, max_len):
+        if max_len != self._lengths.maxlen:
+            self._lengths = collections.deque(maxlen=max_len)
+    
+    def __len__(self):
+        return len(self.replacements)
+    
+    def __contains__(self, abbreviation):
+        return abbreviation in self.replacements
+    
+    def add(self, abbreviation, replacement):
+        """replacement is sent via keyb.send or, if callable, called with
+        the abbreviation."""
+        if not isinstance(abbreviation, str): raise TypeError(abbreviation)
+        self.automaton.add(abbreviation, abbreviation)
+        self.replacements[abbreviation] = replacement
+        self._set_max_len(max(self._lengths.maxlen, len(abbreviation)))
+    
+    def remove(self, abbreviation):
+        del self.replacements[abbreviation]
+        self.automaton.remove(abbreviation)
+        self._set_max_len(max(map(len, self.replacements), default=0))
+    
+    def reload(self, new):
+        """Apply the abbreviations and options of the HotstringEngine new
+        (or remove all if new is None). Returns the number of changed
+        abbreviations."""
+        replacements = {} if new is None else new.replacements
+        changed = 0
+        for abbreviation in self.replacements.keys() - replacements.keys():
+            self.remove(abbreviation)
+            changed += 1
+        for abbreviation, replacement in replacements.items():
+            if abbreviation not in self.replacements:
+                self.add(abbreviation, replacement)
+            elif self.replacements[abbreviation] != replacement:
+                self.replacements[abbreviation] = replacement
+            else:
+                continue
+            changed += 1
+        if new is not None:
+            for attr in ("send", "undo", "undo_additional", "endevents",
+                    "limit_allowed_keys", "eventmap", "anywhere"):
+                setattr(self, attr, getattr(new, attr))
+        return changed
+    
+    def event(self, k):
+        if k.press is not False: return
+        if not isinstance(k, NamedKey.Event): return
+        if self.listener.active_blocks:
+            # e.g. while sending a replacement
+            if self._depth: self.reset()
+            return
+        name = k.name
+        mapped = None
+        if self.eventmap:
+            mapped = self.eventmap.get(name)
+        if name in self.endevents or mapped in self.endevents:
+            self.reset()
+            return
+        if self.limit_allowed_keys:
+            if (mapped if self.eventmap else name) not in \
+                    self.limit_allowed_keys:
+                self.reset()
+                return
+        if self.eventmap:
+            if mapped is None: return  # not counted, as in KeyWaiter
+            name = mapped
+        patterns = self.automaton.compiled
+        if patterns is not self._patterns: self.reset()
+        state = self._state
+        if state is None: return  # anchored and no abbreviation possible
+        if self.anywhere:
+            for c in name: state = patterns.step(state, c)
+        else:
+            goto = patterns.goto
+            for c in name:
+                state = goto[state].get(c)
+                if state is None: break
+        self._state = state
+        self._depth += len(name)
+        self._lengths.append(len(name))
+        if state is None: return
+        for abbr in patterns.matches(state):
+            if self.anywhere or len(abbr) == self._depth:
+                return self._hit(abbr)
+    
+    def _hit(self, abbr):
+        lengths = self._lengths
+        num, chars = 0, 0
+        while chars < len(abbr) and num < len(lengths):
+            num += 1
+            chars += lengths[-num]
+        self.reset()
+        self.hits += 1
+        listener = self.listener
+        return listener.executor.submit(self._replace, abbr, num,
+                limits=(self.limit,))
+    
+    def _replace(self, abbr, num):
+        replacement = self.replacements[abbr]
+        if self.undo:
+            self.keyb.send("<BackSpace>" * (num + self.undo_additional))
+        if callable(replacement):
+            return replacement(abbr)
+        if self.send:
+            self.keyb.send(replacement)
@@ -0,0 +1,311 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import struct, mmap, os, collections, threading, time
+from time import perf_counter_ns, time_ns
+from .hookpower.baseclasses import queued_time
+from Dhelpers.baseclasses import TimedObject
+from Dhelpers.measuring import LatencyHistogram
+from . import HookAdaptor, KeyboardAdaptor, MouseAdaptor, hotkeys, \
+    MouseMoveEvent, Keyvent, Buttonevent
+
+
+# Each input event is stored as one fixed size record (20 bytes):
+#   t_ns   int64  time when the event was queued by the hook, taken from
+#                 perf_counter_ns and shifted to the time.time_ns() epoch
+#   code   int32  index into the name table, or x for mouse moves
+#   value  int32  0, or y for mouse moves
+#   kind   uint8  one of the KIND_* constants below
+#   state  int8   1 = press, 0 = release, -1 = not applicable
+# The name table is kept in a sidecar text file (path + ".names") with one
+# name per line, which is only appended to when a new name shows up.
+
+record_struct = struct.Struct("<qiiBbxx")
+record_size = record_struct.size
+
+KIND_KEY = 0
+KIND_BUTTON = 1
+KIND_MOVE_ABS = 2
+KIND_MOVE_REL = 3
+
+JournalRecord = collections.namedtuple("JournalRecord",
+        ("t_ns", "code", "value", "kind", "state"))
+
+
+scroll_amounts = dict(scroll_up=(1, 0), scroll_down=(-1, 0),
+        scroll_left=(0, -1), scroll_right=(0, 1))
+
+
+def names_path(path):
+    return os.fspath(path) + ".names"
+
+
+
+class JournalRecorder(TimedObject, HookAdaptor.AdaptiveClass):
+    """Append the received input events to the journal file at path. Like a
+    Waiter, it can be used as context manager or with start and stop.
+    Recording into an existing journal appends to it."""
+    
+    adaptor = HookAdaptor(group="journal", _primary_name="JournalRecorder.adaptor")
+    hook = adaptor
+    
+    def __init__(self, path, maxtime=None, *, keys=True, buttons=True,
+            cursor=False, capture=False, wait=False, flush_every=256):
+        super().__init__(timeout=maxtime, wait=wait)
+        if not (keys or buttons or cursor): raise ValueError(
+                "JournalRecorder: keys, buttons and cursor are all disabled.")
+        self.path = os.fspath(path)
+        self.flush_every = flush_every
+        if os.path.exists(self.path) and os.path.getsize(self.path):
+            # appending, the existing records refer to the name table
+            self.name_codes = {name: code for code, name in
+                    enumerate(read_names(self.path))}
+        else:
+            self.name_codes = {}
+        timeout = maxtime + 5 if maxtime else None
+        hook_creator = 0
+        if keys: hook_creator += self.hook.keys()
+        if buttons: hook_creator += self.hook.buttons()
+        if cursor: hook_creator += self.hook.cursor()
+        self.callback_hook = hook_creator(self.called, timeout,
+                capture=capture)
+        self.num = 0
+        self._file = None
+        self._names_file = None
+        self._lock = threading.Lock()
+        self._clock_offset = 0
+    
+    def _start_action(self):
+        # the records are stamped with the monotonic perf_counter_ns, but
+        # stored as wall clock time, so appended recordings stay in order
+        self._clock_offset = time_ns() - perf_counter_ns()
+        self._file = open(self.path, "ab")
+        self._names_file = open(names_path(self.path), "a", encoding="utf-8")
+        self.callback_hook.start()
+        
+    def _stop_action(self):
+        self.callback_hook.stop()
+        with self._lock:
+            self._file.close()
+            self._names_file.close()
+            self._file = self._names_file = None
+    
+    def _code(self, name):
+        try:
+            return self.name_codes[name]
+        except KeyError:
+            code = self.name_codes[name] = len(self.name_codes)
+            self._names_file.write(name + "\n")
+            self._names_file.flush()
+            return code
+    
+    def called(self, event):
+        t_queued = queued_time()
+        if t_queued is None: t_queued = perf_counter_ns()
+        t_ns = t_queued + self._clock_offset
+        with self._lock:
+            if self._file is None: return  # already stopped
+            if isinstance(event, MouseMoveEvent):
+                kind = KIND_MOVE_REL if event.relative else KIND_MOVE_ABS
+                record = (t_ns, event.x, event.y, kind, -1)
+            else:
+                if isinstance(event, Keyvent): kind = KIND_KEY
+                elif isinstance(event, Buttonevent): kind = KIND_BUTTON
+                else: raise TypeError(event)
+                record = (t_ns, self._code(event.name), 0, kind,
+                    -1 if event.press is None else int(event.press))
+            self._file.write(record_struct.pack(*record))
+            self.num += 1
+            if self.num % self.flush_every == 0: self._file.flush()
+            
+            
+
+def read_names(path):
+    try:
+        f = open(names_path(path), encoding="utf-8")
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The name table {names_path(path)!r} of "
+                f"journal {path!r} is missing. Without it, the key and button "
+                f"codes of the journal can't be resolved.") from None
+    with f:
+        return [line.rstrip("\n") for line in f]
+
+
+class JournalReader:
+    """Read-only, memory-mapped access to a journal file. Supports len(),
+    indexing, slicing and iteration over JournalRecord tuples. Slices are
+    lazy iterators, which must be exhausted or dropped before close."""
+    
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self.names = read_names(self.path)
+        self._file = open(self.path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._len = size // record_size
+        # a half written record at the end is ignored
+        if self._len:
+            self._mmap = mmap.mmap(self._file.fileno(), 0,
+                    access=mmap.ACCESS_READ)
+            self._view = memoryview(self._mmap)[:self._len*record_size]
+        else:
+            self._mmap = self._view = None
+    
+    def close(self):
+        if self._view is not None:
+            self._view.release()
+            self._mmap.close()
+            self._view = self._mmap = None
+        self._file.close()
+        
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *error_info):
+        self.close()
+    
+    def __len__(self):
+        return self._len
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1: return map(self.__getitem__,
+                    range(start, stop, step))
+            return self._iter(start, stop)
+        if index < 0: index += self._len
+        if not 0 <= index < self._len: raise IndexError(index)
+        return JournalRecord._make(record_struct.unpack_from(self._view,
+                index * record_size))
+    
+    def _iter(self, start, stop):
+        if start >= stop: return iter(())
+        return map(JournalRecord._make, record_struct.iter_unpack(
+                self._view[start * record_size:stop * record_size]))
+    
+    def __iter__(self):
+        if not self._len: return iter(())
+        return map(JournalRecord._make,
+                record_struct.iter_unpack(self._view))
+    
+    def name(self, record):
+        if record.kind in (KIND_MOVE_ABS, KIND_MOVE_REL): raise ValueError(
+                f"{record} is a mouse move and has no name.")
+        return self.names[record.code]
+    
+    def duration(self):
+        """Time between the first and last recorded event in seconds."""
+        if self._len < 2: return 0
+        return (self[-1].t_ns - self[0].t_ns) / 1e9
+            
+
+
+class JournalReplayer(TimedObject):
+    """Replay a journal, reproducing the recorded timing between events.
+    
+    Every event is scheduled against its absolute target time (relative to
+    the start of the replay) instead of sleeping the recorded delay after
+    the previous event. So the time needed for sending an event and the
+    inaccuracy of sleep do not add up over a long replay. The last
+    spin_ns nanoseconds before each target are busy waited. The lateness of
+    each sent event is recorded in the LatencyHistogram self.lateness.
+    """
+    
+    keyb = KeyboardAdaptor(group="journal", _primary_name="JournalReplayer.keyb")
+    mouse = MouseAdaptor(group="journal", _primary_name="JournalReplayer.mouse")
+    
+    spin_ns = 1000000
+    
+    def __init__(self, journal, speed=1, *, start=0, stop=None, keys=True,
+            buttons=True, cursor=True, pause_hotkeys=True, wait=True):
+        super().__init__(timeout=None, wait=wait)
+        if speed <= 0: raise ValueError(f"speed must be positive: {speed}")
+        if not isinstance(journal, JournalReader):
+            journal = JournalReader(journal)
+        self.journal = journal
+        self.speed = speed
+        self.range = slice(start, stop).indices(len(journal))[:2]
+        self.kinds = set()
+        if keys: self.kinds.add(KIND_KEY)
+        if buttons: self.kinds.add(KIND_BUTTON)
+        if cursor: self.kinds.update((KIND_MOVE_ABS, KIND_MOVE_REL))
+        self.pause_hotkeys = pause_hotkeys
+        self.lateness = LatencyHistogram()
+        self.num = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def _start_action(self):
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run,
+                name="JournalReplayer", daemon=True)
+        self._thread.start()
+    
+    def _stop_action(self):
+        self._stop_event.set()
+    
+    def _run(self):
+        start, stop = self.range
+        if start < stop:
+            t0_recorded = self.journal[start].t_ns
+            duration = (self.journal[stop-1].t_ns - t0_recorded) / \
+                self.speed / 1e9
+            records = self.journal[start:stop]
+            if self.pause_hotkeys:
+                with hotkeys.paused(duration + 5):
+                    self._replay(records, t0_recorded)
+            else:
+                self._replay(records, t0_recorded)
+        if self.active: self.stop("done")
+    
+    def _replay(self, records, t0_recorded):
+        t0 = perf_counter_ns()
+        speed = self.speed
+        spin_ns = self.spin_ns
+        stop_event = self._stop_event
+        for record in records:
+            if record.kind not in self.kinds: continue
+            target = t0 + int((record.t_ns - t0_recorded) / speed)
+            remaining = target - perf_counter_ns()
+            if remaining > spin_ns:
+                if stop_event.wait((remaining - spin_ns) / 1e9): return
+            elif stop_event.is_set():
+                return
+            while perf_counter_ns() < target: pass
+            self.lateness.record(perf_counter_ns() - target)
+            self.send(record)
+            self.num += 1
+    
+    def send(self, record):
+        kind = record.kind
+        if kind == KIND_MOVE_ABS:
+            self.mouse.moveto(record.code, record.value)
+        elif kind == KIND_MOVE_REL:
+            self.mouse.move(record.code, record.value)
+        else:
+            sender = self.keyb if kind == KIND_KEY else self.mouse
+            name = self.journal.name(record)
+            if record.state == 1:
+                sender.press(name, pause_hotkeys=False)
+            elif record.state == 0:
+                sender.rls(name, pause_hotkeys=False)
+            elif name in scroll_amounts and kind == KIND_BUTTON:
+                # scroll events have no press and release
+                self.mouse.scroll(*scroll_amounts[name], pause_hotkeys=False)
+            else:
+                sender.press(name, pause_hotkeys=False)
+                sender.rls(name, pause_hotkeys=False)
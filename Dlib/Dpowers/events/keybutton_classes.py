@@ -18,7 +18,7 @@
 #
 from Dhelpers.named import NamedObj
 from .event_classes import Buttonevent, Keyvent, NamedPressReleaseEvent
-import re
+import re, functools
 
 class NamedKeyButton(NamedObj):
     Event = None
@@ -37,16 +37,38 @@ class NamedKeyButton(NamedObj):
             NamedClass = cls
         cls.Event = Event
     
-    def __init__(self, *names):
-        super().__init__(*names)
-        # create all the corresponding events already to save time later
-        self.press_event = self.Event(self.name, press=True)
-        self.release_event = self.Event(self.name, press=False)
-        self.release_event_without_rls = self.Event(self.name,
-                press=False, write_rls=False)
+    # The corresponding events are created on first use and then kept, to
+    # save time later (and not to spend it during import for all keys).
+    # These events are shared by all hooks, so they must never be changed.
+    # Events with data of a single occurrence are copies, see Buttonevent.at
     
-    def get_event(self, press, write_rls=True):
-        if press: return self.press_event
+    @functools.cached_property
+    def press_event(self):
+        return self.Event(self.name, press=True)
+    
+    @functools.cached_property
+    def release_event(self):
+        return self.Event(self.name, press=False)
+    
+    @functools.cached_property
+    def release_event_without_rls(self):
+        return self.Event(self.name, press=False, write_rls=False)
+    
+    @functools.cached_property
+    def event_without_press(self):
+        # e.g. scroll events, which are neither press nor release
+        return self.Event(self.name, press=None)
+    
+    @functools.cached_property
+    def multipress_event(self):
+        event = self.Event(self.name, press=True)
+        event.multipress = True
+        return event
+    
+    def get_event(self, press, write_rls=True, multipress=False):
+        if press is None: return self.event_without_press
+        if press: return self.multipress_event if multipress else \
+            self.press_event
         if not write_rls:
             if press: raise ValueError
             return self.release_event_without_rls
@@ -113,7 +135,7 @@ class NamedButton(NamedKeyButton, event_baseclass=Buttonevent):
     
     def get_event(self, press, write_rls=True, x=None, y=None):
         event = super().get_event(press, write_rls)
-        event.x=x
-        event.y=y
+        if x is None and y is None: return event
+        return event.at(x, y)
         
         
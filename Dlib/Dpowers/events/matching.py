@@ -0,0 +1,276 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import collections, itertools, threading
+
+
+class PatternAutomaton:
+    """Aho-Corasick automaton over event sequences.
+    
+    Each pattern is a key (usually the trigger event object) together with
+    its sequence of members. Members are compared like dict keys, i.e. via
+    hash and ==, which equals the string comparison of the event objects.
+    Patterns longer than max_len are kept but never matched.
+    
+    Adding or removing a pattern changes the trie right away. The failure
+    and output links are computed lazily: the next access of the attribute
+    compiled returns a new, immutable CompiledPatterns snapshot. So a thread
+    which is stepping through an old snapshot is never disturbed by changes.
+    """
+    
+    def __init__(self, max_len=None):
+        self.max_len = max_len
+        self.patterns = {}  # key -> (order, members)
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._reset_trie()
+    
+    def _reset_trie(self):
+        self._goto = [{}]
+        self._keys = [()]  # keys of the patterns ending at each node
+        self._dead = 0  # nodes which were cut off from the trie
+        self._compiled = None
+    
+    def __len__(self):
+        return len(self.patterns)
+    
+    def __contains__(self, key):
+        return key in self.patterns
+    
+    def add(self, key, members):
+        members = tuple(members)
+        if not members: raise ValueError(f"Pattern {key} has no members.")
+        with self._lock:
+            if key in self.patterns:
+                raise ValueError(f"Pattern {key} added more than one time.")
+            self.patterns[key] = (next(self._order), members)
+            self._insert(key, members)
+    
+    def _insert(self, key, members):
+        if self.max_len is not None and len(members) > self.max_len: return
+        goto = self._goto
+        node = 0
+        for member in members:
+            child = goto[node].get(member)
+            if child is None:
+                child = len(goto)
+                goto.append({})
+                self._keys.append(())
+                goto[node][member] = child
+            node = child
+        self._keys[node] += (key,)
+        self._compiled = None
+    
+    def remove(self, key):
+        with self._lock:
+            order, members = self.patterns.pop(key)
+            if self.max_len is not None and len(members) > self.max_len:
+                return  # was not inserted
+            goto = self._goto
+            path = [0]
+            for member in members: path.append(goto[path[-1]][member])
+            self._keys[path[-1]] = tuple(k for k in self._keys[path[-1]] if
+                k != key)
+            # cut off the nodes which are not needed anymore
+            for i in range(len(members), 0, -1):
+                node = path[i]
+                if goto[node] or self._keys[node]: break
+                del goto[path[i-1]][members[i-1]]
+                self._dead += 1
+            self._compiled = None
+            if self._dead > len(goto) // 2: self._rebuild()
+    
+    def set_max_len(self, max_len):
+        with self._lock:
+            if max_len == self.max_len: return
+            self.max_len = max_len
+            self._rebuild()
+    
+    def _rebuild(self):
+        self._reset_trie()
+        for key, (order, members) in self.patterns.items():
+            self._insert(key, members)
+    
+    @property
+    def compiled(self):
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                compiled = self._compiled
+                if compiled is None:
+                    compiled = self._compiled = self._compile()
+        return compiled
+    
+    def _compile(self):
+        goto = [dict(d) for d in self._goto]
+        keys = self._keys
+        fail = [0] * len(goto)
+        out = [()] * len(goto)
+        order = lambda key: self.patterns[key][0]
+        queue = collections.deque(goto[0].values())
+        for child in queue: out[child] = keys[child]
+        # breadth first, so the failure target is always completed before
+        while queue:
+            node = queue.popleft()
+            for member, child in goto[node].items():
+                f = fail[node]
+                while f and member not in goto[f]: f = fail[f]
+                fail[child] = goto[f].get(member, 0)
+                out[child] = keys[child] + out[fail[child]]
+                queue.append(child)
+        out = [tuple(sorted(o, key=order)) if len(o) > 1 else o for o in out]
+        return CompiledPatterns(goto, fail, out)
+
+
+
+class CompiledPatterns:
+    
+    __slots__ = ("goto", "fail", "out")
+    
+    def __init__(self, goto, fail, out):
+        self.goto = goto
+        self.fail = fail
+        self.out = out
+    
+    def step(self, state, member):
+        """Return the state after member was appended to the input."""
+        goto = self.goto
+        fail = self.fail
+        while True:
+            child = goto[state].get(member)
+            if child is not None: return child
+            if state == 0: return 0
+            state = fail[state]
+    
+    def matches(self, state):
+        """Return the keys of all patterns which are a suffix of the input,
+        in the order they were added."""
+        return self.out[state]
+    
+    def run(self, members, state=0):
+        for member in members: state = self.step(state, member)
+        return state
+
+
+
+class ChordTable:
+    """Hotkeys as (modifier mask, key, press) entries of a dict.
+    
+    The modifier mask is kept up to date from the press and release events
+    of the modifier keys, so a hotkey is found with one hash lookup,
+    independent of the order in which the modifiers were pressed and of
+    other events in between. Modifiers in the same group of equivalents
+    (by default left and right Shift and Ctrl) share a bit and are
+    interchangeable. Names must be standardized, as the names of the event
+    objects are.
+    """
+    
+    modifier_names = ("ShiftL", "ShiftR", "CtrlL", "CtrlR", "Alt", "AltGr",
+        "Win")
+    default_equivalents = (("ShiftL", "ShiftR"), ("CtrlL", "CtrlR"))
+    
+    def __init__(self, equivalents=default_equivalents):
+        self.definitions = {}  # hk -> (modifier names, key name, press)
+        self.table = {}
+        self.mask = 0
+        self._down = set()  # pressed modifiers
+        self._press_masks = {}  # key name -> mask when it was pressed
+        self.set_equivalents(*equivalents)
+    
+    def __len__(self):
+        return len(self.definitions)
+    
+    def __contains__(self, hk):
+        return hk in self.definitions
+    
+    def set_equivalents(self, *groups):
+        """Each group is a sequence of modifier names which are treated as
+        the same modifier, e.g. ("ShiftL", "ShiftR")."""
+        rep = {name: name for name in self.modifier_names}
+        for group in groups:
+            for name in group:
+                if name not in rep: raise ValueError(
+                        f"{name} is not one of {self.modifier_names}")
+                rep[name] = group[0]
+        bits = {}
+        for r in dict.fromkeys(rep.values()): bits[r] = 1 << len(bits)
+        self.canonical = rep
+        self.bits = {name: bits[r] for name, r in rep.items()}
+        self.reset()
+        self._rebuild()
+    
+    def reset(self):
+        # forget the pressed modifiers
+        self._down.clear()
+        self._press_masks.clear()
+        self.mask = 0
+    
+    def _rebuild(self):
+        table = {}
+        for hk, definition in self.definitions.items():
+            entry = self._entry(*definition)
+            if entry in table: raise ValueError(
+                    f"Hotkeys {table[entry]} and {hk} are equivalent.")
+            table[entry] = hk
+        self.table = table
+    
+    def _entry(self, modifiers, key, press):
+        mask = 0
+        for m in modifiers:
+            try:
+                mask |= self.bits[m]
+            except KeyError:
+                raise ValueError(f"{m} is not a modifier.") from None
+        return mask, self.canonical.get(key, key), press
+    
+    def add(self, hk, modifiers, key, press=True):
+        definition = (tuple(modifiers), key, press)
+        entry = self._entry(*definition)
+        if hk in self.definitions or entry in self.table:
+            raise ValueError(f"Hotkey {hk} defined more than one time.")
+        self.definitions[hk] = definition
+        self.table[entry] = hk
+    
+    def remove(self, hk):
+        definition = self.definitions.pop(hk)
+        del self.table[self._entry(*definition)]
+    
+    def event(self, k):
+        """Update the modifier state and return the matched hotkey or
+        None."""
+        name = k.name
+        press = k.press
+        mask = self.mask
+        if press is False:
+            # use the modifiers which were pressed together with the key
+            mask = self._press_masks.pop(name, mask)
+        elif press:
+            self._press_masks[name] = mask
+        bit = self.bits.get(name)
+        if bit is None:
+            return self.table.get((mask, name, press))
+        hk = self.table.get((mask, self.canonical[name], press))
+        down = self._down
+        if press:
+            down.add(name)
+            self.mask |= bit
+        elif press is False:
+            down.discard(name)
+            self.mask = 0
+            for m in down: self.mask |= self.bits[m]
+        return hk
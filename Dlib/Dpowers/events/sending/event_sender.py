@@ -39,6 +39,34 @@ def default_duration_doc(obj_name):
     print(_doc(f"press and release event of the same {obj_name}"))
 
 
+@functools.lru_cache(maxsize=1024)
+def _split_send_str(s, starting_symbol, ending_symbol):
+    # returns a tuple of (is_text, part) pairs, where the non text parts are
+    # event strings. Cached, because the same strings are usually sent often.
+    parts = []
+    _combination = ending_symbol + starting_symbol
+    while True:
+        s0, s1, s2 = s.partition(starting_symbol)
+        if s0 != "": parts.append((True, s0))
+        if s2 == "": break
+        if s2.startswith(_combination):
+            # if <>< is typed, send a single < and search if any more <
+            # are present
+            parts.append((True, starting_symbol))
+            s = s2[2:]
+        else:
+            t0, t1, t2 = s2.partition(ending_symbol)
+            if t1 == "":
+                # this happens if ">" was not found so that < is not closed.
+                parts.append((True, starting_symbol + t0))
+                break
+            elif t0 != "":
+                parts.append((False, t0))
+            if t2 == "": break
+            s = t2
+    return tuple(parts)
+
+
 
 class EventObjectSenderMixin:
     default_delay = None
@@ -142,26 +170,12 @@ class Sender(AdditionContainer.Addend):
     
     def send(self, s, auto_rls=True, delay=None, **text_kwargs):
         text_kwargs["delay"] = delay
-        _combination = self._ending_symbol + self._starting_symbol
-        while True:
-            s0, s1, s2 = s.partition(self._starting_symbol)
-            if s0 != "": self.text(s0, **text_kwargs)
-            if s2 == "": break
-            if s2.startswith(_combination):
-                # if <>< is typed, send a single < and search if any more <
-                # are present
-                self.text(self._starting_symbol,**text_kwargs)
-                s = s2[2:]
+        for is_text, part in _split_send_str(s, self._starting_symbol,
+                self._ending_symbol):
+            if is_text:
+                self.text(part, **text_kwargs)
             else:
-                t0, t1, t2 = s2.partition(self._ending_symbol)
-                if t1 == "":
-                    # this happens if ">" was not found so that < is not closed.
-                    self.text(self._starting_symbol + t0, **text_kwargs)
-                    break
-                elif t0 != "":
-                    self.send_eventstring(t0, auto_rls=auto_rls, delay=delay)
-                if t2 == "": break
-                s = t2
+                self.send_eventstring(part, auto_rls=auto_rls, delay=delay)
 
 
 
@@ -280,9 +294,11 @@ class AdaptiveSender(Sender, Adaptor):
     
     def get_backend_name(self, name):
         try:
-            return self._effective_dict.apply(name)
+            frozen = self._effective_dict.frozen
         except AttributeError:
             return self._effective_dict.get(name, name)
+        # a snapshot which is renewed automatically after changes
+        return frozen().apply(name)
         
 
     @adaptionmethod("press", require=True)
@@ -0,0 +1,39 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Sends key events to the hooks of Dpowers.events.hookpower.adapt_virtual
+# instead of the system.
+
+from ... import NamedKey, DependencyManager
+from ...hookpower.adapt_virtual import Keyhook
+
+with DependencyManager(__name__) as manager:
+    pass  # no dependencies
+
+handler = Keyhook.handler
+
+def press(name):
+    # raises KeyError for unknown names
+    handler.emit(NamedKey.get_stnd_name(name), press=True)
+
+def rls(name):
+    handler.emit(NamedKey.get_stnd_name(name), press=False)
+
+def text(character):
+    press(character)
+    rls(character)
@@ -0,0 +1,55 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+# Sends mouse events to the hooks of Dpowers.events.hookpower.adapt_virtual
+# instead of the system.
+
+from ... import NamedButton, DependencyManager
+from ...hookpower.adapt_virtual import Buttonhook, Cursorhook
+
+with DependencyManager(__name__) as manager:
+    pass  # no dependencies
+
+button_handler = Buttonhook.handler
+cursor_handler = Cursorhook.handler
+
+def pos():
+    return cursor_handler.position
+
+def move(dx, dy):
+    cursor_handler.emit(dx, dy, relative=True)
+
+def moveto(x, y):
+    cursor_handler.emit(x, y)
+
+def press(name):
+    # raises KeyError for unknown names
+    x, y = cursor_handler.position
+    button_handler.emit(NamedButton.get_stnd_name(name), press=True, x=x, y=y)
+
+def rls(name):
+    x, y = cursor_handler.position
+    button_handler.emit(NamedButton.get_stnd_name(name), press=False, x=x, y=y)
+
+def scroll(vertical, horizontal=0):
+    x, y = cursor_handler.position
+    for amount, names in ((vertical, ("scroll_down", "scroll_up")),
+                (horizontal, ("scroll_left", "scroll_right"))):
+        name = names[amount > 0]
+        for _ in range(abs(amount)):
+            button_handler.emit(name, press=None, x=x, y=y)
@@ -19,6 +19,8 @@
 from warnings import warn
 from . import NamedKey, keyb, NamedButton
 from ..winapps import pythoneditor
+from .. import Win
+from ..windowpower import WindowSearch, WindowSearchContainer
 from .event_classes import StringAnalyzer, EventCombination, EventSequence, \
     StringEvent
 from .hookpower import HookAdaptor, CallbackHook, KeyhookBase, ButtonhookBase
@@ -26,78 +28,257 @@ from Dhelpers.launcher import launch
 from Dhelpers.baseclasses import TimedObject, KeepInstanceRefs
 from Dhelpers.arghandling import check_type
 from Dhelpers.counting import dpress
-import collections, inspect
+from Dhelpers.timerwheel import timer_wheel
+from Dhelpers.executor import BoundedExecutor, ConcurrencyLimit, ProcessPool
+from Dhelpers.measuring import LatencyHistogram
+from .matching import PatternAutomaton, ChordTable
+from .hotstring import HotstringEngine
+import collections, inspect, threading, sys
 from os import path
+from time import monotonic, perf_counter_ns
+
+
+Timing = collections.namedtuple("Timing", "within interval hold keys")
+# time constraints of a trigger in seconds, see PatternListener._timing
 
 class PatternListener:
     
-    max_thread_num = 1
+    executor = BoundedExecutor(max_workers=8, name="TriggerAction")
+    # shared by all instances to run the actions of matched triggers
+    process_pool = ProcessPool(max_workers=2)
+    # used for actions defined with process=True
+    
+    default_max_thread_num = 1
+    default_policy = "reject"
+    # what happens with a matched trigger while max_thread_num actions are
+    # running, see Dhelpers.executor.ConcurrencyLimit
+    
+    chord_mode = False
+    # default for add_hotkey: if True, hotkeys are matched via the modifier
+    # state (see matching.ChordTable) instead of as event sequence
+    
+    tap_interval = 300
+    # default maximum time in ms between the events of a hotkey with taps>1
     
     def __init__(self, buffer = 4):
         self.eventdict = dict()
-        self.recent_events = collections.deque()
-        self.buffer = buffer
+        self.automaton = PatternAutomaton(buffer)
+        self._patterns = None  # the compiled automaton used by self.event
+        self._state = 0
+        self.recent_events = collections.deque(maxlen=buffer)
+        self.recent_times = collections.deque(maxlen=buffer)
+        self.timing = {}  # trigger event -> Timing
+        self._holds = {}  # trigger event -> (Timer, Timing) while held
+        self._held_events = None
+        # (held trigger events, recent events, recent times) of the last
+        # hit which only started holds, to undo it if they are rejected
+        self.chords = ChordTable()
         self.blocked_hks = []
+        self.process_pools = set()  # of the actions, warmed by start
+        self._event_lock = threading.RLock()
+        # held while the matching state changes: by the callers of event
+        # if it can run in several threads (see TriggerManager.event) and
+        # by _hold_expired, which runs in the timer_wheel thread
         self.stringevent_analyzer = StringAnalyzer(NamedKey, NamedButton)
         self.reset_analyzefunc()
-        self.active_thread_num = 0
+        self.thread_limit = ConcurrencyLimit(self.default_max_thread_num,
+                self.default_policy)
+        self.action_limits = {}
+        self.profiler = ActionProfiler()
         
+    @property
+    def max_thread_num(self):
+        return self.thread_limit.limit
+    @max_thread_num.setter
+    def max_thread_num(self, val):
+        self.thread_limit.limit = val
+    
+    @property
+    def active_thread_num(self):
+        return self.thread_limit.active
+    
+    @property
+    def policy(self):
+        return self.thread_limit.policy
+    @policy.setter
+    def policy(self, val):
+        if val not in ConcurrencyLimit.policies: raise ValueError(val)
+        self.thread_limit.policy = val
+    
+    def set_action_limit(self, action, limit, policy="reject"):
+        """Allow at most limit concurrent runs of action (in addition to
+        max_thread_num). Use limit=None to remove the limit."""
+        if limit is None:
+            self.action_limits.pop(action, None)
+        else:
+            self.action_limits[action] = ConcurrencyLimit(limit, policy)
+    
+    @property
+    def buffer(self):
+        return self.automaton.max_len
+    @buffer.setter
+    def buffer(self, val):
+        self.automaton.set_max_len(val)
+        self.recent_events = collections.deque(self.recent_events, maxlen=val)
+        self.recent_times = collections.deque(self.recent_times, maxlen=val)
+    
+    def set_chord_equivalents(self, *groups):
+        """Groups of modifier names which are interchangeable in chord
+        hotkeys. Without arguments, left and right modifiers are distinct."""
+        self.chords.set_equivalents(*groups)
     
     def event(self, k):
         if not self.eventdict: return
         # _print(k)
-        if self.active_thread_num >= self.max_thread_num: return
+        if self._holds and k.press is False: self._released(k.name)
+        chord = None
+        if self.chords.table:
+            # the modifier state must be updated even if the action is
+            # rejected
+            chord = self.chords.event(k)
+        thread_limit = self.thread_limit
+        if thread_limit.full and thread_limit.policy == "reject": return
+        if chord is not None: self._matched(chord)
+        if not self.automaton.patterns: return
         self.recent_events.append(k)
-        if len(self.recent_events) > self.buffer: self.recent_events.popleft()
-        recent_events = self.recent_events.copy()
-        for event, action in self.eventdict.items():
-            members = event.members
-            lm = len(members)
-            if lm > len(recent_events): continue
-            # if more members are required than actual events passed
-            for i in range(-1, -lm - 1, -1):
-                if members[i] != recent_events[i]: break
-            else:
-                launch.thread(self.runscript, action, event)
-                # this means that for each member event, the suiting recent
-                # event has been found
+        self.recent_times.append(monotonic())
+        patterns = self.automaton.compiled
+        if patterns is self._patterns:
+            self._state = state = patterns.step(self._state, k)
+        else:
+            # patterns were added or removed since the last event
+            self._patterns = patterns
+            self._state = state = patterns.run(self.recent_events)
+        matches = patterns.matches(state)
+        if matches:
+            # each matching pattern is a suffix of the recent events
+            matched = False
+            held = []
+            for event in matches:
+                ret = self._matched(event)
+                if ret == "hold":
+                    held.append(event)
+                elif ret:
+                    matched = True
+            if matched or held:
+                # a hit which only started holds can still be rejected,
+                # then the recent events are restored, see _released
+                self._held_events = None if matched else (held,
+                        tuple(self.recent_events), tuple(self.recent_times))
                 self.recent_events.clear()
+                self.recent_times.clear()
+                self._state = 0
+    
+    def _matched(self, hk):
+        action = self.eventdict.get(hk)
+        if action is None: return False  # was just removed
+        timing = self.timing.get(hk)
+        if timing is None:
+            self.submit_action(action, hk)
+            return True
+        times = self.recent_times
+        if timing.within is not None or timing.interval is not None:
+            n = len(hk.members)
+            if len(times) < n: return False
+            if timing.within is not None and times[-1] - times[-n] > \
+                    timing.within:
+                return False
+            if timing.interval is not None:
+                for i in range(1, n):
+                    if times[-i] - times[-i-1] > timing.interval: return False
+        if timing.hold:
+            # the action is submitted by the timer_wheel if no key was
+            # released before
+            old = self._holds.get(hk)
+            if old: old[0].cancel()
+            timer = timer_wheel.schedule(timing.hold, self._hold_expired, hk)
+            self._holds[hk] = (timer, timing)
+            return "hold"
+        self.submit_action(action, hk)
+        return True
+    
+    def _released(self, name):
+        for hk, (timer, timing) in list(self._holds.items()):
+            if name in timing.keys:
+                timer.cancel()
+                self._holds.pop(hk, None)
+        held = self._held_events
+        if held and not any(hk in self._holds for hk in held[0]):
+            # the hit was rejected, so the events it consumed must still be
+            # available for other patterns
+            self._held_events = None
+            events, times = list(held[1]), list(held[2])
+            events += self.recent_events
+            times += self.recent_times
+            self.recent_events.clear()
+            self.recent_events.extend(events)
+            self.recent_times.clear()
+            self.recent_times.extend(times)
+            self._patterns = None  # the state is computed again
+    
+    def _hold_expired(self, hk):
+        with self._event_lock:
+            held = self._held_events
+            if held and hk in held[0]: self._held_events = None
+            entry = self._holds.pop(hk, None)
+            action = self.eventdict.get(hk)
+            if entry and not entry[0].cancelled and action is not None:
+                self.submit_action(action, hk)
 
-    def runscript(self, action, hk):
+    def submit_action(self, action, hk):
+        limits = (self.thread_limit,)
+        action_limit = self.action_limits.get(action)
+        if action_limit: limits += (action_limit,)
+        if isinstance(action, ProcessAction): limits += (action.pool.limit,)
+        return self.executor.submit(self.runscript, action, hk,
+                perf_counter_ns(), limits=limits, key=(self, hk))
+    
+    def runscript(self, action, hk, t_submitted=None):
         if self.active_blocks: return
         if self.analyze_func:
             if self.analyze_func(action, hk) is True: self.reset_analyzefunc()
             return
-        assert self.active_thread_num >= 0
-        if self.active_thread_num >= self.max_thread_num: return
-        self.active_thread_num += 1
+        profiler = self.profiler
+        t_start = perf_counter_ns()
+        watchdog = profiler.watch(action, hk)
+        error = None
         try:
-            # print(hk_func)
-            # print(hk,hk_func,type(hk_func))
-            if type(action) is str:
-                if action.startswith("[dkeys]"):
-                    if dpress(hk, 0.15):
-                        keyb.send(action[7:], delay=1)
-                else:
-                    keyb.send(action)
-            elif callable(action):
-                # the following makes sure that the hk_func is accepting 1
-                # argument even if the underlying func does not
-                try:
-                    return action(hk)
-                except TypeError:
-                    pass
-                return action()
-            else:
-                raise TypeError
+            return self._execute(action, hk)
+        except BaseException as e:
+            error = e
+            raise
         finally:
-            self.active_thread_num -= 1
+            if watchdog: watchdog.cancel()
+            profiler.record(action, hk, t_submitted, t_start,
+                    perf_counter_ns(), error)
+    
+    def _execute(self, action, hk):
+        # print(hk_func)
+        # print(hk,hk_func,type(hk_func))
+        if type(action) is str:
+            if action.startswith("[dkeys]"):
+                if dpress(hk, 0.15):
+                    keyb.send(action[7:], delay=1)
+            else:
+                keyb.send(action)
+        elif isinstance(action, ProcessAction):
+            return action(hk)
+        elif callable(action):
+            # the following makes sure that the hk_func is accepting 1
+            # argument even if the underlying func does not
+            try:
+                return action(hk)
+            except TypeError:
+                pass
+            return action()
+        else:
+            raise TypeError
         
         
     def set_analyzefunc(self, func, timeout=5):
         assert callable(func)
         self.analyze_func = func
-        launch.thread(self.reset_analyzefunc, initial_time_delay=timeout)
+        timer_wheel.schedule(timeout, self.reset_analyzefunc)
         
     def reset_analyzefunc(self):
         self.analyze_func = None
@@ -107,56 +288,196 @@ class PatternListener:
     
     @staticmethod
     def _jump_to_action(action, hk):
-        file = path.abspath(inspect.getsourcefile(action))
-        linenumber = inspect.getsourcelines(action)[-1]
+        file, linenumber = source_location(action)
         pythoneditor.jump_to_line(file, linenumber)
         return True
     
+    def show_slow_action(self):
+        """Jump to the source code of the last action which exceeded the
+        budget of the profiler."""
+        if not self.profiler.slow: raise ValueError("No slow action recorded.")
+        action, hk, ms = self.profiler.slow[-1]
+        self._jump_to_action(action, hk)
+    
+    def stats(self):
+        """Count, errors, run time and queue wait (in ms) of each action,
+        sorted by total run time."""
+        return self.profiler.table()
+    
+    def dump_stats(self, interval=None, file=None):
+        """Print the stats table, and then every interval seconds (until
+        interval=None is passed)."""
+        self.profiler.dump(file)
+        self.profiler.dump_periodically(interval, file)
+    
 
-    def add_event(self, event, action):
+    def add_event(self, event, action, timing=None):
+        if event in self.eventdict:
+            raise ValueError(f"Tiggerevent {event} defined more than one time.")
+        self.automaton.add(event, event.members)
+        self.eventdict[event] = action
+        if timing: self.timing[event] = timing
+    
+    def add_chord(self, event, modifiers, key, action, press=True,
+            timing=None):
         if event in self.eventdict:
             raise ValueError(f"Tiggerevent {event} defined more than one time.")
+        if timing and (timing.within or timing.interval): raise ValueError(
+                "Only the hold time constraint is possible for chords.")
+        self.chords.add(event, (m.name for m in modifiers), key.name, press)
         self.eventdict[event] = action
+        if timing: self.timing[event] = timing
+    
+    @staticmethod
+    def _timing(within=None, interval=None, hold=None, keys=()):
+        # arguments in ms
+        if within is None and interval is None and not hold: return None
+        s = lambda ms: None if ms is None else ms / 1000
+        return Timing(s(within), s(interval), s(hold),
+            frozenset(k.name for k in keys))
+    
+    def remove_event(self, event):
+        if event in self.chords:
+            self.chords.remove(event)
+        else:
+            self.automaton.remove(event)
+        del self.eventdict[event]
+        self.timing.pop(event, None)
+        hold = self._holds.pop(event, None)
+        if hold: hold[0].cancel()
+    
+    def _definitions(self):
+        # Trigger events are compared by their string, as separately
+        # created EventSequences are never equal.
+        return {(event in self.chords, str(event)): event for event in
+            self.eventdict}
+    
+    def reload(self, new):
+        """Make the triggers of this instance equal to those of the
+        PatternListener new (which should not be started), while this
+        instance keeps running: only triggers which were added, removed or
+        changed are applied. Returns the numbers of these."""
+        check_type(PatternListener, new)
+        old_defs = self._definitions()
+        new_defs = new._definitions()
+        counts = dict(added=0, removed=0, changed=0)
+        if new.buffer > self.buffer: self.buffer = new.buffer
+        for key in old_defs.keys() - new_defs.keys():
+            self.remove_event(old_defs[key])
+            counts["removed"] += 1
+        for key, new_event in new_defs.items():
+            action = new.eventdict[new_event]
+            timing = new.timing.get(new_event)
+            event = old_defs.get(key)
+            if event is None:
+                if key[0]:
+                    self.chords.add(new_event,
+                            *new.chords.definitions[new_event])
+                    self.eventdict[new_event] = action
+                    if timing: self.timing[new_event] = timing
+                else:
+                    self.add_event(new_event, action, timing)
+                counts["added"] += 1
+            elif self.eventdict[event] != action or self.timing.get(
+                    event) != timing:
+                if timing:
+                    self.timing[event] = timing
+                else:
+                    self.timing.pop(event, None)
+                self.eventdict[event] = action
+                counts["changed"] += 1
+        if set(self.blocked_hks) != set(new.blocked_hks):
+            self.blocked_hks[:] = new.blocked_hks
+            self._blocked_hks_changed()
+        self.process_pools.update(new.process_pools)
+        return counts
 
-    def add_sequence(self, string, action):
+    # within: maximum time in ms from the first to the last event
+    # interval: maximum time in ms between two successive events
+    def add_sequence(self, string, action, within=None, interval=None):
         event = self.stringevent_analyzer.create_from_str(
                 string).hotkey_version()
-        self.add_event(event, action)
+        self.add_event(event, action, self._timing(within, interval))
 
-    def add_hotkey(self, string, action, rls=False, block=True):
+    # taps: number of times the (last) key must be pressed, see tap_interval
+    # hold: minimum time in ms which the keys must be held down. The action
+    # is started after this time if none of the keys was released.
+    def add_hotkey(self, string, action, rls=False, block=True, chord=None,
+            within=None, interval=None, hold=None, taps=1):
         event = self.stringevent_analyzer.create_from_str(string)
         if isinstance(event, EventSequence): raise ValueError
         if isinstance(event, StringEvent):
             if not event.press: raise ValueError
-            if block: self.blocked_hks.append(event)
-            if rls: event += event.reverse()
+            if block:
+                self.blocked_hks.append(event)
+                self._blocked_hks_changed()
+            modifiers, key = (), event
         elif isinstance(event, EventCombination):
-            event = event.hotkey_version(rls=rls)
+            modifiers, key = event.members[:-1], event.members[-1]
+            event = event.hotkey_version()
         else:
             raise TypeError
-        self.add_event(event, action)
+        if hold and rls: raise ValueError("hold and rls can't be combined.")
+        if taps > 1:
+            if within is None and interval is None:
+                interval = self.tap_interval
+            for _ in range(taps - 1): event += key.reverse() + key
+        if rls: event += key.reverse()
+        timing = self._timing(within, interval, hold, modifiers + (key,))
+        if self.chord_mode if chord is None else chord:
+            if taps > 1: raise ValueError("taps>1 is not possible for chords.")
+            self.add_chord(event, modifiers, key, action, press=not rls,
+                    timing=timing)
+        else:
+            members = len(event.members)
+            if members > self.buffer: self.buffer = members
+            self.add_event(event, action, timing)
 
     # A decorator
-    def sequence(self, *strings):
+    # process=True runs the action in a worker process of self.process_pool
+    # (or of the ProcessPool given instead of True), see ProcessAction
+    # timing: within/interval, see add_sequence
+    def sequence(self, *strings, process=False, **timing):
         def decorator(decorated_func):
-            for string in strings: self.add_sequence(string, decorated_func)
+            action = self._process_action(decorated_func, process)
+            for string in strings: self.add_sequence(string, action, **timing)
             return decorated_func
         return decorator
 
     # A decorator
-    def hotkey(self, *strings, rls=False, block=True):
+    # chord=True matches via the modifier state
+    # timing: within/interval/hold/taps, see add_hotkey
+    def hotkey(self, *strings, rls=False, block=True, process=False,
+            chord=None, **timing):
         def decorator(decorated_func):
+            action = self._process_action(decorated_func, process)
             for string in strings:
-                self.add_hotkey(string, decorated_func, rls=rls, block=block)
+                self.add_hotkey(string, action, rls=rls, block=block,
+                        chord=chord, **timing)
             return decorated_func
         return decorator
 
-    def hotkey_rls(self, *strings, block=True):
-        return self.hotkey(*strings, rls=True, block=block)
+    def hotkey_rls(self, *strings, block=True, process=False, chord=None,
+            **timing):
+        return self.hotkey(*strings, rls=True, block=block, process=process,
+                chord=chord, **timing)
+    
+    def _process_action(self, func, process):
+        if not process: return func
+        pool = self.process_pool if process is True else process
+        check_type(ProcessPool, pool)
+        # not warmed here, this usually runs while importing
+        owner = getattr(self, "triggerman_instance", None) or self
+        owner.process_pools.add(pool)
+        return ProcessAction(func, pool)
 
     def add_triggerdict(self, triggerdict):
         for eventstring, action in triggerdict.items():
             self.add_sequence(eventstring, action)
+    
+    def _blocked_hks_changed(self):
+        # overridden in subclasses which precompile the blocked hotkeys
+        pass
 
     
 
@@ -169,7 +490,7 @@ class PatternListener:
     @classmethod
     def unblock(cls, delay=None):
         if delay:
-            launch.thread(cls._unblock, initial_time_delay=delay)
+            timer_wheel.schedule(delay, cls._unblock)
         else:
             cls._unblock()
 
@@ -187,25 +508,59 @@ class PatternListener:
 
 
 
-class RegisteredHook(PatternListener):
+class SubListener(PatternListener):
+    # a PatternListener belonging to a TriggerManager
     
-    def __init__(self, buffer, hook_instance, container_triggerman=None):
+    def __init__(self, buffer, container_triggerman=None):
         super().__init__(buffer)
+        self.triggerman_instance = container_triggerman
+        if container_triggerman:
+            # its event method also changes the state of this instance
+            self._event_lock = container_triggerman._event_lock
+            # the limits hold for all actions of the TriggerManager
+            self.thread_limit = container_triggerman.thread_limit
+            self.action_limits = container_triggerman.action_limits
+            self.profiler = container_triggerman.profiler
+    
+    @property
+    def analyze_func(self):
+        if self._analyze_func: return self._analyze_func
+        if self.triggerman_instance: return self.triggerman_instance.analyze_func
+        
+    @analyze_func.setter
+    def analyze_func(self, val):
+        self._analyze_func = val
+        
+    def reset_analyzefunc(self):
+        try:
+            if self._analyze_func is None:
+                if self.triggerman_instance and self.triggerman_instance.analyze_func:
+                    self.triggerman_instance.analyze_func = None
+        except AttributeError:
+            pass
+        self.analyze_func = None
+
+
+class RegisteredHook(SubListener):
+    
+    def __init__(self, buffer, hook_instance, container_triggerman=None):
+        super().__init__(buffer, container_triggerman)
         check_type(CallbackHook, hook_instance)
         if isinstance(hook_instance, KeyhookBase):
             self.stringevent_analyzer = NamedKey.Event
         elif isinstance(hook_instance, ButtonhookBase):
             self.stringevent_analyzer = NamedButton.Event
         self.hook_instance = hook_instance(self.event)
-        self.triggerman_instance = container_triggerman
+        self._compile_reinject_table()
         
     def event(self, k):
-        super().event(k)
-        if self.triggerman_instance: self.triggerman_instance.event(k)
+        with self._event_lock:
+            super().event(k)
+            if self.triggerman_instance: self.triggerman_instance.event(k)
         
     def start(self):
-        if self.blocked_hks or self.triggerman_instance and \
-                self.triggerman_instance.blocked_hks:
+        self._compile_reinject_table()
+        if self._reinject_table or self._context_blocked:
             try:
                 self.hook_instance = self.hook_instance(reinject_func =
                                 self.reinject_func )
@@ -216,29 +571,82 @@ class RegisteredHook(PatternListener):
     def stop(self):
         return self.hook_instance.stop()
 
+    def _compile_reinject_table(self):
+        # This must be called whenever the blocked hotkeys of this instance
+        # or of its TriggerManager change. The reinject_func is called on the
+        # device thread for each key event, so it should only do a single
+        # hash lookup. (Blocked hotkeys are event objects, i.e. strings
+        # containing standardized name and press state.)
+        blocked = set(self.blocked_hks)
+        tm = self.triggerman_instance
+        if tm: blocked.update(tm.blocked_hks)
+        self._reinject_table = frozenset(blocked)
+        # keys blocked by any of the contexts
+        self._context_blocked = frozenset().union(*(c.blocked for c in
+            tm.contexts)) if tm else frozenset()
+    
+    _blocked_hks_changed = _compile_reinject_table
+    
     def reinject_func(self, event_obj):
-        if event_obj in self.blocked_hks: return False
-        if self.triggerman_instance and event_obj in \
-                self.triggerman_instance.blocked_hks: return False
+        if event_obj in self._reinject_table: return False
+        if event_obj in self._context_blocked:
+            return not self.triggerman_instance._context_blocks(event_obj)
         return True
+
+
+def search_args(search):
+    # the creation arguments of a WindowSearch or of each member of a
+    # WindowSearchContainer
+    return [(s.creation_args, s.creation_kwargs) for s in getattr(search,
+            "members", (search,))]
+
+
+class ActiveWindowWatcher(threading.Thread):
+    # looks up the active window for a TriggerManager in the background, so
+    # that the device and callback threads only read the cached result
     
-    @property
-    def analyze_func(self):
-        if self._analyze_func: return self._analyze_func
-        if self.triggerman_instance: return self.triggerman_instance.analyze_func
-        
-    @analyze_func.setter
-    def analyze_func(self, val):
-        self._analyze_func = val
-        
-    def reset_analyzefunc(self):
-        try:
-            if self._analyze_func is None:
-                if self.triggerman_instance and self.triggerman_instance.analyze_func:
-                    self.triggerman_instance.analyze_func = None
-        except AttributeError:
-            pass
-        self.analyze_func = None
+    def __init__(self, triggerman):
+        super().__init__(name="ActiveWindowWatcher", daemon=True)
+        self.triggerman = triggerman
+        self.wakeup = threading.Event()
+        self.stopped = False
+    
+    def run(self):
+        tm = self.triggerman
+        while not self.stopped:
+            self.wakeup.clear()
+            tm._update_active_window()
+            self.wakeup.wait(tm.context_ttl)
+    
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+
+
+class ContextTable(SubListener):
+    """Triggers of a TriggerManager which are only matched while the active
+    window matches search (a WindowSearch), see TriggerManager.context."""
+    
+    def __init__(self, search, container_triggerman, buffer=4):
+        super().__init__(buffer, container_triggerman)
+        self.search = search
+        self.blocked = frozenset()
+    
+    def __repr__(self):
+        args = ", ".join(f"{a} {k}" for a, k in search_args(self.search))
+        return f"<{self.__class__.__name__} for {args}>"
+    
+    def _blocked_hks_changed(self):
+        # the keys are only blocked while this context is active
+        self.blocked = frozenset(self.blocked_hks)
+        self.triggerman_instance._blocked_hks_changed()
+    
+    def activate(self):
+        # events typed in other contexts must not complete a pattern here
+        self.recent_events.clear()
+        self.recent_times.clear()
+        self._state = 0
+        self.chords.reset()
 
 class TriggerManager(PatternListener,TimedObject, HookAdaptor.AdaptiveClass,
         KeepInstanceRefs):
@@ -253,8 +661,205 @@ class TriggerManager(PatternListener,TimedObject, HookAdaptor.AdaptiveClass,
         KeepInstanceRefs.__init__(self)
         self.registered_hooks = []
         self.was_started = False
-        self.max_thread_num = TriggerManager.max_thread_num
+        self.hotstrings = None  # HotstringEngine, created when needed
+        self.contexts = []
+        self._active_window = (None, None)  # window ID, context
+        self._current_context = None  # the context which got the last event
+        self._watcher = None  # ActiveWindowWatcher while started
+        self._contexts_by_ID = {}
+        self._contexts_use_title = False
+        # self._event_lock: the hooks of one instance might run their
+        # callbacks in different threads (see EventDispatcher), but the
+        # state of the pattern matching must only be changed by one event
+        # at a time. It is shared with the contexts and registered hooks.
+
+
+    def event(self, k):
+        with self._event_lock:
+            super().event(k)
+            if self.contexts:
+                # only the table of the active context is matched
+                context = self._active_window[1]
+                if context is not self._current_context:
+                    self._current_context = context
+                    if context: context.activate()
+                if context: context.event(k)
+            hotstrings = self.hotstrings
+            if hotstrings: hotstrings.event(k)
+    
+    def hotstring_engine(self, **options):
+        """Return the HotstringEngine of this instance. The options (see
+        HotstringEngine.configure) apply to all hotstrings."""
+        if self.hotstrings is None:
+            self.hotstrings = HotstringEngine(self, **options)
+        elif options:
+            self.hotstrings.configure(**options)
+        return self.hotstrings
+    
+    def add_hotstrings(self, string_dict, **options):
+        engine = self.hotstring_engine(**options)
+        for abbreviation, replacement in string_dict.items():
+            engine.add(abbreviation, replacement)
+    
+    # A decorator, the function is called with the abbreviation
+    def hotstring(self, *abbreviations, **options):
+        def decorator(decorated_func):
+            self.add_hotstrings({a: decorated_func for a in abbreviations},
+                    **options)
+            return decorated_func
+        return decorator
 
+    context_ttl = 0.5
+    # seconds between the lookups of the active window (by the
+    # ActiveWindowWatcher thread). If None, only active_window_changed
+    # triggers a lookup. Keys blocked by a context are always checked
+    # against a fresh lookup, see _context_blocks.
+    
+    def context(self, *winargs, buffer=None, **winkwargs):
+        """Return the trigger table for the windows matching winargs and
+        winkwargs (the arguments of Win) or the given WindowSearch. Its
+        triggers are only matched while such a window is active. If several
+        contexts match, the one created first is used."""
+        if len(winargs) == 1 and not winkwargs and isinstance(winargs[0],
+                (WindowSearch, WindowSearchContainer)):
+            search = winargs[0]
+        elif any(isinstance(a, (WindowSearch, WindowSearchContainer)) for a
+                in winargs):
+            raise TypeError("A WindowSearch can't be combined with other "
+                            "arguments.")
+        else:
+            for context in self.contexts:
+                if context.search.compare_args(*winargs, **winkwargs):
+                    return context
+            search = Win._WinSearchClass(*winargs, **winkwargs)
+        if any(s.location for s in getattr(search, "members", (search,))):
+            raise ValueError(
+                "Window location arguments are not possible for contexts.")
+        buffer = self.buffer if buffer is None else buffer
+        context = ContextTable(search, self, buffer)
+        self.contexts.append(context)
+        self._contexts_changed()
+        return context
+    
+    def remove_context(self, context):
+        self.contexts.remove(context)
+        self._contexts_changed()
+    
+    def _contexts_changed(self):
+        self._active_window = (None, None)
+        self._contexts_by_ID.clear()
+        # the title of a window can change without changing the ID
+        self._contexts_use_title = any("title" in getattr(m, "_properties",
+            ()) for c in self.contexts for m in getattr(c.search, "members",
+            (c.search,)))
+        self._blocked_hks_changed()
+        if self.contexts and self.active: self._start_watcher()
+        if self._watcher: self._watcher.wakeup.set()
+    
+    def active_window_changed(self, ID=None):
+        """Notify that another window was activated, e.g. from a window
+        manager event. Without ID, the watcher thread looks it up now."""
+        if ID is None:
+            if self._watcher: self._watcher.wakeup.set()
+        else:
+            self._set_active_window(ID)
+    
+    def active_context(self):
+        # only returns the cached result of the ActiveWindowWatcher, so this
+        # is cheap enough for the device and callback threads
+        return self._active_window[1]
+    
+    def _start_watcher(self):
+        if self._watcher is None or not self._watcher.is_alive():
+            self._watcher = ActiveWindowWatcher(self)
+            self._watcher.start()
+    
+    def _stop_watcher(self):
+        if self._watcher:
+            self._watcher.stop()
+            self._watcher = None
+        self._active_window = (None, None)
+    
+    def _update_active_window(self):
+        # called by the ActiveWindowWatcher thread
+        contexts = self.contexts
+        if not contexts: return self._set_active_window(None)
+        try:
+            ID = self._lookup_active_ID(contexts[0].search)
+        except Exception as e:
+            warn(f"Active window lookup failed: {e!r}")
+            ID = None
+        return self._set_active_window(ID)
+    
+    def _lookup_active_ID(self, search):
+        return search.adaptor._ID_from_location("active")
+    
+    def _context_blocks(self, event_obj):
+        # called on the device thread for events blocked by some context.
+        # The cached active window can be outdated by up to context_ttl
+        # after a focus change, and a wrongly blocked or passed event can't
+        # be corrected later. So these rare events look it up again.
+        context = self._update_active_window()
+        return context is not None and event_obj in context.blocked
+    
+    def _set_active_window(self, ID):
+        if ID is None:
+            context = None
+        elif not self._contexts_use_title and ID in self._contexts_by_ID:
+            context = self._contexts_by_ID[ID]
+        else:
+            context = self._find_context(ID)
+            if not self._contexts_use_title:
+                if len(self._contexts_by_ID) >= 256:
+                    self._contexts_by_ID.clear()
+                self._contexts_by_ID[ID] = context
+        self._active_window = (ID, context)
+        return context
+    
+    def reload(self, new):
+        """Like PatternListener.reload. If new is a TriggerManager (which
+        was not started), its contexts and hotstrings are applied as well.
+        Hooks and their device grabs stay in place."""
+        counts = super().reload(new)
+        if isinstance(new, TriggerManager):
+            old_contexts = {self._context_key(c): c for c in self.contexts}
+            contexts = []
+            for new_context in new.contexts:
+                context = old_contexts.pop(self._context_key(new_context),
+                        None)
+                if context is None:
+                    context = ContextTable(new_context.search, self,
+                            new_context.buffer)
+                for key, n in context.reload(new_context).items():
+                    counts[key] += n
+                contexts.append(context)
+            for context in old_contexts.values():
+                counts["removed"] += len(context.eventdict)
+            self.contexts[:] = contexts
+            self._contexts_changed()
+            if new.hotstrings is not None or self.hotstrings is not None:
+                counts["hotstrings"] = self.hotstring_engine().reload(
+                        new.hotstrings)
+        for rhook in self.registered_hooks:
+            hook = rhook.hook_instance
+            if (rhook._reinject_table or rhook._context_blocked) and \
+                    hook.active and hook.reinject_func is None:
+                warn(f"Hotkeys can't be blocked by the running hook {hook}. "
+                     "Restart the TriggerManager for this.")
+        return counts
+    
+    @staticmethod
+    def _context_key(context):
+        return repr([(args, sorted(kwargs.items())) for args, kwargs in
+                search_args(context.search)])
+    
+    def _find_context(self, ID):
+        for context in self.contexts:
+            try:
+                if context.search.check_single(ID): return context
+            except Exception as e:
+                warn(f"Checking window {ID} for {context} failed: {e!r}")
+        return None
 
     @classmethod
     def start_all(cls):
@@ -284,6 +889,9 @@ class TriggerManager(PatternListener,TimedObject, HookAdaptor.AdaptiveClass,
             adaptor = self.adaptor
         return self.add_hook(adaptor.buttons(), **hook_kwargs)
     
+    def _blocked_hks_changed(self):
+        for rhook in self.registered_hooks: rhook._compile_reinject_table()
+    
     def hook_custom(self, backend=None,**hook_kwargs):
         if backend:
             adaptor = self.adaptor_class(custom=backend)
@@ -294,8 +902,11 @@ class TriggerManager(PatternListener,TimedObject, HookAdaptor.AdaptiveClass,
     def _start_action(self):
         self.was_started = True
         for rhook in self.registered_hooks: rhook.start()
+        if self.contexts: self._start_watcher()
+        for pool in self.process_pools: pool.warm(wait=False)
         
     def _stop_action(self):
+        self._stop_watcher()
         for rhook in self.registered_hooks:
             try:
                 rhook.stop()
@@ -309,15 +920,160 @@ class TriggerManager(PatternListener,TimedObject, HookAdaptor.AdaptiveClass,
 
 
 
-    @property
-    def max_thread_num(self):
-        return self._max_thread_num
+    @classmethod
+    def executor_stats(cls):
+        """Counters and queue wait / run time summaries (in ms) of the
+        executor shared by all TriggerManagers."""
+        return cls.executor.stats()
+
+
+def source_location(action):
+    if isinstance(action, ProcessAction): action = action.func
+    file = path.abspath(inspect.getsourcefile(action))
+    linenumber = inspect.getsourcelines(action)[-1]
+    return file, linenumber
+
+def action_name(action):
+    if isinstance(action, ProcessAction): action = action.func
+    try:
+        return f"{action.__module__}.{action.__qualname__}"
+    except AttributeError:
+        return repr(action)
+
+
+class ActionStats:
     
-    @max_thread_num.setter
-    def max_thread_num(self, val):
-        self._max_thread_num = val
-        for rhook in self.registered_hooks:
-            rhook.max_thread_num = val
+    def __init__(self, action):
+        self.name = action_name(action)
+        self.triggers = set()
+        self.count = 0
+        self.errors = 0
+        self.last_error = None
+        self.run_time = LatencyHistogram()
+        self.queue_wait = LatencyHistogram()
+    
+    def row(self):
+        return dict(action=self.name, triggers=sorted(self.triggers),
+            count=self.count, errors=self.errors,
+            total=self.run_time.total / 1e6, run_time=self.run_time.summary(),
+            queue_wait=self.queue_wait.summary())
+
+
+class ActionProfiler:
+    """Records count, run time, queue wait and exceptions of the actions
+    run by PatternListener.runscript. If budget (in ms) is set, a watchdog
+    timer warns (via slow_action_handler) about each action still running
+    after this time. The slow actions are remembered in slow, see
+    PatternListener.show_slow_action."""
+    
+    def __init__(self, budget=None):
+        self.budget = budget
+        self.actions = {}  # action -> ActionStats
+        self.slow = collections.deque(maxlen=20)  # (action, hk, budget)
+        self._lock = threading.Lock()
+        self._dump_timer = None
+    
+    def watch(self, action, hk):
+        if self.budget is None: return None
+        return timer_wheel.schedule(self.budget / 1000, self._too_slow, action,
+                hk, self.budget)
+    
+    def _too_slow(self, action, hk, budget):
+        self.slow.append((action, hk, budget))
+        self.slow_action_handler(action, hk, budget)
+    
+    @staticmethod
+    def slow_action_handler(action, hk, budget):
+        # replace this for e.g. a notification
+        try:
+            location = "%s:%s" % source_location(action)
+        except (TypeError, OSError):
+            location = "unknown source"
+        warn(f"Action {action_name(action)} ({location}) triggered by '{hk}' "
+             f"is running longer than {budget} ms.")
+    
+    def record(self, action, hk, t_submitted, t_start, t_end, error=None):
+        with self._lock:
+            stats = self.actions.get(action)
+            if stats is None: stats = self.actions[action] = ActionStats(action)
+            stats.triggers.add(str(hk))
+            stats.count += 1
+            stats.run_time.record(t_end - t_start)
+            if t_submitted is not None:
+                stats.queue_wait.record(t_start - t_submitted)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = error
+    
+    def table(self):
+        with self._lock:
+            rows = [stats.row() for stats in self.actions.values()]
+        rows.sort(key=lambda row: row["total"], reverse=True)
+        return rows
+    
+    def format(self):
+        lines = [f"{'action':40} {'count':>6} {'errors':>6} {'total':>9} "
+                 f"{'mean':>8} {'p95':>8} {'max':>8} {'queue p95':>9}"]
+        for row in self.table():
+            r, q = row["run_time"], row["queue_wait"]
+            lines.append(f"{row['action'][-40:]:40} {row['count']:6} "
+                f"{row['errors']:6} {row['total']:9.1f} {r['mean']:8.2f} "
+                f"{r['p95']:8.2f} {r['max']:8.2f} {q.get('p95', 0):9.2f}")
+        return "\n".join(lines)
+    
+    def dump(self, file=None):
+        print(self.format(), file=sys.stdout if file is None else file)
+    
+    def dump_periodically(self, interval, file=None):
+        if self._dump_timer: self._dump_timer.cancel()
+        self._dump_timer = None
+        if interval:
+            self._dump_timer = timer_wheel.schedule(interval,
+                    self._periodic_dump, interval, file)
+    
+    def _periodic_dump(self, interval, file):
+        self.dump(file)
+        self.dump_periodically(interval, file)
+    
+    def reset(self):
+        with self._lock: self.actions.clear()
+        self.slow.clear()
+
+
+class ProcessAction:
+    """An action which runs in a worker process of a ProcessPool instead of
+    a thread of this process, so CPU-heavy work does not slow down the hooks.
+    The function must be picklable, i.e. defined at module level. If it
+    accepts an argument, it gets the trigger event as plain str. The result
+    is returned (and exceptions are raised) in the executor thread."""
+    
+    def __init__(self, func, pool):
+        if not callable(func): raise TypeError(func)
+        self.func = func
+        self.pool = pool
+        try:
+            params = inspect.signature(func).parameters.values()
+        except (TypeError, ValueError):
+            self.pass_event = True
+        else:
+            self.pass_event = any(p.kind in (p.POSITIONAL_ONLY,
+                p.POSITIONAL_OR_KEYWORD, p.VAR_POSITIONAL) for p in params)
+    
+    def __repr__(self):
+        return f"<{self.__class__.__name__} {self.func!r} in {self.pool!r}>"
+    
+    # equal to the function, so e.g. set_action_limit(func, ...) applies
+    def __eq__(self, other):
+        if isinstance(other, ProcessAction): other = other.func
+        return self.func == other
+    
+    def __hash__(self):
+        return hash(self.func)
+    
+    def __call__(self, hk):
+        if self.pass_event: return self.pool.run(self.func, str(hk))
+        return self.pool.run(self.func)
+
 
 
 class PauseObject(TimedObject):
@@ -21,7 +21,7 @@ from . import HookAdaptor, CallbackHook, hotkeys, KeyboardAdaptor, \
 from Dhelpers.arghandling import check_type
 from Dhelpers.baseclasses import TimedObject
 from Dhelpers.launcher import launch
-import time
+import time, asyncio, functools
 from .. import NotificationAdaptor
 
 
@@ -55,6 +55,7 @@ class Waiter(TimedObject):
         self.event_timestamps=[]
         if self.eventmap: self.events_mapped = []
         self.notify = notify
+        self._future = None
     
     def _start_action(self):
         if self.notify:  self.ntfy("Waiter active", 0.5,
@@ -65,6 +66,34 @@ class Waiter(TimedObject):
     
     def _stop_action(self):
         self.callback_hook.stop()
+        future = self._future
+        if future is not None:
+            future.get_loop().call_soon_threadsafe(self._resolve_future, future)
+    
+    def _resolve_future(self, future):
+        if not future.done(): future.set_result(self.exitcode)
+    
+    async def start_async(self):
+        """Start the waiter from inside an asyncio event loop and return
+        after it has stopped, without blocking the loop in the meantime. If
+        the awaiting task is cancelled, the waiter is stopped with exitcode
+        'cancelled'."""
+        loop = asyncio.get_running_loop()
+        self._future = loop.create_future()
+        starting = loop.run_in_executor(None,
+                functools.partial(self.start, wait=False))
+        try:
+            await asyncio.shield(starting)
+            await asyncio.shield(self._future)
+        except asyncio.CancelledError:
+            # if cancelled while starting, the start must finish first,
+            # otherwise the hook would be started after stopping
+            await asyncio.wait((starting,))
+            if self.active: self.stop("cancelled")
+            raise
+        finally:
+            self._future = None
+        return self
 
     def called(self, event):
         if self.timestamps: self.event_timestamps.append(time.time())
@@ -200,15 +229,27 @@ class KeyWaiter(Waiter, HookAdaptor.AdaptiveClass):
             get1 = cls(maxlen=1, maxtime=maxtime, wait=True, press=press,
                 release = release, capture=capture, notify=notify, **options)
             get1.start()
-        if get1.exitcode == "maxlen":
-            key = get1.events[0]
+        return get1._get1key_result(press, options)
+    
+    @classmethod
+    async def get1key_async(cls, maxtime = 2, press=True, release=True,
+            capture=True, notify=True, **options):
+        with hotkeys.paused(3):
+            get1 = cls(maxlen=1, maxtime=maxtime, wait=False, press=press,
+                release = release, capture=capture, notify=notify, **options)
+            await get1.start_async()
+        return get1._get1key_result(press, options)
+    
+    def _get1key_result(self, press, options):
+        if self.exitcode == "maxlen":
+            key = self.events[0]
             if not press and not key.press and not options.get("write_rls",
                     False):
                 # if only release events are collected, and if write_rls was
                 # not explicitly set to True, remove the _rls tag by default
                 key = key.strip_rls()
-        elif get1.exitcode == "timeout":
-            key = cls.hook.NamedKeyClass.Event() #return empty event
+        elif self.exitcode == "timeout":
+            key = self.hook.NamedKeyClass.Event() #return empty event
         else:
             raise RuntimeError
         return key
@@ -254,4 +295,12 @@ class KeyWaiter(Waiter, HookAdaptor.AdaptiveClass):
                 release=True, write_rls=False, wait=True)
         inp.start()
         if inp.exitcode == "timeout": return False
+        return inp.duration()
+    
+    @classmethod
+    async def wait_for_key_async(cls, *keynames, timeout=20):
+        inp = cls(maxtime=timeout, endevents=keynames, press=False,
+                release=True, write_rls=False, wait=False)
+        await inp.start_async()
+        if inp.exitcode == "timeout": return False
         return inp.duration()
\ No newline at end of file
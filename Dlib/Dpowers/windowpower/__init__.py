@@ -18,7 +18,8 @@
 #
 
 from .. import Adaptor, adaptionmethod
-from .windowobjects import FoundWindows, WindowSearch, WindowObject
+from .windowobjects import FoundWindows, WindowSearch, WindowObject, \
+    WindowSearchContainer
 from collections import defaultdict
 import functools
 from contextlib import contextmanager
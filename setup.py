@@ -77,7 +77,8 @@ def setup_process(name, **kwargs):
 
 my_setup("Dpowers",
     version = Dpowers.__version__,
-    package_data = {"Dpowers.iconpower.icons" : ["*"]},
+    package_data = {"Dpowers.iconpower.icons" : ["*"],
+        "Dpowers.bench": ["baseline.json"]},
 
     install_requires=["Dhelpers==" + Dhelpers.__version__, ],
     
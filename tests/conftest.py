@@ -0,0 +1,37 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import os, sys
+
+# the packages Dpowers and Dhelpers are located in the Dlib directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(
+        os.path.abspath(__file__))), "Dlib"))
+
+import pytest
+
+
+@pytest.fixture
+def daemon_lanes(monkeypatch):
+    # the lane threads of the hooks run forever, so they must not keep the
+    # tests running
+    from Dpowers.events.hookpower import baseclasses
+    class EventQueueThread(baseclasses.EventQueueThread):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.daemon = True
+    monkeypatch.setattr(baseclasses, "EventQueueThread", EventQueueThread)
@@ -0,0 +1,31 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+from Dpowers import bench
+from Dpowers.bench import definitions  # registers the benchmarks
+
+
+def test_bundled_baseline_covers_the_benchmarks():
+    baseline = bench.load(bench.default_baseline)
+    assert set(baseline["results"]) | set(baseline["skipped"]) == \
+        set(bench.benchmarks)
+    results = dict(results={name: dict(ns_per_op=r["ns_per_op"] * 2) for
+        name, r in baseline["results"].items()})
+    regressions = bench.compare(results, baseline, threshold=0.5)
+    assert {r[0] for r in regressions} == set(baseline["results"])
+    assert bench.compare(results, baseline, threshold=1.5) == []
@@ -0,0 +1,91 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import pytest
+from Dpowers.events import NamedKey
+from Dpowers.events.matching import ChordTable
+from Dpowers.events.trigman import PatternListener
+
+
+def key(name, press=True):
+    inst = NamedKey.instance(name)
+    return inst.press_event if press else inst.release_event
+
+
+def feed(target, *steps):
+    # steps like "ShiftL", "a_rls"; returns the hotkeys matched
+    hits = []
+    for step in steps:
+        name, rls, _ = step.partition("_rls")
+        hk = target.event(key(name, not rls))
+        if hk is not None: hits.append(hk)
+    return hits
+
+
+def test_modifier_order_does_not_matter():
+    table = ChordTable()
+    table.add("ca", ("CtrlL", "Alt"), "a")
+    assert feed(table, "CtrlL", "Alt", "a") == ["ca"]
+    table.reset()
+    assert feed(table, "Alt", "CtrlL", "a") == ["ca"]
+
+
+def test_left_and_right_modifiers_are_equivalent():
+    table = ChordTable()
+    table.add("sa", ("ShiftL",), "a")
+    assert feed(table, "ShiftR", "a") == ["sa"]
+    table.reset()
+    table.set_equivalents()
+    assert feed(table, "ShiftR", "a") == []
+    table.reset()
+    assert feed(table, "ShiftL", "a") == ["sa"]
+
+
+def test_equivalent_definitions_are_rejected():
+    table = ChordTable()
+    table.add("sa", ("ShiftL",), "a")
+    with pytest.raises(ValueError):
+        table.add("sa2", ("ShiftR",), "a")
+    table.set_equivalents()
+    table.add("sa2", ("ShiftR",), "a")
+    with pytest.raises(ValueError):
+        table.set_equivalents(("ShiftL", "ShiftR"))
+    with pytest.raises(ValueError):
+        table.set_equivalents(("ShiftL", "a"))
+
+
+def test_release_uses_the_modifiers_of_the_press():
+    table = ChordTable()
+    table.add("sa_rls", ("ShiftL",), "a", press=False)
+    assert feed(table, "ShiftL", "a", "ShiftL_rls", "a_rls") == ["sa_rls"]
+    # the mask follows the modifiers which are still held
+    assert feed(table, "ShiftL", "ShiftR", "ShiftL_rls", "a",
+            "a_rls") == ["sa_rls"]
+
+
+def test_listener_chord_mode():
+    listener = PatternListener()
+    fired = []
+    listener.submit_action = lambda action, hk: fired.append(action)
+    listener.set_chord_equivalents(("CtrlL", "CtrlR"))
+    listener.add_hotkey("ctrl+a", "chord", block=False, chord=True)
+    feed(listener, "CtrlR", "b", "a", "a_rls", "CtrlR_rls", "a", "a_rls")
+    assert fired == ["chord"]
+    listener.set_chord_equivalents()
+    feed(listener, "CtrlR", "a", "a_rls", "CtrlR_rls")
+    assert fired == ["chord"]
@@ -0,0 +1,140 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading, time
+import pytest
+from Dpowers import Win
+from Dpowers.events import NamedKey, HookAdaptor
+from Dpowers.events.trigman import TriggerManager, ContextTable, \
+    RegisteredHook
+
+
+@pytest.fixture
+def tm():
+    tm = TriggerManager(timeout=None)
+    yield tm
+    tm._stop_watcher()
+
+
+def search(*args, **kwargs):
+    return Win._WinSearchClass(*args, **kwargs)
+
+
+def test_context_accepts_search_container(tm):
+    container = search("Editor") + search(wcls="xterm")
+    context = tm.context(container)
+    assert isinstance(context, ContextTable) and context.search is container
+    assert "Editor" in repr(context) and "xterm" in repr(context)
+    assert tm.context("Editor") is context
+    with pytest.raises(TypeError): tm.context(container, "Editor")
+    with pytest.raises(ValueError): tm.context(search(loc="active") +
+            search("Editor"))
+
+
+def test_events_only_read_the_cached_window(tm, monkeypatch):
+    context = tm.context("Editor")
+    other = tm.context("Terminal")
+    fired = []
+    context.add_hotkey("a", lambda *args: fired.append("editor"))
+    other.add_hotkey("a", lambda *args: fired.append("terminal"))
+    def lookup(*args): raise AssertionError("window lookup on event thread")
+    monkeypatch.setattr(tm, "_update_active_window", lookup)
+    monkeypatch.setattr(tm, "_find_context", lambda ID: {1: context,
+            2: other}.get(ID))
+    key = NamedKey.instance("a")
+    def type_a():
+        tm.event(key.press_event)
+        tm.event(key.release_event)
+    type_a()
+    assert tm.active_context() is None
+    tm.active_window_changed(1)
+    assert tm.active_context() is context
+    def wait_fired(n):
+        deadline = time.monotonic() + 5
+        while len(fired) < n and time.monotonic() < deadline:
+            time.sleep(0.01)
+    type_a()
+    wait_fired(1)
+    tm.active_window_changed(2)
+    time.sleep(0.2)
+    type_a()
+    wait_fired(2)
+    assert fired == ["editor", "terminal"]
+
+
+def test_watcher_thread(tm, monkeypatch):
+    monkeypatch.setattr(tm, "context_ttl", None)
+    calls = []
+    called = threading.Event()
+    def update():
+        calls.append(threading.current_thread().name)
+        called.set()
+    monkeypatch.setattr(tm, "_update_active_window", update)
+    tm._start_watcher()
+    assert called.wait(5)
+    called.clear()
+    tm.active_window_changed()
+    assert called.wait(5)
+    assert calls == ["ActiveWindowWatcher"] * 2
+    watcher = tm._watcher
+    tm._stop_watcher()
+    watcher.join(5)
+    assert not watcher.is_alive()
+
+
+def test_watcher_polls_the_active_window(tm, monkeypatch):
+    monkeypatch.setattr(tm, "context_ttl", 0.02)
+    context = tm.context("Editor")
+    active = [None]
+    monkeypatch.setattr(tm, "_lookup_active_ID", lambda search: active[0])
+    monkeypatch.setattr(tm, "_find_context", lambda ID: context if ID == 1
+            else None)
+    tm._start_watcher()
+    for ID, expected in ((1, context), (2, None), (1, context)):
+        active[0] = ID
+        # without any notification, the change is found by polling
+        deadline = time.monotonic() + 5
+        while tm.active_context() is not expected and \
+                time.monotonic() < deadline:
+            time.sleep(0.005)
+        assert tm._active_window == (ID, expected)
+        assert time.monotonic() < deadline
+
+
+def test_blocking_does_not_use_a_stale_window(tm, monkeypatch):
+    # the polling interval is long, but right after a focus change the
+    # blocked keys of the new context must already be blocked
+    monkeypatch.setattr(tm, "context_ttl", None)
+    rhook = RegisteredHook(tm.buffer, HookAdaptor("virtual").keys(), tm)
+    tm.registered_hooks.append(rhook)
+    context = tm.context("Editor")
+    context.add_hotkey("a", lambda *args: None)
+    active = [2]
+    monkeypatch.setattr(tm, "_lookup_active_ID", lambda search: active[0])
+    monkeypatch.setattr(tm, "_find_context", lambda ID: context if ID == 1
+            else None)
+    tm._update_active_window()
+    a, b = NamedKey.instance("a"), NamedKey.instance("b")
+    assert rhook.reinject_func(a.press_event)
+    active[0] = 1
+    assert tm.active_context() is None  # the cached window is outdated
+    assert not rhook.reinject_func(a.press_event)
+    assert tm.active_context() is context
+    assert rhook.reinject_func(b.press_event)
+    active[0] = 2
+    assert rhook.reinject_func(a.press_event)
@@ -0,0 +1,49 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+from Dpowers.events import NamedKey, NamedButton
+from Dpowers.events.hookpower import HookAdaptor
+
+
+def test_hook_events_are_interned():
+    create = HookAdaptor("virtual").keys().__class__._create_event_obj
+    key = NamedKey.instance("a")
+    press = create("a", press=True)
+    assert press is key.press_event and not press.multipress
+    # a repeated press is another shared event, the first one is unchanged
+    repeated = create("a", press=True)
+    assert repeated is key.multipress_event and repeated.multipress
+    assert repeated == "a" and not key.press_event.multipress
+    assert create("a", press=False) is key.release_event
+    assert create("a", press=True) is key.press_event
+    create("a", press=False)  # the other tests expect it released
+
+
+def test_click_coordinates_are_not_shared():
+    button = NamedButton.instance("left")
+    shared = button.press_event
+    assert shared.x is None and shared.y is None
+    assert button.get_event(True) is shared
+    click = button.get_event(True, x=10, y=20)
+    assert click == shared and click is not shared
+    assert (click.x, click.y) == (10, 20)
+    assert click.named_instance is button and click.press is True
+    assert shared.x is None and shared.y is None
+    moved = click.at(5, 6)
+    assert (moved.x, moved.y, click.x) == (5, 6, 10)
+    assert NamedButton.Event("left", x=1, y=2).x == 1
@@ -0,0 +1,157 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading, time, warnings
+import pytest
+from Dpowers.events.hookpower.baseclasses import EventRingBuffer, \
+    EventQueueReader, EventDispatcher, CallbackHook, KeyhookBase, \
+    ButtonhookBase, CursorhookBase
+
+
+def test_ring_buffer_keeps_order():
+    buf = EventRingBuffer(32)
+    for i in range(10): assert buf.put(i) is True
+    assert buf.depth() == 10
+    assert buf.drain() == list(range(10))
+    assert not buf.pending()
+    assert buf.lost() == 0
+
+
+def test_ring_buffer_rejects_newest_without_blocking():
+    buf = EventRingBuffer(16)
+    t0 = time.perf_counter()
+    accepted = [i for i in range(100) if buf.put(i, lossy=True)]
+    assert time.perf_counter() - t0 < 0.05
+    # the unread events are never overwritten, only new ones are rejected
+    assert accepted == list(range(len(accepted)))
+    assert len(accepted) == buf._limit
+    assert buf.drain() == accepted
+    assert buf.rejected == buf.take_lost() == 100 - len(accepted)
+    assert buf.take_lost() == 0
+    assert buf.put("next") and buf.drain() == ["next"]
+
+
+def test_ring_buffer_keeps_lossless_items():
+    # e.g. key events, a lost release would leave the key pressed
+    buf = EventRingBuffer(16)
+    for i in range(40): assert buf.put(i)
+    assert buf.depth() == 40
+    # while the overflow is in use, lossy items are rejected and lossless
+    # ones are queued behind it
+    assert not buf.put("move", lossy=True)
+    assert buf.put(40)
+    assert buf.drain() == list(range(41))
+    assert buf.take_lost() == 1
+    assert not buf.pending() and buf.depth() == 0
+    assert buf.put("move", lossy=True) and buf.drain() == ["move"]
+
+
+def test_ring_buffer_several_producers():
+    buf = EventRingBuffer(1 << 16)
+    def produce(k):
+        for i in range(2000): buf.put((k, i))
+    threads = [threading.Thread(target=produce, args=(k,)) for k in range(4)]
+    for t in threads: t.start()
+    received = []
+    while any(t.is_alive() for t in threads) or buf.pending():
+        buf.wait(0.01)
+        received += buf.drain()
+    for t in threads: t.join()
+    received += buf.drain()
+    assert buf.lost() == 0
+    for k in range(4):
+        # the order of each producer is kept
+        assert [i for j, i in received if j == k] == list(range(2000))
+
+
+@pytest.mark.parametrize("policy", EventQueueReader.overflow_policies)
+def test_reader_policies(policy):
+    reader = EventQueueReader(16, overflow_policy=policy)
+    assert reader.coalesce is (policy == "coalesce")
+    with pytest.raises(ValueError): reader.set_overflow_policy("block")
+
+
+class Handler:
+    def __init__(self):
+        self.events = []
+        self.done = threading.Event()
+    
+    def run_callbacks(self, event, t_queued):
+        if event == "wait": self.done.wait(5)
+        self.events.append(event)
+
+
+def test_reader_warns_about_lost_events():
+    reader = EventQueueReader(16, name="test")
+    handler = Handler()
+    queue = reader.event_queue
+    queue.put((handler, "wait", 0))
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        # not reader.start(), its thread would keep the tests running
+        threading.Thread(target=reader.run_callbacks, daemon=True).start()
+        while queue.pending(): time.sleep(0.001)
+        # the callback thread is stuck now, so the buffer fills up
+        for i in range(30): queue.put((handler, i, 0), lossy=True)
+        handler.done.set()
+        while queue.pending() or len(handler.events) < 1 + queue._limit:
+            time.sleep(0.001)
+        queue.put((handler, "last", 0))
+        while handler.events[-1] != "last": time.sleep(0.001)
+    assert handler.events == ["wait", *range(queue._limit), "last"]
+    assert reader.dropped_events == 30 - queue._limit
+    assert [str(w.message) for w in caught] == [
+        f"{reader!r}: {30 - queue._limit} mouse moves were dropped because "
+        f"the callbacks could not keep up."]
+
+
+def test_dispatcher_shares_one_lane_by_default():
+    assert CallbackHook.dispatcher.sharded is False
+    dispatcher = EventDispatcher()
+    lane = dispatcher.lane(KeyhookBase)
+    assert dispatcher.lane(ButtonhookBase) is lane
+    assert dispatcher.lane(CursorhookBase) is lane
+    assert lane.overflow_policy == "coalesce"
+    sharded = EventDispatcher(sharded=True)
+    assert sharded.lane(KeyhookBase) is not sharded.lane(ButtonhookBase)
+    assert sharded.lane(KeyhookBase).overflow_policy == "drop_newest"
+    assert sharded.lane(CursorhookBase).overflow_policy == "coalesce"
+
+
+def test_class_policy_is_rejected_for_shared_lane():
+    assert not KeyhookBase.dispatcher.sharded
+    with pytest.raises(RuntimeError):
+        KeyhookBase.set_overflow_policy("coalesce")
+    assert KeyhookBase.overflow_policy == "drop_newest"
+
+
+def test_shared_lane_keeps_order_across_hooks():
+    # e.g. the key and button hooks of one TriggerManager
+    lane = EventDispatcher().lane(KeyhookBase)
+    keys, buttons = Handler(), Handler()
+    received = []
+    keys.run_callbacks = buttons.run_callbacks = \
+        lambda event, t_queued: received.append(event)
+    threading.Thread(target=lane.run_callbacks, daemon=True).start()
+    expected = []
+    for i in range(200):
+        handler = keys if i % 3 else buttons
+        lane.event_queue.put((handler, i, 0))
+        expected.append(i)
+    while len(received) < len(expected): time.sleep(0.001)
+    assert received == expected
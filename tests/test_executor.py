@@ -0,0 +1,166 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import os, threading, time
+import pytest
+from Dhelpers.executor import ProcessPool, BoundedExecutor, ConcurrencyLimit
+from Dpowers.events.trigman import TriggerManager, ProcessAction
+
+
+@pytest.fixture
+def pool():
+    pool = ProcessPool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_process_pool_does_not_fork(pool):
+    assert pool._pool is None
+    assert pool.context().get_start_method() in ("forkserver", "spawn")
+    assert ProcessPool(mp_context="spawn").context().get_start_method() == \
+        "spawn"
+    assert pool.warm() is pool and pool._pool is not None
+    assert pool.run(os.getpid) != os.getpid()
+    with pytest.raises(ValueError): pool.run(int, "x")
+
+
+def test_process_action(pool):
+    # str.upper takes an argument, so it gets the trigger event
+    action = ProcessAction(str.upper, pool)
+    assert action.pass_event and action("a") == "A"
+    action = ProcessAction(os.getpid, pool)
+    assert not action.pass_event and action("a") != os.getpid()
+    assert action == os.getpid and hash(action) == hash(os.getpid)
+    with pytest.raises(TypeError): ProcessAction(None, pool)
+
+
+def test_pool_is_warmed_by_start(pool):
+    tm = TriggerManager(timeout=None)
+    tm.hotkey("a", process=pool)(os.getpid)
+    # decorating happens while importing, the processes are only started
+    # with the TriggerManager
+    assert pool._pool is None and tm.process_pools == {pool}
+    action = tm.eventdict[next(iter(tm.eventdict))]
+    assert isinstance(action, ProcessAction) and action.pool is pool
+    tm.start()
+    try:
+        assert pool._pool is not None
+    finally:
+        tm.stop()
+    with pytest.raises(TypeError): tm.hotkey("b", process=1)(os.getpid)
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(max_workers=4, max_queue=4, idle_timeout=0.2,
+            name="test")
+    yield executor
+    executor.shutdown(cancel_queued=True)
+
+
+def blocked_task(executor, gate, limits=(), key=None, result=None):
+    return executor.submit(lambda: gate.wait(5) and result, limits=limits,
+            key=key)
+
+
+def test_reject_policy(executor):
+    limit = ConcurrencyLimit(1, "reject")
+    gate = threading.Event()
+    first = blocked_task(executor, gate, (limit,), result=1)
+    assert first is not None and limit.full
+    assert blocked_task(executor, gate, (limit,)) is None
+    assert executor.counts["rejected"] == 1
+    gate.set()
+    assert first.result(5) == 1
+    assert limit.active == 0
+
+
+def test_queue_policy(executor):
+    limit = ConcurrencyLimit(1, "queue")
+    gate = threading.Event()
+    order = []
+    tasks = [executor.submit(lambda i=i: gate.wait(5) and order.append(i),
+            limits=(limit,)) for i in range(3)]
+    while not tasks[0].started: time.sleep(0.001)
+    assert executor.queue_depth() == 2 and limit.active == 1
+    gate.set()
+    for task in tasks: task.result(5)
+    # one after the other, in the order of submission
+    assert order == [0, 1, 2] and limit.active == 0
+    assert executor.counts["completed"] == 3
+
+
+def test_replace_pending_policy(executor):
+    limit = ConcurrencyLimit(1, "replace_pending")
+    gate = threading.Event()
+    running = blocked_task(executor, gate, (limit,), key="k", result="run")
+    while not running.started: time.sleep(0.001)
+    pending = blocked_task(executor, gate, (limit,), key="k", result="old")
+    newest = blocked_task(executor, gate, (limit,), key="k", result="new")
+    assert pending.cancelled and pending.done() and pending.result() is None
+    assert executor.counts["replaced"] == 1
+    gate.set()
+    assert running.result(5) == "run" and newest.result(5) == "new"
+
+
+def test_limits_are_acquired_together(executor):
+    a = ConcurrencyLimit(1, "queue")
+    b = ConcurrencyLimit(2, "queue")
+    gate = threading.Event()
+    first = blocked_task(executor, gate, (a, b))
+    second = blocked_task(executor, gate, (b,))
+    assert (a.active, b.active) == (1, 2)
+    # first holds a until it ends
+    third = blocked_task(executor, gate, (a,))
+    assert not third.acquired
+    gate.set()
+    for task in (first, second, third): task.result(5)
+    assert (a.active, b.active) == (0, 0)
+
+
+def test_full_queue_rejects(executor):
+    limit = ConcurrencyLimit(1, "queue")
+    gate = threading.Event()
+    tasks = [blocked_task(executor, gate, (limit,))]
+    while not tasks[0].started: time.sleep(0.001)
+    tasks += [blocked_task(executor, gate, (limit,)) for _ in range(4)]
+    assert None not in tasks and executor.queue_depth() == 4
+    assert blocked_task(executor, gate, (limit,)) is None
+    gate.set()
+    for task in tasks: task.result(5)
+
+
+def test_workers_are_daemons_and_end(executor):
+    gate = threading.Event()
+    task = blocked_task(executor, gate)
+    threads = list(executor._threads)
+    assert threads and all(t.daemon for t in threads)
+    gate.set()
+    task.result(5)
+    executor.shutdown()
+    assert not any(t.is_alive() for t in threads)
+    assert executor._workers == 0
+    with pytest.raises(RuntimeError): executor.submit(print)
+
+
+def test_idle_workers_end(executor):
+    executor.submit(int).result(5)
+    deadline = time.monotonic() + 5
+    while executor._workers and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert executor._workers == 0 and not executor._threads
@@ -0,0 +1,72 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import gc
+import weakref
+import pytest
+from Dhelpers.baseclasses import KeepInstanceRefs
+from Dhelpers.named import NamedObj
+
+
+def test_dead_refs_are_removed():
+    class Obj(KeepInstanceRefs): pass
+    objs = [Obj() for _ in range(10)]
+    assert Obj.instance_num() == Obj.instance_ref_num() == 10
+    del objs[:5]
+    assert Obj.instance_num() == Obj.instance_ref_num() == 5
+    assert set(Obj.get_instances()) == set(objs)
+
+
+def test_temporary_classes_are_freed():
+    class Obj(KeepInstanceRefs): pass
+    objs = [Obj() for _ in range(3)]
+    cls_ref = weakref.ref(Obj)
+    assert cls_ref() in KeepInstanceRefs.__instance_ref_dict__
+    del Obj, objs
+    gc.collect()
+    assert cls_ref() is None
+
+
+def test_temporary_named_classes_are_freed():
+    class Temp(NamedObj): pass
+    for i in range(20): Temp(f"name{i}", f"alias{i}")
+    cls_ref = weakref.ref(Temp)
+    del Temp
+    gc.collect()
+    assert cls_ref() is None
+
+
+def test_unregister_removes_only_own_names():
+    class Temp(NamedObj): pass
+    one = Temp("one", "uno")
+    two = Temp("two")
+    one.add_to_group("g")
+    two.add_to_group("g")
+    version = NamedObj.names_version
+    one.__del__()
+    assert NamedObj.names_version > version
+    assert Temp.registry_stats()["names"] == 1
+    assert Temp.instance("TWO") is two
+    assert Temp.get_stnd_name("two") == "two"
+    for name in ("one", "uno"):
+        with pytest.raises(KeyError): Temp.instance(name)
+    assert Temp.defined_groups["g"] == [two]
+    # freeing the class later would change the names version during other
+    # tests
+    del Temp, one, two
+    gc.collect()
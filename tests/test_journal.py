@@ -0,0 +1,157 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading, time, os
+import pytest
+from Dpowers.events import HookAdaptor
+from Dpowers.events.hookpower import adapt_virtual, baseclasses
+from Dpowers.events.journal import JournalRecorder, JournalReader, \
+    JournalReplayer, KIND_KEY, KIND_BUTTON, KIND_MOVE_ABS, record_struct, \
+    names_path
+
+
+class EventQueueThread(baseclasses.EventQueueThread):
+    # the lanes run forever, so they must not keep the tests running
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.daemon = True
+
+
+@pytest.fixture
+def recorder(tmp_path, monkeypatch):
+    monkeypatch.setattr(baseclasses, "EventQueueThread", EventQueueThread)
+    monkeypatch.setattr(JournalRecorder, "hook", HookAdaptor("virtual"))
+    recorder = JournalRecorder(tmp_path / "journal", cursor=True)
+    yield recorder
+    if recorder.active: recorder.stop()
+
+
+def emit(hook_cls, calls):
+    for args, kwargs in calls: hook_cls.handler.emit(*args, **kwargs)
+
+
+def wait_for(recorder, num):
+    deadline = time.monotonic() + 5
+    while recorder.num < num and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert recorder.num == num
+
+
+def test_round_trip(recorder):
+    recorder.start()
+    emit(adapt_virtual.Keyhook, adapt_virtual.key_taps("a", "b", "a"))
+    emit(adapt_virtual.Buttonhook, adapt_virtual.button_clicks("left"))
+    emit(adapt_virtual.Cursorhook, [((3, -4), dict(relative=True))])
+    wait_for(recorder, 9)
+    recorder.stop()
+    with JournalReader(recorder.path) as journal:
+        records = list(journal)
+        assert len(journal) == 9
+        assert [journal.name(r) for r in records[:8]] == ["a", "a", "b",
+            "b", "a", "a", "mouse_left", "mouse_left"]
+        assert [r.state for r in records] == [1, 0] * 4 + [-1]
+        assert [r.kind for r in records] == [KIND_KEY] * 6 + \
+            [KIND_BUTTON] * 2 + [KIND_MOVE_ABS]
+        # the virtual cursor reports the new absolute position
+        assert records[-1][1:3] == adapt_virtual.Cursorhook.handler.position
+        assert [r.t_ns for r in records] == sorted(r.t_ns for r in records)
+        assert abs(records[0].t_ns - time.time_ns()) < 5e9
+    # recording again appends and keeps the name codes
+    recorder2 = JournalRecorder(recorder.path, cursor=True)
+    recorder2.start()
+    emit(adapt_virtual.Keyhook, adapt_virtual.key_taps("b"))
+    wait_for(recorder2, 2)
+    recorder2.stop()
+    with JournalReader(recorder.path) as journal:
+        assert len(journal) == 11 and journal.names == ["a", "b", "mouse_left"]
+        assert journal.name(journal[-1]) == "b"
+
+
+def test_records_the_queueing_time(recorder):
+    # while the callbacks are delayed, the recorded times must still show
+    # when the events actually happened
+    release = threading.Event()
+    blocker = adapt_virtual.Keyhook(lambda event: release.wait(5), None,
+            priority=-1).start()
+    try:
+        recorder.start()
+        for args, kwargs in adapt_virtual.key_taps("a", "b"):
+            adapt_virtual.Keyhook.handler.emit(*args, **kwargs)
+            time.sleep(0.05)
+        release.set()
+        wait_for(recorder, 4)
+    finally:
+        blocker.stop()
+    recorder.stop()
+    with JournalReader(recorder.path) as journal:
+        times = [r.t_ns for r in journal]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert all(gap > 40e6 for gap in gaps), gaps
+
+
+def write_journal(path, names, records):
+    with open(path, "wb") as f:
+        for record in records: f.write(record_struct.pack(*record))
+    with open(names_path(path), "w", encoding="utf-8") as f:
+        for name in names: f.write(name + "\n")
+
+
+def test_slices_are_lazy(tmp_path):
+    path = tmp_path / "journal"
+    write_journal(path, ["a"], [(i, 0, 0, KIND_KEY, i % 2) for i in range(10)])
+    with JournalReader(path) as journal:
+        part = journal[2:5]
+        assert not isinstance(part, list)
+        assert [r.t_ns for r in part] == [2, 3, 4]
+        assert [r.t_ns for r in journal[1:8:3]] == [1, 4, 7]
+        assert list(journal[5:2]) == []
+
+
+def test_missing_name_table(tmp_path):
+    path = tmp_path / "journal"
+    write_journal(path, ["a"], [(0, 0, 0, KIND_KEY, 1)])
+    os.remove(names_path(path))
+    with pytest.raises(FileNotFoundError, match="name table"):
+        JournalReader(path)
+    # appending must not start the codes from 0 again
+    with pytest.raises(FileNotFoundError, match="name table"):
+        JournalRecorder(path)
+
+
+class Sender:
+    def __init__(self):
+        self.sent = []
+    
+    def __getattr__(self, method):
+        return lambda *args, **kwargs: self.sent.append((method, *args))
+
+
+def test_replay_of_events_without_press_state(tmp_path, monkeypatch):
+    path = tmp_path / "journal"
+    write_journal(path, ["scroll_up", "a", "mouse_left"], [
+        (0, 0, 0, KIND_BUTTON, -1), (1, 1, 0, KIND_KEY, -1),
+        (2, 2, 0, KIND_BUTTON, 1), (3, 2, 0, KIND_BUTTON, 0)])
+    keyb, mouse = Sender(), Sender()
+    monkeypatch.setattr(JournalReplayer, "keyb", keyb)
+    monkeypatch.setattr(JournalReplayer, "mouse", mouse)
+    with JournalReader(path) as journal:
+        replayer = JournalReplayer(journal, pause_hotkeys=False)
+        for record in journal: replayer.send(record)
+    assert mouse.sent == [("scroll", 1, 0), ("press", "mouse_left"),
+        ("rls", "mouse_left")]
+    assert keyb.sent == [("press", "a"), ("rls", "a")]
@@ -0,0 +1,72 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import random
+import threading
+from Dhelpers.measuring import LatencyHistogram
+from Dpowers.events import HookAdaptor
+from Dpowers.events.hookpower import adapt_virtual
+
+
+def test_histogram_percentiles_are_close():
+    rnd = random.Random(0)
+    values = sorted(rnd.randrange(1, 10**8) for _ in range(5000))
+    hist = LatencyHistogram()
+    for v in values: hist.record(v)
+    assert hist.count == 5000 and hist.max == values[-1]
+    assert hist.total == sum(values)
+    for p in (50, 95, 99):
+        exact = values[int(p / 100 * len(values)) - 1]
+        assert abs(hist.percentile(p) - exact) <= 0.1 * exact
+    assert hist.percentile(100) <= values[-1]
+    hist.reset()
+    assert hist.summary() == dict(count=0) and hist.percentile(50) is None
+
+
+def test_small_and_negative_values():
+    hist = LatencyHistogram()
+    for v in (-5, 0, 1, 7): hist.record(v)
+    assert hist.percentile(50) == 0 and hist.max == 7
+
+
+def test_hook_stats(daemon_lanes):
+    hook_cls = HookAdaptor("virtual").keys().__class__
+    first, done = threading.Event(), threading.Event()
+    events = []
+    def callback(event):
+        events.append(event)
+        if len(events) == 2: first.set()
+        if len(events) == 6: done.set()
+    hook = HookAdaptor("virtual").keys(callback, None).start()
+    try:
+        for args, kwargs in adapt_virtual.key_taps("a"):
+            adapt_virtual.Keyhook.handler.emit(*args, **kwargs)
+        assert first.wait(5)
+        hook_cls.record_latencies()
+        for args, kwargs in adapt_virtual.key_taps("b", "c"):
+            adapt_virtual.Keyhook.handler.emit(*args, **kwargs)
+        assert done.wait(5)
+    finally:
+        hook_cls.record_latencies(False)
+        hook.stop()
+    stats = hook.stats()
+    assert set(stats) == {"queue", "dispatch", "callback", "total"}
+    # only the events after switching the recording on are counted
+    assert all(s["count"] == 4 for s in stats.values())
+    total = stats["total"]
+    assert 0 <= total["p50"] <= total["p99"] <= total["max"]
@@ -0,0 +1,110 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import random
+import pytest
+from Dpowers.events import NamedKey
+from Dpowers.events.matching import PatternAutomaton
+from Dpowers.events.trigman import PatternListener
+
+
+def naive_matches(patterns, history, max_len):
+    # what the PatternListener did before the automaton: compare the
+    # members of each pattern with the end of the recent events
+    return [key for key, members in patterns.items() if len(members) <=
+        min(len(history), max_len) and tuple(history[-len(members):]) ==
+        members]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_automaton_equals_suffix_comparison(seed):
+    rnd = random.Random(seed)
+    max_len = rnd.choice((3, 4, 6))
+    automaton = PatternAutomaton(max_len)
+    patterns = {}
+    history = []
+    state = 0
+    compiled = automaton.compiled
+    for step in range(2000):
+        if rnd.random() < 0.05:
+            members = tuple(rnd.choice("abc") for _ in range(
+                    rnd.randrange(1, max_len + 2)))
+            key = "".join(members) + str(step)
+            automaton.add(key, members)
+            patterns[key] = members
+        elif patterns and rnd.random() < 0.03:
+            key = rnd.choice(list(patterns))
+            automaton.remove(key)
+            del patterns[key]
+        elif rnd.random() < 0.005:
+            max_len = rnd.choice((3, 4, 6))
+            automaton.set_max_len(max_len)
+        member = rnd.choice("abcd")
+        history.append(member)
+        if automaton.compiled is not compiled:
+            compiled = automaton.compiled
+            state = compiled.run(history[-max_len:])
+        else:
+            state = compiled.step(state, member)
+        assert list(compiled.matches(state)) == naive_matches(patterns,
+                history, max_len)
+
+
+def test_snapshot_is_not_changed():
+    automaton = PatternAutomaton()
+    automaton.add("ab", "ab")
+    compiled = automaton.compiled
+    automaton.add("b", "b")
+    automaton.remove("ab")
+    state = compiled.run("ab")
+    assert compiled.matches(state) == ("ab",)
+    assert automaton.compiled.matches(automaton.compiled.run("ab")) == ("b",)
+
+
+def test_duplicates_and_empty_patterns():
+    automaton = PatternAutomaton()
+    automaton.add("x", "ab")
+    with pytest.raises(ValueError): automaton.add("x", "b")
+    with pytest.raises(ValueError): automaton.add("y", "")
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_listener_equals_baseline_loop(seed):
+    rnd = random.Random(seed)
+    listener = PatternListener()
+    fired = []
+    listener.submit_action = lambda action, hk: fired.append(action)
+    sequences = {" ".join(rnd.choice("abc") for _ in range(rnd.randrange(1,
+            4))) for _ in range(6)}
+    for string in sequences: listener.add_sequence(string, string)
+    patterns = {action: tuple(event.members) for event, action in
+        listener.eventdict.items()}
+    recent = []
+    total = 0
+    for _ in range(500):
+        event = NamedKey.instance(rnd.choice("abc")).press_event
+        # the baseline implementation: every pattern which is a suffix of
+        # the recent events fires, then the recent events are cleared
+        recent = (recent + [event])[-listener.buffer:]
+        hits = naive_matches(patterns, recent, listener.buffer)
+        if hits: recent = []
+        del fired[:]
+        listener.event(event)
+        assert sorted(fired) == sorted(hits)
+        total += len(hits)
+    assert total
@@ -0,0 +1,72 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+from Dpowers.events import NamedKey, NamedButton
+
+
+def all_names(NamedClass):
+    return [name for inst in NamedClass.get_instances() for name in
+        inst.names]
+
+def events(NamedClass):
+    Event = NamedClass.Event
+    for inst in NamedClass.get_instances():
+        yield inst.press_event
+        for name in inst.names:
+            # names which do not lead back to inst, like shadowed aliases
+            event = Event(name)
+            if event.named_instance is not inst: yield event
+    yield next(NamedClass.get_instances()).release_event
+    yield from (Event("unknown_name"), Event("[7]"), Event("7"))
+
+def keys(NamedClass):
+    names = all_names(NamedClass)
+    yield from names
+    yield from (n.upper() for n in names)
+    yield from ("unknown_name", "Unknown_Name", 7, "[7]")
+
+
+def check(NamedClass, table, events):
+    index = NamedClass.Event.index(table)
+    for e in events:
+        assert e.isin(table) == e.isin(index), (table, e)
+        assert e.get_from(table) == e.get_from(index), (table, e)
+
+def test_name_index_single_keys():
+    for NamedClass in (NamedKey, NamedButton):
+        evs = list(events(NamedClass))
+        for key in keys(NamedClass): check(NamedClass, {key: 1}, evs)
+
+def test_name_index_first_key_wins():
+    for NamedClass in (NamedKey, NamedButton):
+        names = all_names(NamedClass)
+        table = {key: i for i, key in enumerate(keys(NamedClass))}
+        check(NamedClass, table, events(NamedClass))
+        table = {key: i for i, key in enumerate(reversed(names))}
+        check(NamedClass, table, events(NamedClass))
+
+def test_alias_index_round_trips():
+    for NamedClass in (NamedKey, NamedButton):
+        for name, inst in NamedClass.alias_index().items():
+            assert NamedClass.instance(name) is inst
+        for name in all_names(NamedClass):
+            try:
+                expected = NamedClass.instance(name)
+            except KeyError:
+                expected = name
+            assert NamedClass.canonical(name) is expected
@@ -0,0 +1,137 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import importlib, os, sys, glob, marshal
+import pytest
+from Dhelpers.named import NameContainer
+
+module_source = '''
+from Dhelpers.named import NamedObj
+
+class Named(NamedObj):
+    pass
+
+@Named.update_names
+class Names:
+    class letters:
+        a = "a", "alpha"
+        b = "b", "beta", 2
+    class capitals:
+        agrave = "agrave", "à"
+        Agrave = "Agrave", "À"
+    enter = "Enter", "Return", "ret"
+    {extra}
+'''
+
+
+def registry(Named):
+    return dict(
+        defined={k: v.names for k, v in Named.defined_objects.items()},
+        stnd=dict(Named.name_to_stnd_name),
+        groups={g: [m.names for m in ms] for g, ms in
+            Named.defined_groups.items()},
+        capital=sorted(Named.names_with_important_capital_letters),
+        attributes={a: v.names for a, v in vars(Named.NameContainer).items()
+            if isinstance(v, Named)},
+        instances=[i.names for i in Named.get_instances()])
+
+
+@pytest.fixture
+def load(tmp_path, monkeypatch):
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    monkeypatch.setattr(NameContainer, "table_dir", tmp_path / "tables")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    def load(extra=""):
+        (tmp_path / "tablenames.py").write_text(
+                module_source.format(extra=extra))
+        sys.modules.pop("tablenames", None)
+        importlib.invalidate_caches()
+        return importlib.import_module("tablenames").Named
+    yield load
+    sys.modules.pop("tablenames", None)
+
+def tables(tmp_path):
+    return glob.glob(str(tmp_path / "tables" / "*.names"))
+
+
+def test_table_gives_same_registry(load, tmp_path):
+    built = registry(load())
+    assert len(tables(tmp_path)) == 1
+    assert registry(load()) == built
+
+def test_table_is_actually_used(load, tmp_path, monkeypatch):
+    load()
+    def fail(*args, **kwargs): raise AssertionError("table not used")
+    monkeypatch.setattr(NameContainer, "_iter_class", fail)
+    load()
+
+def test_changed_source_invalidates_table(load, tmp_path):
+    load()
+    Named = load(extra='escape = "Escape", "esc"')
+    assert Named.instance("esc").name == "Escape"
+
+def test_damaged_table_falls_back(load, tmp_path):
+    built = registry(load())
+    path, = tables(tmp_path)
+    with open(path, "rb") as f: table_format, source_hash, table = \
+        marshal.load(f)
+    table["groups"]["letters"].append(1000)
+    with open(path, "wb") as f:
+        marshal.dump((table_format, source_hash, table), f)
+    assert registry(load()) == built
+    with open(path, "wb") as f: f.write(b"garbage")
+    assert registry(load()) == built
+
+def test_no_temporary_files_left(load, tmp_path):
+    load()
+    assert not glob.glob(str(tmp_path / "tables" / "*.tmp"))
+
+def test_table_is_not_written_into_the_package(load, tmp_path):
+    load()
+    assert len(tables(tmp_path)) == 1
+    assert not (tmp_path / "__pycache__").exists() or not glob.glob(
+            str(tmp_path / "__pycache__" / "*.names"))
+
+def test_unwritable_table_dir(load, tmp_path, monkeypatch):
+    blocked = tmp_path / "blocked"
+    blocked.write_text("a file, not a directory")
+    monkeypatch.setattr(NameContainer, "table_dir", blocked / "tables")
+    monkeypatch.setattr(NameContainer, "_unwritable", set())
+    built = registry(load())
+    assert NameContainer._unwritable == {str(blocked / "tables")}
+    calls = []
+    monkeypatch.setattr(os, "makedirs", lambda *args, **kwargs:
+            calls.append(args))
+    # the next import does not try to write it again
+    assert registry(load()) == built
+    assert calls == []
+
+def test_table_with_int_names(load, tmp_path, monkeypatch):
+    built = registry(load())
+    path, = tables(tmp_path)
+    with open(path, "rb") as f: table_format, source_hash, table = \
+        marshal.load(f)
+    # _iter_class accepts int names, e.g. b = "b", "beta", 2
+    table["instances"] = [([int(n) if n.isdecimal() else n for n in names],
+        keys, groups) for names, keys, groups in table["instances"]]
+    assert any(2 in names for names, keys, groups in table["instances"])
+    with open(path, "wb") as f:
+        marshal.dump((table_format, source_hash, table), f)
+    def fail(*args, **kwargs): raise AssertionError("table not used")
+    monkeypatch.setattr(NameContainer, "_iter_class", fail)
+    assert registry(load()) == built
@@ -0,0 +1,79 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import random
+import pytest
+from Dpowers.events import NamedKey, NamedButton
+
+
+def all_names(NamedClass):
+    return [name for inst in NamedClass.get_instances() for name in
+        inst.names]
+
+def probes(NamedClass):
+    names = all_names(NamedClass)
+    yield from names
+    yield from (str(n).upper() for n in names)
+    yield from (str(n).lower() for n in names)
+    yield from NamedClass.get_instances()
+    for inst in NamedClass.get_instances():
+        yield inst.press_event
+        yield inst.release_event
+    yield from ("not_a_name", "Other_Key", "other_key", 7, "7", "[7]")
+
+def stand_dicts(NamedClass):
+    names = all_names(NamedClass)
+    for seed in range(3):
+        rand = random.Random(seed)
+        d = NamedClass.StandardizingDict({n: i for i, n in
+            enumerate(rand.sample(names, len(names) // 3))})
+        d["Other_Key"] = "other"
+        d[7] = "seven"
+        yield d
+    yield NamedClass.StandardizingDict({n: n for n in names})
+    yield NamedClass.StandardizingDict({"x": 1}, others_comparable=False)
+
+
+def result(func, k):
+    try:
+        return "ok", func(k)
+    except Exception as e:
+        return "error", type(e)
+
+
+@pytest.mark.parametrize("NamedClass", [NamedKey, NamedButton])
+def test_frozen_standardizing_dict_equals_original(NamedClass):
+    for d in stand_dicts(NamedClass):
+        frozen = d.freeze()
+        for k in probes(NamedClass):
+            assert result(d.__getitem__, k) == result(frozen.__getitem__, k)
+            assert result(d.apply, k) == result(frozen.apply, k), k
+            assert (k in d) == (k in frozen)
+
+def test_frozen_renewed_after_changes():
+    d = NamedKey.StandardizingDict({"Enter": 1})
+    frozen = d.frozen()
+    assert d.frozen() is frozen
+    d["Escape"] = 2
+    assert d.frozen() is not frozen
+    assert d.frozen()["esc"] == 2
+    assert frozen.get("esc") is None
+
+def test_frozen_keeps_shadowed_aliases():
+    d = NamedKey.StandardizingDict({"Ooblique": 1})
+    assert d.get("Oslash") == d.freeze().get("Oslash") == 1
@@ -0,0 +1,61 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import gc, weakref
+import pytest
+from Dpowers.events import NamedKey, NamedButton
+from Dpowers.events.event_classes import StringAnalyzer, EventSequence, \
+    EventCombination, _parse_split
+
+
+def test_events_are_not_shared():
+    Event = NamedKey.Event
+    first = Event.create_from_str("a")
+    second = Event.create_from_str("a")
+    assert first == second and first is not second
+    first.multipress = True
+    assert second.multipress is False
+    assert Event.create_from_str("a").multipress is False
+    sequence = Event.create_from_str("ctrl+a b_rls")
+    assert isinstance(sequence, EventSequence)
+    combination, rls = sequence.members
+    assert isinstance(combination, EventCombination) and rls.press is False
+    assert Event.create_from_str("ctrl+a b_rls").members[0] is not combination
+
+
+def test_cache_does_not_keep_analyzers():
+    analyzer = StringAnalyzer(NamedKey, NamedButton)
+    ref = weakref.ref(analyzer)
+    assert analyzer.create_from_str("mouse_left").NamedClass is NamedButton
+    # another analyzer with the same classes uses the same entries
+    hits = _parse_split.cache_info().hits
+    other = StringAnalyzer(NamedKey, NamedButton)
+    assert other.create_from_str("mouse_left") == "mouse_left"
+    assert _parse_split.cache_info().hits == hits + 1
+    del analyzer
+    gc.collect()
+    assert ref() is None
+
+
+def test_analyzer_options():
+    analyzer = StringAnalyzer(NamedKey, NamedButton)
+    assert str(analyzer.create_from_str("a", hotkey=True)) == "a a_rls"
+    with pytest.raises(NameError):
+        analyzer.create_from_str("no_such_key", only_defined_names=True)
+    event = analyzer.create_from_str("no_such_key")
+    assert event.NamedClass is NamedKey and event.named_instance is None
@@ -0,0 +1,105 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import time
+import pytest
+from Dpowers.events import NamedKey
+from Dpowers.events.trigman import PatternListener
+from Dpowers.events.hotstring import HotstringEngine
+
+
+def key(name, press=True):
+    inst = NamedKey.instance(name)
+    return inst.press_event if press else inst.release_event
+
+
+@pytest.fixture
+def listener():
+    listener = PatternListener()
+    listener.fired = []
+    listener.submit_action = lambda action, hk: listener.fired.append(action)
+    return listener
+
+
+def test_rejected_hold_keeps_the_events(listener):
+    listener.add_hotkey("a", "hold", block=False, chord=False, hold=300)
+    listener.add_hotkey("a", "tap", rls=True, block=False, chord=False)
+    listener.event(key("a"))
+    # released before the hold time: the hold is rejected, so the press is
+    # still available for the release hotkey
+    listener.event(key("a", False))
+    assert listener.fired == ["tap"]
+    listener.event(key("a"))
+    time.sleep(0.5)
+    listener.event(key("a", False))
+    assert listener.fired == ["tap", "hold"]
+
+
+def test_rejected_hold_restores_the_sequence(listener):
+    listener.add_hotkey("a", "hold", block=False, chord=False, hold=300)
+    listener.add_sequence("b a a_rls c", "sequence")
+    for name, press in (("b", True), ("a", True), ("a", False), ("c", True)):
+        listener.event(key(name, press))
+    assert listener.fired == ["sequence"]
+
+
+def test_rejected_timing_keeps_scanning(listener, monkeypatch):
+    from Dpowers.events import trigman
+    clock = [0]
+    monkeypatch.setattr(trigman, "monotonic", lambda: clock[0])
+    listener.add_sequence("a b", "slow", within=100)
+    listener.add_sequence("b c", "overlap")
+    for name in "abc":
+        clock[0] += 0.2
+        listener.event(key(name))
+    assert listener.fired == ["overlap"]
+
+
+def test_hold_expiry_waits_for_the_event_lock(listener):
+    listener.add_hotkey("a", "hold", block=False, chord=False, hold=50)
+    with listener._event_lock:
+        listener.event(key("a"))
+        time.sleep(0.2)
+        # the timer_wheel thread must not change the state meanwhile
+        assert listener.fired == [] and listener._holds
+    deadline = time.monotonic() + 5
+    while not listener.fired and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert listener.fired == ["hold"] and not listener._holds
+
+
+def test_hotstrings_are_not_limited_by_the_actions():
+    listener = PatternListener()
+    engine = HotstringEngine(listener, anywhere=True, undo=False)
+    sent = []
+    engine.keyb = Sender(sent)
+    engine.add("ab", "X")
+    engine.add("cd", "Y")
+    # an action of the listener is running
+    listener.thread_limit.active = listener.thread_limit.limit
+    futures = []
+    for name in "abcd":
+        future = engine.event(key(name, False))
+        if future: futures.append(future)
+    for future in futures: future.result(5)
+    assert sent == ["X", "Y"]
+
+
+class Sender:
+    def __init__(self, sent):
+        self.send = sent.append
@@ -0,0 +1,63 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import io
+import time
+import pytest
+from Dpowers.events.trigman import PatternListener
+
+
+def fast(hk): pass
+
+def slow(hk): time.sleep(0.3)
+
+def failing(hk): raise KeyError(hk)
+
+
+def test_actions_are_profiled():
+    listener = PatternListener()
+    for _ in range(3): listener.runscript(fast, "a", time.perf_counter_ns())
+    listener.runscript(slow, "b")
+    listener.runscript(fast, "c")
+    with pytest.raises(KeyError): listener.runscript(failing, "d")
+    rows = listener.stats()
+    assert rows[0]["action"].endswith("slow")
+    by_name = {row["action"].rsplit(".", 1)[-1]: row for row in rows}
+    assert by_name["fast"]["count"] == 4
+    assert by_name["fast"]["triggers"] == ["a", "c"]
+    assert by_name["slow"]["total"] >= 300
+    assert by_name["failing"]["errors"] == 1
+    assert isinstance(listener.profiler.actions[failing].last_error, KeyError)
+    out = io.StringIO()
+    listener.dump_stats(file=out)
+    assert len(out.getvalue().splitlines()) == 4
+    listener.profiler.reset()
+    assert listener.stats() == []
+
+
+def test_slow_actions_are_reported():
+    listener = PatternListener()
+    profiler = listener.profiler
+    reported = []
+    profiler.slow_action_handler = lambda *args: reported.append(args)
+    profiler.budget = 100
+    listener.runscript(fast, "a")
+    listener.runscript(slow, "b")
+    time.sleep(0.2)
+    assert reported == [(slow, "b", 100)]
+    assert list(profiler.slow) == reported
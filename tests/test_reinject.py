@@ -0,0 +1,49 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import pytest
+from Dpowers.events import NamedKey, HookAdaptor
+from Dpowers.events.trigman import TriggerManager, RegisteredHook
+
+
+def key(name, press=True):
+    inst = NamedKey.instance(name)
+    return inst.press_event if press else inst.release_event
+
+
+@pytest.fixture
+def tm():
+    tm = TriggerManager(timeout=None)
+    yield tm
+    tm._stop_watcher()
+
+
+def test_table_follows_the_blocked_hotkeys(tm):
+    rhook = RegisteredHook(tm.buffer, HookAdaptor("virtual").keys(), tm)
+    tm.registered_hooks.append(rhook)
+    assert rhook.reinject_func(key("a"))
+    tm.add_hotkey("a", lambda *args: None)
+    tm.add_hotkey("b", lambda *args: None, block=False)
+    rhook.add_hotkey("enter", lambda *args: None)
+    assert not rhook.reinject_func(key("a"))
+    assert rhook.reinject_func(key("a", False))
+    assert rhook.reinject_func(key("b"))
+    # the events of the hooks carry the standard names
+    assert not rhook.reinject_func(key("Return"))
+    assert rhook.reinject_func(NamedKey.Event("c"))
+
@@ -0,0 +1,89 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+from Dpowers.events import NamedKey
+from Dpowers.events.trigman import PatternListener, TriggerManager
+
+
+def key(name, press=True):
+    inst = NamedKey.instance(name)
+    return inst.press_event if press else inst.release_event
+
+
+def listener(definitions, cls=PatternListener):
+    listener = cls() if cls is PatternListener else cls(timeout=None)
+    for string, action, kwargs in definitions:
+        listener.add_hotkey(string, action, block=False, **kwargs)
+    return listener
+
+
+def fired_by(listener, *names):
+    fired = []
+    listener.submit_action = lambda action, hk: fired.append(action)
+    for name in names:
+        listener.event(key(name))
+        listener.event(key(name, False))
+    return fired
+
+
+def test_only_differences_are_applied():
+    old = listener([("a", "A", {}), ("b", "B", {}), ("ctrl+c", "C",
+        dict(chord=True))])
+    kept = old._definitions()
+    new = listener([("a", "A", {}), ("b", "B2", {}), ("d", "D", {}),
+        ("ctrl+c", "C", dict(chord=True))])
+    assert old.reload(new) == dict(added=1, removed=0, changed=1)
+    # unchanged triggers keep their event objects
+    assert old._definitions()[(False, "a")] is kept[(False, "a")]
+    assert fired_by(old, "a", "b", "d") == ["A", "B2", "D"]
+    assert old.reload(listener([("d", "D", {})])) == dict(added=0,
+        removed=3, changed=0)
+    assert fired_by(old, "a", "b", "d") == ["D"]
+    assert not old.chords.table
+    assert old.reload(listener([("d", "D", {})])) == dict(added=0,
+        removed=0, changed=0)
+
+
+def test_changed_timing_counts_as_change():
+    old = listener([("a", "A", {})])
+    new = listener([("a", "A", dict(hold=300))])
+    assert old.reload(new) == dict(added=0, removed=0, changed=1)
+    assert old.timing == new.timing
+    assert old.reload(listener([("a", "A", {})]))["changed"] == 1
+    assert not old.timing
+
+
+def test_trigger_manager_reload():
+    old = TriggerManager(timeout=None)
+    old.context("Editor").add_hotkey("a", "A", block=False)
+    old.context("Terminal").add_hotkey("b", "B", block=False)
+    old.add_hotstrings({"btw": "by the way"})
+    editor = old.contexts[0]
+    new = TriggerManager(timeout=None)
+    new.context("Editor").add_hotkey("a", "A2", block=False)
+    new.context("Browser").add_hotkey("c", "C", block=False)
+    new.add_hotstrings({"btw": "by the way", "afaik": "as far as I know"})
+    counts = old.reload(new)
+    assert counts == dict(added=1, removed=1, changed=1, hotstrings=1)
+    # the table of an unchanged search is kept
+    assert old.contexts[0] is editor and editor.eventdict[
+        editor._definitions()[(False, "a")]] == "A2"
+    assert [c.search for c in old.contexts] == [editor.search,
+        new.contexts[1].search]
+    assert old.contexts[1].triggerman_instance is old
+    assert "afaik" in old.hotstrings and len(old.hotstrings) == 2
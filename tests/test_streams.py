@@ -0,0 +1,105 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import asyncio
+import time
+import pytest
+from Dpowers.events import HookAdaptor
+from Dpowers.events.hookpower import adapt_virtual
+from Dpowers.events.waiter import Waiter
+
+emit = adapt_virtual.Keyhook.handler.emit
+
+
+def tap(*names):
+    for args, kwargs in adapt_virtual.key_taps(*names): emit(*args, **kwargs)
+
+
+async def wait_active(hook):
+    deadline = time.monotonic() + 5
+    while not hook.active:
+        assert time.monotonic() < deadline
+        await asyncio.sleep(0.01)
+
+
+def test_stream(daemon_lanes):
+    async def main():
+        async with HookAdaptor("virtual").keys().stream(timeout=None) as \
+                stream:
+            tap("a", "b")
+            events = [await stream.get(5) for _ in range(4)]
+            assert await stream.get(0.05) is None
+        assert stream._closed and not stream.hook.active
+        async for event in stream: raise AssertionError(event)
+        return events
+    events = asyncio.run(main())
+    assert [str(e) for e in events] == ["a", "a_rls", "b", "b_rls"]
+
+
+def test_stream_ends_on_timeout(daemon_lanes):
+    async def main():
+        stream = HookAdaptor("virtual").keys().stream(timeout=0.2)
+        return [event async for event in stream]
+    t0 = time.monotonic()
+    with pytest.warns(UserWarning, match="Timeout"):
+        assert asyncio.run(main()) == []
+    assert time.monotonic() - t0 < 2
+
+
+def test_slow_consumer_loses_the_oldest_events(daemon_lanes):
+    async def main():
+        stream = HookAdaptor("virtual").keys().stream(maxsize=2,
+                timeout=None).start()
+        try:
+            tap("a", "b")
+            deadline = time.monotonic() + 5
+            while stream.dropped < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)  # blocks the loop, like a slow consumer
+            return [await stream.get(1) for _ in range(2)], stream.dropped
+        finally:
+            stream.close()
+    events, dropped = asyncio.run(main())
+    assert [str(e) for e in events] == ["b", "b_rls"] and dropped == 2
+
+
+def test_waiter_does_not_block_the_loop(daemon_lanes):
+    async def main():
+        waiter = Waiter(HookAdaptor("virtual").keys(), maxlen=2, maxtime=5,
+                wait=False)
+        task = asyncio.ensure_future(waiter.start_async())
+        await wait_active(waiter.callback_hook)
+        tap("a")
+        assert await asyncio.wait_for(task, 5) is waiter
+        return waiter
+    waiter = asyncio.run(main())
+    assert waiter.exitcode == "maxlen" and waiter.num == 2
+
+
+def test_cancelled_waiter_is_stopped(daemon_lanes):
+    async def main():
+        waiter = Waiter(HookAdaptor("virtual").keys(), maxtime=5, wait=False)
+        task = asyncio.ensure_future(waiter.start_async())
+        await wait_active(waiter.callback_hook)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        return waiter
+    waiter = asyncio.run(main())
+    assert waiter.exitcode == "cancelled" and not waiter.callback_hook.active
@@ -0,0 +1,134 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import random
+from Dpowers.events.hookpower.baseclasses import SynFrameMixin
+
+# the codes of linux/input-event-codes.h
+EV_SYN, EV_KEY, EV_ABS, EV_MSC = 0, 1, 3, 4
+SYN_REPORT, SYN_DROPPED = 0, 3
+ABS_X, ABS_Y = 0, 1
+
+
+class Device:
+    def __init__(self, keys=(), axes=None):
+        self.keys = set(keys)
+        self.axes = dict(axes or {})
+
+
+class Handler(SynFrameMixin):
+    EV_SYN, EV_KEY, EV_ABS = EV_SYN, EV_KEY, EV_ABS
+    SYN_REPORT, SYN_DROPPED = SYN_REPORT, SYN_DROPPED
+    
+    def __init__(self, capture=False):
+        super().__init__()
+        self.capture_active = capture
+        self.frames = []
+        self.reinjected = []
+    
+    def process_frame(self, frame, dev):
+        self.frames.append(list(frame))
+    
+    def device_state(self, dev):
+        return set(dev.keys), dict(dev.axes)
+    
+    def reinject_discarded(self, events, dev):
+        if not self.capture_active: return ()
+        keys = [e for e in events if e[0] == EV_KEY]
+        self.reinjected += keys
+        return keys
+
+
+def feed(handler, dev, events):
+    for ty, co, val in events: handler.process_event(ty, co, val, dev)
+
+
+def random_frames(n, seed):
+    rnd = random.Random(seed)
+    frames = []
+    for _ in range(n):
+        frame = [(rnd.choice((EV_KEY, EV_ABS, EV_MSC)), rnd.randrange(4),
+                rnd.randrange(3)) for _ in range(rnd.randrange(1, 5))]
+        frames.append(frame)
+    return frames
+
+
+def test_frames_as_reported():
+    dev, other = Device(), Device()
+    handler = Handler()
+    frames = random_frames(200, 1)
+    for frame in frames:
+        feed(handler, dev, frame)
+        # the frames of different devices are kept apart
+        feed(handler, other, [(EV_MSC, 9, 9)])
+        feed(handler, dev, [(EV_SYN, SYN_REPORT, 0)])
+        feed(handler, other, [(EV_SYN, SYN_REPORT, 0)])
+    assert handler.frames[::2] == frames
+    assert handler.frames[1::2] == [[(EV_MSC, 9, 9)]] * len(frames)
+
+
+def test_state_tracking():
+    dev = Device(axes={ABS_X: 5, ABS_Y: 7})
+    handler = Handler()
+    feed(handler, dev, [(EV_KEY, 30, 1), (EV_KEY, 31, 1), (EV_ABS, ABS_X, 10),
+        (EV_SYN, SYN_REPORT, 0), (EV_KEY, 30, 0), (EV_SYN, SYN_REPORT, 0)])
+    assert handler.key_state(dev) == {31}
+    # ABS_Y was never reported, so it is read from the device
+    assert handler.abs_state(dev) == {ABS_X: 10, ABS_Y: 7}
+
+
+def test_dropped_events_are_discarded_and_resynced():
+    dev = Device(axes={ABS_X: 0, ABS_Y: 0})
+    handler = Handler()
+    feed(handler, dev, [(EV_KEY, 30, 1), (EV_KEY, 31, 1),
+        (EV_ABS, ABS_Y, 0), (EV_SYN, SYN_REPORT, 0)])
+    # the kernel lost some events, among them the release of 30
+    dev.keys = {31, 32}
+    dev.axes = {ABS_X: 100, ABS_Y: 0}
+    feed(handler, dev, [(EV_KEY, 33, 1), (EV_SYN, SYN_DROPPED, 0),
+        (EV_KEY, 32, 1), (EV_ABS, ABS_X, 100), (EV_SYN, SYN_REPORT, 0)])
+    # nothing after the broken frame up to the SYN_REPORT is processed as is
+    assert handler.frames == [[(EV_KEY, 30, 1), (EV_KEY, 31, 1),
+        (EV_ABS, ABS_Y, 0)], [(EV_KEY, 30, 0), (EV_KEY, 32, 1), (EV_ABS, ABS_X, 100)]]
+    assert handler.key_state(dev) == {31, 32}
+    assert handler.abs_state(dev) == {ABS_X: 100, ABS_Y: 0}
+    assert handler.reinjected == []
+    feed(handler, dev, [(EV_KEY, 31, 0), (EV_SYN, SYN_REPORT, 0)])
+    assert handler.frames[-1] == [(EV_KEY, 31, 0)]
+
+
+def test_discarded_keys_reinjected_while_capturing():
+    dev = Device()
+    handler = Handler(capture=True)
+    dev.keys = {32}
+    feed(handler, dev, [(EV_KEY, 33, 1), (EV_SYN, SYN_DROPPED, 0),
+        (EV_MSC, 4, 1), (EV_KEY, 33, 0), (EV_KEY, 32, 1),
+        (EV_SYN, SYN_REPORT, 0)])
+    # the events reached the system, so they are not resynced again
+    assert handler.reinjected == [(EV_KEY, 33, 1), (EV_KEY, 33, 0),
+        (EV_KEY, 32, 1)]
+    assert handler.frames == []
+    assert handler.key_state(dev) == {32}
+
+
+def test_no_resync_needed():
+    dev = Device(keys={30})
+    handler = Handler()
+    feed(handler, dev, [(EV_KEY, 30, 1), (EV_SYN, SYN_REPORT, 0),
+        (EV_SYN, SYN_DROPPED, 0), (EV_KEY, 30, 2), (EV_SYN, SYN_REPORT, 0)])
+    assert handler.frames == [[(EV_KEY, 30, 1)]]
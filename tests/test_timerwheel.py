@@ -0,0 +1,88 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading, time, random, subprocess, sys, os
+from Dhelpers import timerwheel
+from Dhelpers.timerwheel import TimerWheel
+
+
+def wait_idle(wheel, timeout=5):
+    deadline = time.monotonic() + timeout
+    while (len(wheel) or wheel._running) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not len(wheel)
+
+
+def test_order_and_cancel():
+    wheel = TimerWheel(slots=8)
+    fired = []
+    rnd = random.Random(3)
+    delays = [rnd.randrange(1, 60) / 1000 for _ in range(100)]
+    t0 = time.monotonic()
+    timers = [wheel.schedule(d, lambda d=d: fired.append((d,
+            time.monotonic() - t0))) for d in delays]
+    for timer in timers[::10]: timer.cancel()
+    wait_idle(wheel)
+    expected = sorted(d for i, d in enumerate(delays) if i % 10)
+    assert sorted(d for d, t in fired) == expected
+    # timers of the same tick fire together, otherwise in order
+    assert all(a[0] < b[0] + wheel.tick for a, b in zip(fired, fired[1:]))
+    # never early, and late by at most one tick (plus scheduling noise)
+    assert all(d - 1e-3 <= t < d + wheel.tick + 0.05 for d, t in fired)
+
+
+def test_sleeps_until_the_next_timer():
+    wheel = TimerWheel()
+    done = threading.Event()
+    wheel.schedule(0.3, done.set)
+    assert done.wait(5)
+    wait_idle(wheel)
+    # a thread waking every tick would need about 60 wakeups
+    assert wheel.wakeups <= 3
+
+
+def test_earlier_timer_wakes_the_thread():
+    wheel = TimerWheel()
+    late, early = threading.Event(), threading.Event()
+    wheel.schedule(1, late.set)
+    time.sleep(0.05)
+    t0 = time.monotonic()
+    wheel.schedule(0.02, early.set)
+    assert early.wait(5)
+    assert time.monotonic() - t0 < 0.2
+    assert not late.is_set()
+    assert late.wait(5)
+
+
+def test_many_timers_per_tick():
+    wheel = TimerWheel()
+    count = []
+    for _ in range(2000): wheel.schedule(0.01, count.append, 1)
+    wait_idle(wheel)
+    assert len(count) == 2000
+
+
+def test_pending_timer_does_not_block_exit():
+    code = "from Dhelpers.timerwheel import timer_wheel\n" \
+        "timer_wheel.schedule(60, print, 'too late')\n"
+    dlib = os.path.dirname(os.path.dirname(timerwheel.__file__))
+    t0 = time.monotonic()
+    result = subprocess.run([sys.executable, "-c", code], cwd=dlib,
+            timeout=30, capture_output=True, text=True)
+    assert result.returncode == 0 and "too late" not in result.stdout
+    assert time.monotonic() - t0 < 20
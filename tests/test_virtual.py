@@ -0,0 +1,101 @@
+#
+#
+# Copyright (c) 2020-2025 DPS, dps@my.mail.de
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+#
+#
+import threading
+import time
+import pytest
+from Dpowers import KeyboardAdaptor, MouseAdaptor
+from Dpowers.events import HookAdaptor
+from Dpowers.events.hookpower import adapt_virtual
+
+
+class Collector:
+    
+    def __init__(self, num):
+        self.num = num
+        self.events = []
+        self.done = threading.Event()
+    
+    def __call__(self, event):
+        self.events.append(event)
+        if len(self.events) == self.num: self.done.set()
+    
+    def wait(self):
+        assert self.done.wait(5), self.events
+        return [str(e) for e in self.events]
+
+
+def test_keyboard_loops_back(daemon_lanes):
+    keyb = KeyboardAdaptor("virtual")
+    keyb.default_delay = keyb.default_duration = 0
+    collect = Collector(6)
+    hook = HookAdaptor("virtual").keys(collect, None).start()
+    try:
+        keyb.send("ab<enter>")
+        assert collect.wait() == ["a", "a_rls", "b", "b_rls", "Enter",
+            "Enter_rls"]
+        with pytest.raises(NameError): keyb.press("no_such_key")
+    finally:
+        hook.stop()
+
+
+def test_mouse_loops_back(daemon_lanes):
+    mouse = MouseAdaptor("virtual")
+    collect = Collector(3)
+    hook = HookAdaptor("virtual").buttons(collect, None).start()
+    try:
+        mouse.moveto(10, 20)
+        mouse.move(5, -5)
+        assert mouse.pos() == (15, 15)
+        mouse.press("left")
+        mouse.rls("left")
+        mouse.scroll(1)
+        assert collect.wait() == ["mouse_left", "mouse_left_rls",
+            "scroll_up"]
+        assert (collect.events[0].x, collect.events[0].y) == (15, 15)
+        assert collect.events[2].press is None
+    finally:
+        hook.stop()
+
+
+def test_injector_rate(daemon_lanes):
+    collect = Collector(40)
+    hook = HookAdaptor("virtual").keys(collect, None).start()
+    try:
+        injector = adapt_virtual.Injector(adapt_virtual.Keyhook,
+                adapt_virtual.key_taps("a", "b"), rate=200, repeat=10)
+        t0 = time.perf_counter()
+        rate = injector.run()
+        # the events are scheduled at absolute times from the start
+        assert time.perf_counter() - t0 >= 39 / 200
+        assert injector.num == 40 and 150 < rate < 210
+        assert collect.wait() == ["a", "a_rls", "b", "b_rls"] * 10
+    finally:
+        hook.stop()
+
+
+def test_injector_thread():
+    injector = adapt_virtual.Injector(adapt_virtual.Keyhook.handler,
+            adapt_virtual.key_taps("a"), rate=100, repeat=1000).start()
+    with pytest.raises(RuntimeError): injector.start()
+    time.sleep(0.05)
+    injector.stop()
+    injector.join(5)
+    assert 0 < injector.num < 2000
+    with pytest.raises(ValueError):
+        adapt_virtual.Injector(adapt_virtual.Keyhook, (), rate=0)